@@ -0,0 +1,46 @@
+"""index noh AKU – tickets.leg_signature + ticket_aku_legs pro dedupe importů
+
+Revision ID: add_aku_leg_index
+Revises: add_ticket_search_trgm
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+
+revision: str = "add_aku_leg_index"
+down_revision: Union[str, None] = "add_ticket_search_trgm"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_HAS_SIGNATURE = sa.text("leg_signature IS NOT NULL")
+
+
+def upgrade() -> None:
+    op.add_column("tickets", sa.Column("leg_signature", sa.String(64), nullable=True))
+    op.create_index(
+        "ix_tickets_bookmaker_leg_signature", "tickets", ["bookmaker_id", "leg_signature"],
+        postgresql_where=_HAS_SIGNATURE, sqlite_where=_HAS_SIGNATURE,
+    )
+    op.create_table(
+        "ticket_aku_legs",
+        sa.Column("leg_hash", sa.String(64), primary_key=True),
+        sa.Column("parent_id", sa.Integer(), sa.ForeignKey("tickets.id", ondelete="CASCADE"), primary_key=True),
+    )
+
+    # Naplnit z existujících AKU
+    from app.services.aku_leg_index import rebuild_leg_index
+
+    session = Session(bind=op.get_bind())
+    rebuild_leg_index(session)
+    session.flush()
+
+
+def downgrade() -> None:
+    op.drop_table("ticket_aku_legs")
+    op.drop_index("ix_tickets_bookmaker_leg_signature", table_name="tickets")
+    op.drop_column("tickets", "leg_signature")
@@ -0,0 +1,26 @@
+"""stav tiketu u sázkovky při posledním importu – tickets.import_digest
+
+Revision ID: add_import_digest
+Revises: add_import_fingerprint
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "add_import_digest"
+down_revision: Union[str, None] = "add_import_fingerprint"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Bez naplnění: první import po migraci tikety porovná a digest doplní
+    op.add_column("tickets", sa.Column("import_digest", sa.String(64), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("tickets", "import_digest")
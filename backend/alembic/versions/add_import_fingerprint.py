@@ -0,0 +1,39 @@
+"""otisk importovaného tiketu – tickets.import_fingerprint (unikátní) pro upsert importů
+
+Revision ID: add_import_fingerprint
+Revises: add_import_jobs
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+
+revision: str = "add_import_fingerprint"
+down_revision: Union[str, None] = "add_import_jobs"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Prefixy klíčů sázkovek v ocr_image_path (key_prefix pluginů importu)
+_KEY_PREFIXES = ("tipsport:", "betano:", "fortuna:")
+
+
+def upgrade() -> None:
+    op.add_column("tickets", sa.Column("import_fingerprint", sa.String(64), nullable=True))
+
+    # Naplnit z klíčů existujících importů (před unikátním indexem – duplicity klíčů otisk nedostanou)
+    from app.services.import_fingerprint import backfill_key_fingerprints
+
+    session = Session(bind=op.get_bind())
+    backfill_key_fingerprints(session, _KEY_PREFIXES)
+    session.flush()
+
+    op.create_index("ux_tickets_import_fingerprint", "tickets", ["import_fingerprint"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ux_tickets_import_fingerprint", table_name="tickets")
+    op.drop_column("tickets", "import_fingerprint")
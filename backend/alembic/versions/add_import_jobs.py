@@ -0,0 +1,39 @@
+"""import_jobs – importy ze scraperu zpracované na pozadí
+
+Revision ID: add_import_jobs
+Revises: add_aku_leg_index
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "add_import_jobs"
+down_revision: Union[str, None] = "add_aku_leg_index"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "import_jobs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.Column("bookmaker", sa.String(length=100), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column("total", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("processed", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("counts", sa.JSON(), nullable=True),
+        sa.Column("results", sa.JSON(), nullable=True),
+        sa.Column("error_message", sa.Text(), nullable=True),
+    )
+    op.create_index("ix_import_jobs_id", "import_jobs", ["id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_import_jobs_id", table_name="import_jobs")
+    op.drop_table("import_jobs")
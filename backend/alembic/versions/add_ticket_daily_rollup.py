@@ -0,0 +1,60 @@
+"""ticket_daily_rollup – denní předagregace statistik (+ sloučení větví migrací)
+
+Revision ID: add_ticket_daily_rollup
+Revises: add_import_order_and_new_mark, remove_sofascore_columns
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+
+revision: str = "add_ticket_daily_rollup"
+down_revision: Union[str, None] = ("add_import_order_and_new_mark", "remove_sofascore_columns")
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "ticket_daily_rollup",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("sport_id", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("bookmaker_id", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("league_id", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("market_type_id", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("odds_bucket", sa.String(16), nullable=False, server_default=""),
+        sa.Column("is_live", sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column("status", sa.String(16), nullable=False),
+        sa.Column("is_aku_parent", sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column("event_weekday", sa.SmallInteger(), nullable=False, server_default="-1"),
+        sa.Column("bets_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("stake_total", sa.Numeric(14, 2), nullable=False, server_default="0"),
+        sa.Column("profit_total", sa.Numeric(14, 2), nullable=False, server_default="0"),
+        sa.Column("payout_total", sa.Numeric(14, 2), nullable=False, server_default="0"),
+        sa.Column("odds_total", sa.Numeric(14, 2), nullable=False, server_default="0"),
+        sa.UniqueConstraint(
+            "day", "sport_id", "bookmaker_id", "league_id", "market_type_id",
+            "odds_bucket", "is_live", "status", "is_aku_parent", "event_weekday",
+            name="uq_ticket_daily_rollup_key",
+        ),
+    )
+    op.create_index("ix_ticket_daily_rollup_id", "ticket_daily_rollup", ["id"])
+    op.create_index("ix_ticket_daily_rollup_day", "ticket_daily_rollup", ["day"])
+
+    # Naplnit z existujících tiketů
+    from app.services.rollup_service import rebuild_rollup
+
+    session = Session(bind=op.get_bind())
+    rebuild_rollup(session)
+    session.flush()
+
+
+def downgrade() -> None:
+    op.drop_index("ix_ticket_daily_rollup_day", table_name="ticket_daily_rollup")
+    op.drop_index("ix_ticket_daily_rollup_id", table_name="ticket_daily_rollup")
+    op.drop_table("ticket_daily_rollup")
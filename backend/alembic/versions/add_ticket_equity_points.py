@@ -0,0 +1,45 @@
+"""ticket_equity_points – persistovaný průběh equity a streaků
+
+Revision ID: add_ticket_equity_points
+Revises: add_ticket_daily_rollup
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+
+revision: str = "add_ticket_equity_points"
+down_revision: Union[str, None] = "add_ticket_daily_rollup"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "ticket_equity_points",
+        sa.Column("ticket_id", sa.Integer(), sa.ForeignKey("tickets.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("cumulative", sa.Numeric(14, 2), nullable=False, server_default="0"),
+        sa.Column("peak", sa.Numeric(14, 2), nullable=False, server_default="0"),
+        sa.Column("max_drawdown", sa.Numeric(14, 2), nullable=False, server_default="0"),
+        sa.Column("streak", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("best_streak", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("worst_streak", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.create_index("ix_ticket_equity_points_position", "ticket_equity_points", ["created_at", "ticket_id"])
+
+    # Naplnit z existujících tiketů
+    from app.services.equity_service import rebuild_equity
+
+    session = Session(bind=op.get_bind())
+    rebuild_equity(session)
+    session.flush()
+
+
+def downgrade() -> None:
+    op.drop_index("ix_ticket_equity_points_position", table_name="ticket_equity_points")
+    op.drop_table("ticket_equity_points")
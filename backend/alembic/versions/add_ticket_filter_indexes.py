@@ -0,0 +1,53 @@
+"""composite/partial indexy tiketů podle filtrů statistik, seznamu a dedupe importů
+
+Revision ID: add_ticket_filter_indexes
+Revises: add_ticket_equity_points
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "add_ticket_filter_indexes"
+down_revision: Union[str, None] = "add_ticket_equity_points"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_STATS_SCOPE = sa.text("parent_id IS NOT NULL OR ticket_type <> 'aku'")
+_HAS_PARENT = sa.text("parent_id IS NOT NULL")
+
+
+def upgrade() -> None:
+    op.create_index("ix_tickets_created_at_id", "tickets", ["created_at", "id"])
+    op.create_index("ix_tickets_status_created_at", "tickets", ["status", "created_at"])
+    op.create_index("ix_tickets_bookmaker_created_at", "tickets", ["bookmaker_id", "created_at"])
+    op.create_index("ix_tickets_sport_created_at", "tickets", ["sport_id", "created_at"])
+    op.create_index(
+        "ix_tickets_stats_created_at", "tickets", ["created_at"],
+        postgresql_where=_STATS_SCOPE, sqlite_where=_STATS_SCOPE,
+    )
+    op.create_index(
+        "ix_tickets_parent_id", "tickets", ["parent_id"],
+        postgresql_where=_HAS_PARENT, sqlite_where=_HAS_PARENT,
+    )
+    op.create_index("ix_tickets_bookmaker_ref", "tickets", ["bookmaker_id", "ocr_image_path"])
+    op.create_index("ix_tickets_bookmaker_teams", "tickets", ["bookmaker_id", "home_team", "away_team"])
+    op.create_index("ix_tickets_tipsport_match_id", "tickets", ["tipsport_match_id"])
+
+
+def downgrade() -> None:
+    for name in (
+        "ix_tickets_tipsport_match_id",
+        "ix_tickets_bookmaker_teams",
+        "ix_tickets_bookmaker_ref",
+        "ix_tickets_parent_id",
+        "ix_tickets_stats_created_at",
+        "ix_tickets_sport_created_at",
+        "ix_tickets_bookmaker_created_at",
+        "ix_tickets_status_created_at",
+        "ix_tickets_created_at_id",
+    ):
+        op.drop_index(name, table_name="tickets")
@@ -0,0 +1,45 @@
+"""pg_trgm GIN indexy pro hledání v tiketech (týmy, trh, výběr, název ligy) + index league_id
+
+Revision ID: add_ticket_search_trgm
+Revises: add_ticket_filter_indexes
+Create Date: 2026-10-18
+
+Trigram indexy jen PostgreSQL – na jiných DB se hledá přes ILIKE bez indexu (app/services/ticket_search.py).
+Výraz indexu musí odpovídat ticket_search.search_document().
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "add_ticket_search_trgm"
+down_revision: Union[str, None] = "add_ticket_filter_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_SEARCH_DOCUMENT = (
+    "(coalesce(home_team, '') || ' ' || coalesce(away_team, '') || ' ' "
+    "|| coalesce(market_label, '') || ' ' || coalesce(selection, ''))"
+)
+
+
+def upgrade() -> None:
+    # Druhá větev OR při hledání (tikety v nalezených ligách) + filtr league_id
+    op.create_index("ix_tickets_league_created_at", "tickets", ["league_id", "created_at"])
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute(
+        f"CREATE INDEX IF NOT EXISTS ix_tickets_search_trgm ON tickets "
+        f"USING gin ({_SEARCH_DOCUMENT} gin_trgm_ops)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_leagues_name_trgm ON leagues USING gin (name gin_trgm_ops)"
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_leagues_name_trgm")
+        op.execute("DROP INDEX IF EXISTS ix_tickets_search_trgm")
+    op.drop_index("ix_tickets_league_created_at", table_name="tickets")
@@ -26,8 +26,24 @@ class Settings(BaseSettings):
     # CORS – čárkou oddělený seznam povolených originů
     cors_origins: str = "http://localhost:3001,http://127.0.0.1:3001,http://10.0.1.42:3001"
 
+    # Statistiky: "sql" = agregace přes GROUP BY v DB, "python" = jeden průchod nad sloupci tiketů
+    stats_engine: str = "sql"
+    # Statistiky a Analytics z předpočítaných tabulek: ticket_daily_rollup (kde to filtry dovolí)
+    # a ticket_equity_points (streaky a drawdown celkového přehledu bez filtrů)
+    stats_use_rollup: bool = False
+    # Cache výsledků overview/analytics (LRU + TTL, zneplatní se po zápisu tiketů); 0 = vypnuto
+    stats_cache_ttl_seconds: int = 300
+    stats_cache_size: int = 128
+    # Cache číselníků pro importy (sporty, sázkovky, typy sázek); zneplatní se po zápisu, TTL kvůli více workerům
+    lookup_cache_ttl_seconds: int = 300
+
+    # LIVE /api/live/state: stav tiketu beze změny vyhodnocení se zapíše do DB nejvýš jednou za N s; 0 = bez cache
+    live_state_write_interval_seconds: int = 30
+
     # Live skóre – fotbal přes football-data.org API
     football_data_org_api_key: str = ""
+    # Live feed football-data.org se stahuje nejvýš jednou za N s (free tarif: 10 požadavků/min)
+    football_data_live_interval_seconds: int = 60
 
     class Config:
         env_file = str(_ENV_FILE) if _ENV_FILE.exists() else ".env"
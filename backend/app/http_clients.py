@@ -0,0 +1,66 @@
+"""
+Sdílené HTTP klienty aplikace – jeden pool spojení (keep-alive) na cílovou službu místo
+nového klienta (a nového TCP/TLS spojení) na každý požadavek.
+
+  ollama()         – AsyncClient pro Ollama (OCR, AI analýza, LIVE vyhodnocení)
+  webhook()        – AsyncClient pro notifikace – webhook a Telegram (notification_queue)
+  football_data()  – Client pro football-data.org (sync – volá se z threadpoolu)
+
+Každá služba má vlastní limity spojení (Ollama na stroji bez GPU zvládne jen pár
+požadavků naráz). Klienty vytváří a zavírá lifespan aplikace (app.main); mimo běžící
+aplikaci (skripty) se vytvoří líně při prvním použití. Timeout se předává u požadavku.
+"""
+from typing import Optional
+
+import httpx
+
+_OLLAMA_LIMITS = httpx.Limits(max_connections=4, max_keepalive_connections=2, keepalive_expiry=60.0)
+_WEBHOOK_LIMITS = httpx.Limits(max_connections=10, max_keepalive_connections=5, keepalive_expiry=30.0)
+_FOOTBALL_DATA_LIMITS = httpx.Limits(max_connections=4, max_keepalive_connections=2, keepalive_expiry=30.0)
+
+# Výchozí timeout; jednotlivá volání si ho přepisují (např. generování přes Ollamu 300 s)
+_DEFAULT_TIMEOUT = httpx.Timeout(10.0)
+
+_ollama: Optional[httpx.AsyncClient] = None
+_webhook: Optional[httpx.AsyncClient] = None
+_football_data: Optional[httpx.Client] = None
+
+
+def ollama() -> httpx.AsyncClient:
+    global _ollama
+    if _ollama is None or _ollama.is_closed:
+        _ollama = httpx.AsyncClient(timeout=_DEFAULT_TIMEOUT, limits=_OLLAMA_LIMITS)
+    return _ollama
+
+
+def webhook() -> httpx.AsyncClient:
+    global _webhook
+    if _webhook is None or _webhook.is_closed:
+        _webhook = httpx.AsyncClient(timeout=_DEFAULT_TIMEOUT, limits=_WEBHOOK_LIMITS)
+    return _webhook
+
+
+def football_data() -> httpx.Client:
+    global _football_data
+    if _football_data is None or _football_data.is_closed:
+        _football_data = httpx.Client(timeout=_DEFAULT_TIMEOUT, limits=_FOOTBALL_DATA_LIMITS)
+    return _football_data
+
+
+def open_all() -> None:
+    """Vytvoří klienty (lifespan – startup)."""
+    ollama()
+    webhook()
+    football_data()
+
+
+async def close_all() -> None:
+    """Zavře klienty a jejich spojení (lifespan – shutdown)."""
+    global _ollama, _webhook, _football_data
+    if _ollama is not None:
+        await _ollama.aclose()
+    if _webhook is not None:
+        await _webhook.aclose()
+    if _football_data is not None:
+        _football_data.close()
+    _ollama = _webhook = _football_data = None
@@ -2,9 +2,9 @@ import json
 import re
 import base64
 import logging
-import httpx
 import time
 from typing import Optional, List, Union
+from app import http_clients
 from app.config import get_settings
 from app.schemas import OcrParsedTicket
 
@@ -47,16 +47,16 @@ async def _ollama_generate(
 
     logger.info(f"Ollama: Volám model {model}, images={len(images) if images else 0}")
 
-    async with httpx.AsyncClient(timeout=300.0) as client:
-        resp = await client.post(
-            f"{settings.ollama_url}/api/generate",
-            json=payload
-        )
-        resp.raise_for_status()
-        data = resp.json()
-        response_text = data.get("response", "")
-        logger.info(f"Ollama: Odpověď {len(response_text)} znaků. Prvních 100: {response_text[:100]}")
-        return response_text
+    resp = await http_clients.ollama().post(
+        f"{settings.ollama_url}/api/generate",
+        json=payload,
+        timeout=300.0,
+    )
+    resp.raise_for_status()
+    data = resp.json()
+    response_text = data.get("response", "")
+    logger.info(f"Ollama: Odpověď {len(response_text)} znaků. Prvních 100: {response_text[:100]}")
+    return response_text
 
 
 def _extract_json_from_text(text: str) -> Optional[list]:
@@ -524,15 +524,15 @@ async def parse_ticket_image(image_base64: str, bookmaker: str = "tipsport") ->
 
     # Na začátku každého OCR vyložit model, aby další běh začínal jako čerstvý import (žádná paměť)
     try:
-        async with httpx.AsyncClient(timeout=15.0) as client:
-            await client.post(
-                f"{settings.ollama_url}/api/generate",
-                json={
-                    "model": settings.ollama_vision_model,
-                    "prompt": "",
-                    "keep_alive": 0,
-                },
-            )
+        await http_clients.ollama().post(
+            f"{settings.ollama_url}/api/generate",
+            json={
+                "model": settings.ollama_vision_model,
+                "prompt": "",
+                "keep_alive": 0,
+            },
+            timeout=15.0,
+        )
         logger.info("OCR: Vision model vyložen před novým během (čistý start).")
     except Exception as pre_unload_err:
         logger.debug(f"OCR: Předběžný unload přeskočen (model možná nebyl načten): {pre_unload_err}")
@@ -650,15 +650,15 @@ Reply ONLY with the array, starting with [."""
 
     # Po každém OCR explicitně vyložit vision model z paměti, aby další import neviděl stará data
     try:
-        async with httpx.AsyncClient(timeout=15.0) as client:
-            await client.post(
-                f"{settings.ollama_url}/api/generate",
-                json={
-                    "model": settings.ollama_vision_model,
-                    "prompt": "",
-                    "keep_alive": 0,
-                },
-            )
+        await http_clients.ollama().post(
+            f"{settings.ollama_url}/api/generate",
+            json={
+                "model": settings.ollama_vision_model,
+                "prompt": "",
+                "keep_alive": 0,
+            },
+            timeout=15.0,
+        )
         logger.info("OCR: Vision model vyložen z paměti (další import poběží s čistým stavem).")
     except Exception as unload_err:
         logger.warning(f"OCR: Nepodařilo se vyložit model po odpovědi: {unload_err}")
@@ -681,29 +681,30 @@ async def check_ocr_health(unload: bool = False) -> bool:
     """Ověří, zda je Ollama a vision model dostupný.
     Pokud unload=True, pošle požadavek na uvolnění modelu z VRAM."""
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            if unload:
-                logger.info(f"OCR: Unloading model {settings.ollama_vision_model}")
-                resp = await client.post(
-                    f"{settings.ollama_url}/api/generate",
-                    json={
-                        "model": settings.ollama_vision_model,
-                        "prompt": "",
-                        "keep_alive": 0,
-                    },
-                )
-                if resp.status_code != 200:
-                    logger.warning(f"OCR: Unload request returned {resp.status_code}")
-                return True
-
-            resp = await client.get(f"{settings.ollama_url}/api/tags")
+        client = http_clients.ollama()
+        if unload:
+            logger.info(f"OCR: Unloading model {settings.ollama_vision_model}")
+            resp = await client.post(
+                f"{settings.ollama_url}/api/generate",
+                json={
+                    "model": settings.ollama_vision_model,
+                    "prompt": "",
+                    "keep_alive": 0,
+                },
+                timeout=10.0,
+            )
             if resp.status_code != 200:
-                return False
-            
-            # Volitelně můžeme zkontrolovat, zda model existuje
-            data = resp.json()
-            models = [m.get("name") for m in data.get("models", [])]
-            return settings.ollama_vision_model in models or f"{settings.ollama_vision_model}:latest" in models
+                logger.warning(f"OCR: Unload request returned {resp.status_code}")
+            return True
+
+        resp = await client.get(f"{settings.ollama_url}/api/tags", timeout=10.0)
+        if resp.status_code != 200:
+            return False
+        
+        # Volitelně můžeme zkontrolovat, zda model existuje
+        data = resp.json()
+        models = [m.get("name") for m in data.get("models", [])]
+        return settings.ollama_vision_model in models or f"{settings.ollama_vision_model}:latest" in models
     except Exception:
         return False
 
@@ -4,6 +4,8 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from app import http_clients
+from app.services import import_jobs, notification_queue
 from app.config import get_settings
 from app.routers.tickets import router as tickets_router
 
@@ -28,7 +30,17 @@ settings = get_settings()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    yield
+    # Import joby rozběhnuté před restartem už neběží
+    import_jobs.fail_interrupted_jobs()
+    # Sdílené HTTP klienty (Ollama, webhook, football-data) s poolem spojení
+    http_clients.open_all()
+    # Worker fronty notifikací (webhook, Telegram) – endpointy na doručení nečekají
+    notification_queue.start()
+    try:
+        yield
+    finally:
+        await notification_queue.stop()
+        await http_clients.close_all()
 
 
 app = FastAPI(
@@ -4,11 +4,15 @@ from app.models.models import (
     League,
     Ticket,
     AiAnalysis,
+    ImportJob,
     MarketType,
     TicketStatus,
     TicketType,
     TicketSource,
     AppSettings,
+    TicketDailyRollup,
+    TicketEquityPoint,
+    TicketAkuLeg,
 )
 
 __all__ = [
@@ -17,9 +21,13 @@ __all__ = [
     "League",
     "Ticket",
     "AiAnalysis",
+    "ImportJob",
     "MarketType",
     "TicketStatus",
     "TicketType",
     "TicketSource",
     "AppSettings",
+    "TicketDailyRollup",
+    "TicketEquityPoint",
+    "TicketAkuLeg",
 ]
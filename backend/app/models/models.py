@@ -1,8 +1,8 @@
 import enum
-from datetime import datetime
+from datetime import date, datetime
 from sqlalchemy import (
-    Column, Integer, String, Numeric, Boolean, DateTime,
-    ForeignKey, Enum, Text, JSON, Table
+    Column, Integer, SmallInteger, String, Numeric, Boolean, Date, DateTime,
+    ForeignKey, Enum, Text, JSON, Table, UniqueConstraint, Index, text
 )
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -96,6 +96,39 @@ class Ticket(Base):
     Obsahuje jak metadata tiketu, tak detail sázky.
     """
     __tablename__ = "tickets"
+    # Indexy podle skutečných filtrů (stats_service, _tickets_query, dedupe importů, LIVE)
+    __table_args__ = (
+        Index("ix_tickets_created_at_id", "created_at", "id"),
+        Index("ix_tickets_status_created_at", "status", "created_at"),
+        Index("ix_tickets_bookmaker_created_at", "bookmaker_id", "created_at"),
+        Index("ix_tickets_sport_created_at", "sport_id", "created_at"),
+        Index("ix_tickets_league_created_at", "league_id", "created_at"),
+        # Statistiky vynechávají rodiče AKU (_not_aku_parent)
+        Index(
+            "ix_tickets_stats_created_at", "created_at",
+            postgresql_where=text("parent_id IS NOT NULL OR ticket_type <> 'aku'"),
+            sqlite_where=text("parent_id IS NOT NULL OR ticket_type <> 'aku'"),
+        ),
+        Index(
+            "ix_tickets_parent_id", "parent_id",
+            postgresql_where=text("parent_id IS NOT NULL"),
+            sqlite_where=text("parent_id IS NOT NULL"),
+        ),
+        # Dedupe importů: otisk tiketu (app.services.import_fingerprint), klíč sázkovky
+        # uložený v ocr_image_path ("tipsport:…") + týmy
+        Index("ux_tickets_import_fingerprint", "import_fingerprint", unique=True),
+        Index("ix_tickets_bookmaker_ref", "bookmaker_id", "ocr_image_path"),
+        Index("ix_tickets_bookmaker_teams", "bookmaker_id", "home_team", "away_team"),
+        Index("ix_tickets_tipsport_match_id", "tipsport_match_id"),
+        # Dedupe AKU podle noh (app.services.aku_leg_index)
+        Index(
+            "ix_tickets_bookmaker_leg_signature", "bookmaker_id", "leg_signature",
+            postgresql_where=text("leg_signature IS NOT NULL"),
+            sqlite_where=text("leg_signature IS NOT NULL"),
+        ),
+        # Hledání: v PostgreSQL navíc GIN trigram index ix_tickets_search_trgm (jen migrace,
+        # výraz viz app.services.ticket_search.search_document)
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
@@ -139,6 +172,13 @@ class Ticket(Base):
     import_batch_id = Column(String(64), nullable=True)   # ID dávky (např. timestamp)
     import_batch_index = Column(Integer, nullable=True)   # Pořadí v dávce (0, 1, 2, …)
     is_newly_imported = Column(Boolean, default=False, nullable=False)
+    # Otisk importovaného tiketu (sázkovka + klíč, jinak obsah), viz app.services.import_fingerprint
+    import_fingerprint = Column(String(64), nullable=True)
+    # Hash stavu tiketu u sázkovky při posledním importu – beze změny se import přeskočí
+    import_digest = Column(String(64), nullable=True)
+
+    # AKU rodič: hash množiny noh (domácí, hosté) dětí, viz app.services.aku_leg_index
+    leg_signature = Column(String(64), nullable=True)
 
     # Timestamps
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -152,6 +192,87 @@ class Ticket(Base):
     parent = relationship("Ticket", remote_side=[id], backref="children")
 
 
+# ─── Statistiky: denní rollup ────────────────────────────
+
+class TicketDailyRollup(Base):
+    """
+    Předagregované statistiky tiketů po dnech (podle created_at) a dimenzích.
+    Udržuje se inkrementálně při zápisu tiketů (app.services.rollup_service),
+    kompletně přepočítat jde přes `python -m scripts.rebuild_ticket_rollup`.
+
+    Chybějící vazby se ukládají jako 0 (NULL by rozbil unikátní klíč).
+    Počty výher/proher/void plynou z dimenze status (bets_count řádků s daným stavem).
+    """
+    __tablename__ = "ticket_daily_rollup"
+    __table_args__ = (
+        UniqueConstraint(
+            "day", "sport_id", "bookmaker_id", "league_id", "market_type_id",
+            "odds_bucket", "is_live", "status", "is_aku_parent", "event_weekday",
+            name="uq_ticket_daily_rollup_key",
+        ),
+    )
+
+    # Den pro tikety bez created_at (day je součástí unikátního klíče, nesmí být NULL)
+    NO_DAY = date(1900, 1, 1)
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    # Klíč
+    day = Column(Date, nullable=False, index=True)
+    sport_id = Column(Integer, nullable=False, default=0)
+    bookmaker_id = Column(Integer, nullable=False, default=0)
+    league_id = Column(Integer, nullable=False, default=0)
+    market_type_id = Column(Integer, nullable=False, default=0)
+    odds_bucket = Column(String(16), nullable=False, default="")
+    is_live = Column(Boolean, nullable=False, default=False)
+    status = Column(String(16), nullable=False)  # hodnota TicketStatus
+    is_aku_parent = Column(Boolean, nullable=False, default=False)
+    event_weekday = Column(SmallInteger, nullable=False, default=-1)  # 0=po … 6=ne, -1 = neznámý
+
+    # Hodnoty
+    bets_count = Column(Integer, nullable=False, default=0)
+    stake_total = Column(Numeric(14, 2), nullable=False, default=0)
+    profit_total = Column(Numeric(14, 2), nullable=False, default=0)
+    payout_total = Column(Numeric(14, 2), nullable=False, default=0)
+    odds_total = Column(Numeric(14, 2), nullable=False, default=0)
+
+
+class TicketEquityPoint(Base):
+    """
+    Průběh equity a streaků po každém vypořádaném tiketu (bez rodičů AKU),
+    v pořadí created_at (NULL první), id – stejně jako overview.
+    Poslední bod = aktuální globální stav (streak, max. drawdown) bez procházení historie.
+    Udržuje app.services.equity_service; nový tiket na konci = jeden INSERT,
+    změna uprostřed historie přepočítá body od místa změny.
+    """
+    __tablename__ = "ticket_equity_points"
+    __table_args__ = (
+        Index("ix_ticket_equity_points_position", "created_at", "ticket_id"),
+    )
+
+    ticket_id = Column(Integer, ForeignKey("tickets.id", ondelete="CASCADE"), primary_key=True)
+    created_at = Column(DateTime, nullable=True)
+
+    cumulative = Column(Numeric(14, 2), nullable=False, default=0)
+    peak = Column(Numeric(14, 2), nullable=False, default=0)
+    max_drawdown = Column(Numeric(14, 2), nullable=False, default=0)
+    streak = Column(Integer, nullable=False, default=0)  # >0 výhry v řadě, <0 prohry v řadě
+    best_streak = Column(Integer, nullable=False, default=0)
+    worst_streak = Column(Integer, nullable=False, default=0)
+
+
+class TicketAkuLeg(Base):
+    """
+    Invertovaný index noh AKU: hash dvojice (domácí, hosté) dítěte → rodič.
+    Částečná shoda (známe jen některé nohy) = rodiče, kteří mají všechny hledané hashe.
+    Udržuje app.services.aku_leg_index.
+    """
+    __tablename__ = "ticket_aku_legs"
+
+    leg_hash = Column(String(64), primary_key=True)
+    parent_id = Column(Integer, ForeignKey("tickets.id", ondelete="CASCADE"), primary_key=True)
+
+
 # ─── AI Analyses ─────────────────────────────────────────
 
 class AiAnalysis(Base):
@@ -167,6 +288,24 @@ class AiAnalysis(Base):
     error_message = Column(Text, nullable=True)
 
 
+# ─── Import Jobs ─────────────────────────────────────────
+
+class ImportJob(Base):
+    """Import ze scraperu zpracovaný na pozadí (app.services.import_jobs); stav pro polling."""
+    __tablename__ = "import_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+    bookmaker = Column(String(100), nullable=False)
+    status = Column(String(20), nullable=False, default="pending")  # pending | running | done | error
+    total = Column(Integer, nullable=False, default=0)      # počet tiketů v payloadu
+    processed = Column(Integer, nullable=False, default=0)  # zpracované tikety (průběh)
+    counts = Column(JSON, nullable=True)    # průběžně {created, updated, skipped, errors}
+    results = Column(JSON, nullable=True)   # výsledky po tiketech (až po dokončení)
+    error_message = Column(Text, nullable=True)
+
+
 class AppSettings(Base):
     __tablename__ = "app_settings"
 
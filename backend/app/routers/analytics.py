@@ -3,13 +3,16 @@ Analytics endpoint: agregované statistiky (KPI, podle sportu, podle typu sázky
 pro stránku Analytics s filtry (období, sázkovka, jen vyhodnocené).
 """
 from decimal import Decimal
-from typing import Optional
-from datetime import datetime
+from typing import NamedTuple, Optional
+from datetime import date, datetime, time
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
 
+from app.config import get_settings
 from app.database import get_db
-from app.models import Ticket, TicketStatus
+from app.models import Ticket, TicketStatus, Sport, MarketType, TicketDailyRollup
+from app.services import stats_cache
 from app.schemas import (
     AnalyticsSummary,
     AnalyticsKpis,
@@ -31,23 +34,106 @@ SETTLED_STATUSES = [
 ]
 
 
+class _Row(NamedTuple):
+    """Jeden tiket (count=1) nebo skupina tiketů z rollupu – vstup pro agregace v summary."""
+    sport_id: Optional[int]
+    sport_name: Optional[str]
+    market_type_id: Optional[int]
+    market_name: Optional[str]
+    day: Optional[date]
+    weekday: int
+    status: TicketStatus
+    count: int
+    stake: Optional[Decimal]
+    profit: Optional[Decimal]
+
+
 def _build_analytics_query(db: Session, date_from=None, date_to=None, bookmaker_id=None, jen_vyhodnocene=None):
-    """Vrátí query tiketů s aplikovanými filtry. Používá created_at pro období."""
-    query = db.query(Ticket).options(
-        joinedload(Ticket.sport),
-        joinedload(Ticket.market_type_rel),
+    """
+    Vrátí dotaz na tikety s aplikovanými filtry (jen potřebné sloupce, bez ORM entit).
+    Používá created_at pro období.
+    """
+    stmt = (
+        select(
+            Ticket.sport_id, Sport.name.label("sport_name"),
+            Ticket.market_type_id, MarketType.name.label("market_name"),
+            Ticket.created_at, Ticket.event_date, Ticket.status, Ticket.stake, Ticket.profit,
+        )
+        .select_from(Ticket)
+        .join(Sport, Ticket.sport_id == Sport.id, isouter=True)
+        .join(MarketType, Ticket.market_type_id == MarketType.id, isouter=True)
     )
     if date_from is not None:
-        query = query.filter(Ticket.created_at >= date_from)
+        stmt = stmt.where(Ticket.created_at >= date_from)
     if date_to is not None:
         # Zahrnout celý den: date_to 00:00 → konec dne 23:59:59
         end_of_day = date_to.replace(hour=23, minute=59, second=59, microsecond=999999)
-        query = query.filter(Ticket.created_at <= end_of_day)
+        stmt = stmt.where(Ticket.created_at <= end_of_day)
+    if bookmaker_id is not None:
+        stmt = stmt.where(Ticket.bookmaker_id == bookmaker_id)
+    if jen_vyhodnocene:
+        stmt = stmt.where(Ticket.status.in_(SETTLED_STATUSES))
+    return stmt
+
+
+def _ticket_rows(db: Session, **filters):
+    """Tikety jako řádky (…, day, weekday, status, count=1, stake, profit) pro společný fold."""
+    for r in db.execute(_build_analytics_query(db, **filters).execution_options(yield_per=2000)):
+        # Den v týdnu: event_date, fallback created_at; trend: created_at, fallback event_date
+        dow_dt = r.event_date or r.created_at
+        trend_dt = r.created_at or r.event_date
+        yield _Row(
+            r.sport_id, r.sport_name, r.market_type_id, r.market_name,
+            trend_dt.date() if trend_dt else None,
+            dow_dt.weekday() if dow_dt and dow_dt.year >= 2000 else -1,
+            r.status, 1, r.stake, r.profit,
+        )
+
+
+def _rollup_rows(db: Session, date_from=None, date_to=None, bookmaker_id=None, jen_vyhodnocene=None):
+    """Totéž co _ticket_rows, ale sečtené z ticket_daily_rollup (řádek = skupina tiketů)."""
+    R = TicketDailyRollup
+    keys = [R.sport_id, Sport.name, R.market_type_id, MarketType.name, R.day, R.event_weekday, R.status]
+    stmt = (
+        select(*keys, func.sum(R.bets_count), func.sum(R.stake_total), func.sum(R.profit_total))
+        .select_from(R)
+        .join(Sport, R.sport_id == Sport.id, isouter=True)
+        .join(MarketType, R.market_type_id == MarketType.id, isouter=True)
+        .group_by(*keys)
+    )
+    if date_from is not None or date_to is not None:
+        stmt = stmt.where(R.day != R.NO_DAY)
+    if date_from is not None:
+        stmt = stmt.where(R.day >= date_from.date())
+    if date_to is not None:
+        stmt = stmt.where(R.day <= date_to.date())
     if bookmaker_id is not None:
-        query = query.filter(Ticket.bookmaker_id == bookmaker_id)
+        stmt = stmt.where(R.bookmaker_id == bookmaker_id)
     if jen_vyhodnocene:
-        query = query.filter(Ticket.status.in_(SETTLED_STATUSES))
-    return query
+        stmt = stmt.where(R.status.in_([s.value for s in SETTLED_STATUSES]))
+    for sport_id, sport_name, market_type_id, market_name, day, weekday, status, count, stake, profit in db.execute(stmt):
+        yield _Row(
+            sport_id or None, sport_name, market_type_id or None, market_name,
+            day if day != R.NO_DAY else None, weekday, TicketStatus(status), count, stake, profit,
+        )
+
+
+def _empty_bucket() -> dict:
+    return {"won": 0, "lost": 0, "void": 0, "stake": Decimal("0"), "profit": Decimal("0"), "count": 0}
+
+
+def _add_to_bucket(bucket: dict, row) -> None:
+    """Přičte řádek (1 tiket nebo skupinu z rollupu) do by_sport/by_market/by_day_of_week."""
+    bucket["count"] += row.count
+    if row.status in SETTLED_STATUSES:
+        bucket["stake"] += Decimal(str(row.stake or 0))
+        bucket["profit"] += Decimal(str(row.profit or 0))
+        if row.status == TicketStatus.won or row.status == TicketStatus.half_win:
+            bucket["won"] += row.count
+        elif row.status == TicketStatus.lost or row.status == TicketStatus.half_loss:
+            bucket["lost"] += row.count
+        else:
+            bucket["void"] += row.count
 
 
 @router.get("/summary", response_model=AnalyticsSummary)
@@ -60,28 +146,36 @@ def get_analytics_summary(
 ):
     """
     Agregované statistiky pro Analytics: KPI, podle sportu, podle sport+typ sázky, trend profitu.
+    Výsledek se cachuje podle filtrů až do dalšího zápisu tiketů (stats_cache).
     """
-    query = _build_analytics_query(
-        db,
+    filters = dict(
         date_from=date_from,
         date_to=date_to,
         bookmaker_id=bookmaker_id,
         jen_vyhodnocene=jen_vyhodnocene,
     )
-    tickets = query.all()
+    return stats_cache.get_or_compute("analytics_summary", filters, lambda: _summarize(db, filters))
+
+
+def _summarize(db: Session, filters: dict) -> AnalyticsSummary:
+    """Výpočet summary – z denního rollupu, pokud je zapnutý a date_from je celý den
+    (date_to se vždy bere do konce dne)."""
+    date_from = filters["date_from"]
+    use_rollup = get_settings().stats_use_rollup and (date_from is None or date_from.time() == time(0))
+    rows = list(_rollup_rows(db, **filters) if use_rollup else _ticket_rows(db, **filters))
 
     # KPI
-    settled = [t for t in tickets if t.status in SETTLED_STATUSES]
-    won_count = sum(1 for t in settled if t.status == TicketStatus.won or t.status == TicketStatus.half_win)
-    lost_count = sum(1 for t in settled if t.status == TicketStatus.lost or t.status == TicketStatus.half_loss)
-    void_count = sum(1 for t in settled if t.status == TicketStatus.void)
-    stake_total = sum(Decimal(str(t.stake or 0)) for t in settled)
-    profit_total = sum(Decimal(str(t.profit or 0)) for t in settled)
+    settled = [r for r in rows if r.status in SETTLED_STATUSES]
+    won_count = sum(r.count for r in settled if r.status == TicketStatus.won or r.status == TicketStatus.half_win)
+    lost_count = sum(r.count for r in settled if r.status == TicketStatus.lost or r.status == TicketStatus.half_loss)
+    void_count = sum(r.count for r in settled if r.status == TicketStatus.void)
+    stake_total = sum(Decimal(str(r.stake or 0)) for r in settled)
+    profit_total = sum(Decimal(str(r.profit or 0)) for r in settled)
     hitrate = (won_count / (won_count + lost_count) * 100) if (won_count + lost_count) > 0 else 0.0
     roi = (float(profit_total) / float(stake_total) * 100) if stake_total else 0.0
 
     kpis = AnalyticsKpis(
-        tickets_count=len(tickets),
+        tickets_count=sum(r.count for r in rows),
         won_count=won_count,
         lost_count=lost_count,
         void_count=void_count,
@@ -93,29 +187,11 @@ def get_analytics_summary(
 
     # by_sport
     by_sport_map = {}
-    for t in tickets:
-        sid = t.sport_id
-        sname = t.sport.name if t.sport else "Neznámý"
-        key = (sid, sname)
+    for r in rows:
+        key = (r.sport_id, r.sport_name or "Neznámý")
         if key not in by_sport_map:
-            by_sport_map[key] = {
-                "won": 0,
-                "lost": 0,
-                "void": 0,
-                "stake": Decimal("0"),
-                "profit": Decimal("0"),
-                "count": 0,
-            }
-        by_sport_map[key]["count"] += 1
-        if t.status in SETTLED_STATUSES:
-            by_sport_map[key]["stake"] += Decimal(str(t.stake or 0))
-            by_sport_map[key]["profit"] += Decimal(str(t.profit or 0))
-            if t.status == TicketStatus.won or t.status == TicketStatus.half_win:
-                by_sport_map[key]["won"] += 1
-            elif t.status == TicketStatus.lost or t.status == TicketStatus.half_loss:
-                by_sport_map[key]["lost"] += 1
-            else:
-                by_sport_map[key]["void"] += 1
+            by_sport_map[key] = _empty_bucket()
+        _add_to_bucket(by_sport_map[key], r)
 
     by_sport = []
     for (sid, sname), d in by_sport_map.items():
@@ -140,31 +216,11 @@ def get_analytics_summary(
 
     # by_market (sport + market_type)
     by_market_map = {}
-    for t in tickets:
-        sid = t.sport_id
-        sname = t.sport.name if t.sport else "Neznámý"
-        mid = t.market_type_id
-        mname = t.market_type_rel.name if t.market_type_rel else "Neznámý"
-        key = (sid, sname, mid, mname)
+    for r in rows:
+        key = (r.sport_id, r.sport_name or "Neznámý", r.market_type_id, r.market_name or "Neznámý")
         if key not in by_market_map:
-            by_market_map[key] = {
-                "won": 0,
-                "lost": 0,
-                "void": 0,
-                "stake": Decimal("0"),
-                "profit": Decimal("0"),
-                "count": 0,
-            }
-        by_market_map[key]["count"] += 1
-        if t.status in SETTLED_STATUSES:
-            by_market_map[key]["stake"] += Decimal(str(t.stake or 0))
-            by_market_map[key]["profit"] += Decimal(str(t.profit or 0))
-            if t.status == TicketStatus.won or t.status == TicketStatus.half_win:
-                by_market_map[key]["won"] += 1
-            elif t.status == TicketStatus.lost or t.status == TicketStatus.half_loss:
-                by_market_map[key]["lost"] += 1
-            else:
-                by_market_map[key]["void"] += 1
+            by_market_map[key] = _empty_bucket()
+        _add_to_bucket(by_market_map[key], r)
 
     by_market = []
     for (sid, sname, mid, mname), d in by_market_map.items():
@@ -191,22 +247,11 @@ def get_analytics_summary(
 
     # by_day_of_week (0=pondělí … 6=neděle; použít event_date, fallback created_at)
     DAY_NAMES = ["Po", "Út", "St", "Čt", "Pá", "So", "Ne"]
-    by_dow_map = {d: {"won": 0, "lost": 0, "void": 0, "stake": Decimal("0"), "profit": Decimal("0"), "count": 0} for d in range(7)}
-    for t in tickets:
-        dt = t.event_date or t.created_at
-        if not dt or dt.year < 2000:
+    by_dow_map = {d: _empty_bucket() for d in range(7)}
+    for r in rows:
+        if r.weekday < 0:
             continue
-        dow = dt.weekday()  # 0=Monday, 6=Sunday
-        by_dow_map[dow]["count"] += 1
-        if t.status in SETTLED_STATUSES:
-            by_dow_map[dow]["stake"] += Decimal(str(t.stake or 0))
-            by_dow_map[dow]["profit"] += Decimal(str(t.profit or 0))
-            if t.status == TicketStatus.won or t.status == TicketStatus.half_win:
-                by_dow_map[dow]["won"] += 1
-            elif t.status == TicketStatus.lost or t.status == TicketStatus.half_loss:
-                by_dow_map[dow]["lost"] += 1
-            else:
-                by_dow_map[dow]["void"] += 1
+        _add_to_bucket(by_dow_map[r.weekday], r)
     by_day_of_week = []
     for dow in range(7):
         d = by_dow_map[dow]
@@ -231,14 +276,14 @@ def get_analytics_summary(
 
     # profit_trend (denní agregace, pouze vyhodnocené)
     daily = {}
-    for t in settled:
-        day = (t.created_at or t.event_date or datetime.min).strftime("%Y-%m-%d")
-        if day == "1900-01-01":
+    for r in settled:
+        if r.day is None or r.day.year <= 1900:
             continue
+        day = r.day.strftime("%Y-%m-%d")
         if day not in daily:
             daily[day] = {"profit": Decimal("0"), "count": 0}
-        daily[day]["profit"] += t.profit or 0
-        daily[day]["count"] += 1
+        daily[day]["profit"] += r.profit or 0
+        daily[day]["count"] += r.count
 
     profit_trend = []
     cum = Decimal("0")
@@ -255,21 +300,20 @@ def get_analytics_summary(
 
     # weekly_trend – agregace po týdnech (ISO týden), aby bylo vidět zlepšení/zhoršení
     weekly = {}
-    for t in settled:
-        dt = t.created_at or t.event_date
-        if not dt or dt.year < 2000:
+    for r in settled:
+        if r.day is None or r.day.year < 2000:
             continue
-        y, w, _ = dt.isocalendar()
+        y, w, _ = r.day.isocalendar()
         key = (y, w)
         if key not in weekly:
             weekly[key] = {"won": 0, "lost": 0, "stake": Decimal("0"), "profit": Decimal("0"), "count": 0}
-        weekly[key]["count"] += 1
-        weekly[key]["stake"] += Decimal(str(t.stake or 0))
-        weekly[key]["profit"] += Decimal(str(t.profit or 0))
-        if t.status == TicketStatus.won or t.status == TicketStatus.half_win:
-            weekly[key]["won"] += 1
-        elif t.status == TicketStatus.lost or t.status == TicketStatus.half_loss:
-            weekly[key]["lost"] += 1
+        weekly[key]["count"] += r.count
+        weekly[key]["stake"] += Decimal(str(r.stake or 0))
+        weekly[key]["profit"] += Decimal(str(r.profit or 0))
+        if r.status == TicketStatus.won or r.status == TicketStatus.half_win:
+            weekly[key]["won"] += r.count
+        elif r.status == TicketStatus.lost or r.status == TicketStatus.half_loss:
+            weekly[key]["lost"] += r.count
 
     weekly_trend = []
     for (y, w) in sorted(weekly.keys()):
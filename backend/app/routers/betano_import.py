@@ -1,79 +1,26 @@
-from datetime import timedelta, datetime
 from decimal import Decimal
-from typing import List
 
-from fastapi import APIRouter, Depends
-from sqlalchemy.exc import SQLAlchemyError
+from fastapi import APIRouter, BackgroundTasks, Depends
 from sqlalchemy.orm import Session
 
 from app.database import get_db
-from app.models import Bookmaker, Sport, Ticket, TicketStatus
+from app.models import TicketStatus
 from app.schemas import (
-    TicketCreate,
-    TicketUpdate,
     BetanoScrapeRequest,
     BetanoScrapeResponse,
     BetanoScrapeResultItem,
     BetanoScrapeTicketIn,
     BetanoScrapePreviewResponse,
-    ScrapePreviewTicket,
+    ImportJobOut,
 )
-from app.routers.tickets import create_ticket as _create_ticket
-from app.routers.tickets import update_ticket as _update_ticket
-from app.preview_store import create_preview_id, set_preview
-from app.utils.sport_mapping import betano_icon_to_label, normalize_sport_label_for_db
+from app.services import import_jobs, import_pipeline
+from app.services.import_pipeline import BookmakerPlugin, ParsedTicket
+from app.utils.sport_mapping import betano_icon_to_label
+from app.utils.status_mapping import betano_raw_status
 
 
 router = APIRouter(prefix="/api/import/betano", tags=["Import – Betano"])
 
-_BETANO_KEY_PREFIX = "betano:"
-
-
-def _get_betano_bookmaker_id(db: Session) -> int:
-    """Najde ID sázkovky Betano (využívá seed; pokud chybí, vytvoří)."""
-    betano = db.query(Bookmaker).filter(Bookmaker.name == "Betano").first()
-    if not betano:
-        betano = Bookmaker(name="Betano", currency="CZK")
-        db.add(betano)
-        db.commit()
-        db.refresh(betano)
-    return betano.id
-
-
-def _map_sport_label_to_id(db: Session, label: str | None) -> int:
-    """Převede textový název sportu z Betano na sport_id v DB (včetně aliasů z Ticket_Mapping)."""
-    if not label:
-        label = "Ostatní"
-    name = normalize_sport_label_for_db(label.strip()) or label.strip()
-    normalized = name.lower()
-
-    sport = (
-        db.query(Sport)
-        .filter(Sport.name.ilike(normalized))
-        .first()
-    )
-    if not sport:
-        mapping = {
-            "fotbal": "Fotbal",
-            "hokej": "Hokej",
-            "basketbal": "Basketbal",
-            "tenis": "Tenis",
-            "házená": "Handball",
-            "hazena": "Handball",
-            "esport": "Esport",
-        }
-        target = mapping.get(normalized)
-        if target:
-            sport = db.query(Sport).filter(Sport.name == target).first()
-    if not sport:
-        sport = db.query(Sport).filter(Sport.name == "Ostatní").first()
-        if not sport:
-            sport = Sport(name="Ostatní", icon="🏆")
-            db.add(sport)
-            db.commit()
-            db.refresh(sport)
-    return sport.id
-
 
 def _map_sport_icon_to_label(icon_id: str | None) -> str | None:
     """Mapování ikony Betano (BASK, ICEH, FOOT, HAND, TENN, ESPS – viz Ticket_Mapping) na název sportu v DB."""
@@ -82,11 +29,9 @@ def _map_sport_icon_to_label(icon_id: str | None) -> str | None:
 
 def _map_status(raw: str | None, payout: Decimal | None) -> TicketStatus:
     """Převede surový status z Betano na TicketStatus. U nevyhodnocených tiketů vždy open."""
-    val = (raw or "").strip().lower()
+    category = betano_raw_status(raw or "")
     # Otevřené / čekající – nikdy neukládat jako won/lost (i když payout je 0)
-    if val in ("open", "čeká", "ceka", "nevyhodnoceno", "pending", "waiting", "otevřená", "otevrena", ""):
-        return TicketStatus.open
-    if "čeká" in val or "nevyhodnoceno" in val or "pending" in val or "waiting" in val:
+    if category == "open":
         return TicketStatus.open
 
     # Vyhodnocené podle textu nebo payout
@@ -96,13 +41,12 @@ def _map_status(raw: str | None, payout: Decimal | None) -> TicketStatus:
     except Exception:
         pass
 
-    if val:
-        if "výhry" in val or "vyhry" in val or "win" in val:
-            return TicketStatus.won
-        if "prohry" in val or "prohra" in val or "lost" in val:
-            return TicketStatus.lost
-        if "cash out" in val:
-            return TicketStatus.won if payout and payout > 0 else TicketStatus.void
+    if category == "won":
+        return TicketStatus.won
+    if category == "lost":
+        return TicketStatus.lost
+    if category == "cash_out":
+        return TicketStatus.won if payout and payout > 0 else TicketStatus.void
 
     return TicketStatus.open
 
@@ -130,129 +74,37 @@ def _normalize_market_and_selection(
     return market, selection
 
 
-def _build_ticket_create(
-    db: Session,
-    betano_bookmaker_id: int,
-    item: BetanoScrapeTicketIn,
-) -> TicketCreate:
-    """Namapuje jeden Betano tiket na TicketCreate."""
-    sport_label = item.sport_label or _map_sport_icon_to_label(item.sport_icon_id)
-    sport_id = _map_sport_label_to_id(db, sport_label)
-    market_label, selection = _normalize_market_and_selection(
-        item.market_label_raw, item.selection_raw
-    )
-    ticket_type = _map_ticket_type(item.ticket_type_raw)
-    status = _map_status(item.status_raw, item.payout)
-
-    odds = item.odds if item.odds is not None else Decimal("1.0")
-    payout = item.payout
-    betano_ref = None
-    if item.betano_key:
-        betano_ref = f"{_BETANO_KEY_PREFIX}{item.betano_key.strip()}"
-
-    is_live = getattr(item, "is_live", None)
-    if is_live is None:
-        is_live = False
-
-    event_date = getattr(item, "event_start_at", None) or item.placed_at
-    return TicketCreate(
-        bookmaker_id=betano_bookmaker_id,
-        sport_id=sport_id,
-        league_id=None,
-        market_type_id=None,
-        parent_id=None,
-        home_team=item.home_team.strip(),
-        away_team=item.away_team.strip(),
-        event_date=event_date,
-        market_label=market_label,
-        selection=selection,
-        odds=odds,
-        stake=item.stake,
-        payout=payout,
-        profit=None,
-        status=status.value,
-        ticket_type=ticket_type,
-        is_live=is_live,
-        source="manual",
-        ocr_image_path=betano_ref,
-    )
+class _BetanoPlugin(BookmakerPlugin):
+    """Mapování scrapených tiketů z Betano pro import_pipeline."""
 
+    bookmaker_name = "Betano"
+    key_prefix = "betano:"
+    result_model = BetanoScrapeResultItem
+    sync_fields = frozenset({"sport_id", "status", "is_live", "payout", "odds", "event_date"})
 
-def _find_duplicate(
-    db: Session,
-    bookmaker_id: int,
-    data: TicketCreate,
-    betano_key: str | None,
-) -> Ticket | None:
-    """
-    Najde existující tiket – primárně podle betano_key, sekundárně podle kombinace
-    bookmaker + týmy + stake + odds (+časové okno).
-    """
-    if betano_key:
-        ref = f"{_BETANO_KEY_PREFIX}{betano_key.strip()}"
-        hit = (
-            db.query(Ticket)
-            .filter(
-                Ticket.bookmaker_id == bookmaker_id,
-                Ticket.ocr_image_path == ref,
-            )
-            .first()
+    def parse(self, item: BetanoScrapeTicketIn) -> ParsedTicket:
+        """Namapuje jeden Betano tiket."""
+        market_label, selection = _normalize_market_and_selection(
+            item.market_label_raw, item.selection_raw
         )
-        if hit:
-            return hit
-
-    query = db.query(Ticket).filter(
-        Ticket.bookmaker_id == bookmaker_id,
-        Ticket.home_team == data.home_team,
-        Ticket.away_team == data.away_team,
-        Ticket.stake == data.stake,
-        Ticket.odds == data.odds,
-    )
-
-    if data.event_date:
-        window_start = data.event_date - timedelta(minutes=10)
-        window_end = data.event_date + timedelta(minutes=10)
-        query = query.filter(
-            Ticket.event_date >= window_start,
-            Ticket.event_date <= window_end,
+        return ParsedTicket(
+            home_team=item.home_team.strip(),
+            away_team=item.away_team.strip(),
+            sport_label=item.sport_label or _map_sport_icon_to_label(item.sport_icon_id),
+            market_label=market_label,
+            selection=selection,
+            ticket_type=_map_ticket_type(item.ticket_type_raw),
+            status=_map_status(item.status_raw, item.payout),
+            stake=item.stake,
+            odds=item.odds,
+            payout=item.payout,
+            event_date=getattr(item, "event_start_at", None) or item.placed_at,
+            is_live=bool(getattr(item, "is_live", None)),
+            key=item.betano_key,
         )
 
-    hit = query.first()
-    if hit:
-        return hit
-
-    # Fallback: zkúsit najít tiket bez filtru na event_date (pro staré tikety z OCR,
-    # kde čas nemusí přesně odpovídat, ale kombinace týmů/stake/kurz sedí).
-    fallback_query = db.query(Ticket).filter(
-        Ticket.bookmaker_id == bookmaker_id,
-        Ticket.home_team == data.home_team,
-        Ticket.away_team == data.away_team,
-        Ticket.stake == data.stake,
-        Ticket.odds == data.odds,
-    )
-
-    return fallback_query.first()
-
 
-def _ticket_create_to_preview_betano(db: Session, data: TicketCreate) -> ScrapePreviewTicket:
-    sport = db.query(Sport).filter(Sport.id == data.sport_id).first()
-    sport_name = sport.name if sport else "Neznámý"
-    event_date_str = data.event_date.isoformat() if data.event_date else None
-    return ScrapePreviewTicket(
-        home_team=data.home_team,
-        away_team=data.away_team,
-        sport_id=data.sport_id,
-        sport_name=sport_name,
-        market_label=data.market_label,
-        selection=data.selection,
-        odds=data.odds,
-        stake=data.stake,
-        payout=data.payout,
-        status=data.status,
-        bookmaker_id=data.bookmaker_id,
-        ticket_type=data.ticket_type,
-        event_date=event_date_str,
-    )
+_PLUGIN = _BetanoPlugin()
 
 
 @router.post("/scrape/preview", response_model=BetanoScrapePreviewResponse)
@@ -264,28 +116,7 @@ def scrape_preview(
     Náhled importu: namapuje a vyfiltruje duplicity, nic neukládá.
     Vrací preview_id a new_tickets; frontend načte GET /api/import/preview/{preview_id} a uloží.
     """
-    betano_bookmaker_id = _get_betano_bookmaker_id(db)
-    new_tickets: List[ScrapePreviewTicket] = []
-    skipped_count = 0
-
-    for item in payload.tickets:
-        try:
-            data = _build_ticket_create(db, betano_bookmaker_id, item)
-            duplicate = _find_duplicate(db, betano_bookmaker_id, data, item.betano_key)
-            if duplicate:
-                skipped_count += 1
-                continue
-            new_tickets.append(_ticket_create_to_preview_betano(db, data))
-        except (SQLAlchemyError, ValueError):
-            continue
-
-    preview_id = create_preview_id()
-    set_preview(preview_id, [t.model_dump(mode="json") for t in new_tickets])
-    return BetanoScrapePreviewResponse(
-        preview_id=preview_id,
-        new_tickets=new_tickets,
-        skipped_count=skipped_count,
-    )
+    return BetanoScrapePreviewResponse(**import_pipeline.run_preview(db, _PLUGIN, payload.tickets))
 
 
 @router.post("/scrape", response_model=BetanoScrapeResponse)
@@ -297,121 +128,21 @@ def import_from_scraper(
     Import tiketů z Betano přes browser scraper.
     overlay_sync=True: sync pro overlay – při update neměnit status na won/lost/void (zachovat open).
     """
-    betano_bookmaker_id = _get_betano_bookmaker_id(db)
     overlay_sync = getattr(payload, "overlay_sync", False) or False
-    import_batch_id = datetime.utcnow().strftime("%Y%m%d%H%M%S")
-
-    results: List[BetanoScrapeResultItem] = []
-    created_count = 0
-    updated_count = 0
-    skipped_count = 0
-    error_count = 0
-
-    for idx, item in enumerate(payload.tickets):
-        try:
-            data = _build_ticket_create(db, betano_bookmaker_id, item)
-            data = data.model_copy(update={
-                "import_batch_id": import_batch_id,
-                "import_batch_index": idx,
-                "is_newly_imported": True,
-            })
-
-            duplicate = _find_duplicate(db, betano_bookmaker_id, data, item.betano_key)
-            if duplicate:
-                update_payload = {
-                    "import_batch_id": import_batch_id,
-                    "import_batch_index": idx,
-                    "is_newly_imported": True,
-                }
-
-                if duplicate.sport_id != data.sport_id:
-                    update_payload["sport_id"] = data.sport_id
-
-                if data.payout is not None and (
-                    duplicate.payout is None
-                    or Decimal(duplicate.payout) != Decimal(data.payout)
-                ):
-                    update_payload["payout"] = data.payout
-
-                # Při overlay_sync neměnit status na vyhráno/prohráno – jen přidat/aktualizovat pro zobrazení
-                if not overlay_sync and (
-                    duplicate.status is None
-                    or str(getattr(duplicate.status, "value", duplicate.status))
-                    != data.status
-                ):
-                    update_payload["status"] = data.status
-
-                if duplicate.is_live != data.is_live:
-                    update_payload["is_live"] = data.is_live
-
-                if data.odds is not None and (
-                    duplicate.odds is None
-                    or Decimal(duplicate.odds) != Decimal(data.odds)
-                ):
-                    update_payload["odds"] = data.odds
-
-                if (
-                    data.event_date is not None
-                    and (duplicate.event_date is None or duplicate.event_date != data.event_date)
-                ):
-                    update_payload["event_date"] = data.event_date
-
-                if item.betano_key:
-                    ref = f"{_BETANO_KEY_PREFIX}{item.betano_key.strip()}"
-                    if duplicate.ocr_image_path != ref:
-                        update_payload["ocr_image_path"] = ref
-
-                updated = _update_ticket(
-                    ticket_id=duplicate.id,
-                    data=TicketUpdate(**update_payload),
-                    db=db,
-                )
-                updated_count += 1
-                results.append(BetanoScrapeResultItem(
-                    index=idx,
-                    status="updated",
-                    ticket_id=updated.id,
-                    message=None,
-                ))
-                continue
-
-            created = _create_ticket(data=data, db=db)
-            if item.betano_key:
-                try:
-                    ref = f"{_BETANO_KEY_PREFIX}{item.betano_key.strip()}"
-                    _update_ticket(
-                        ticket_id=created.id,
-                        data=TicketUpdate(ocr_image_path=ref),
-                        db=db,
-                    )
-                except Exception:
-                    pass
-            created_count += 1
-            results.append(
-                BetanoScrapeResultItem(
-                    index=idx,
-                    status="created",
-                    ticket_id=created.id,
-                    message=None,
-                )
-            )
-        except (SQLAlchemyError, ValueError) as exc:
-            db.rollback()
-            error_count += 1
-            results.append(
-                BetanoScrapeResultItem(
-                    index=idx,
-                    status="error",
-                    ticket_id=None,
-                    message=str(exc),
-                )
-            )
-
     return BetanoScrapeResponse(
-        created=created_count,
-        updated=updated_count,
-        skipped=skipped_count,
-        errors=error_count,
-        results=results,
+        **import_jobs.run_import(db, _PLUGIN, payload.tickets, overlay_sync=overlay_sync)
     )
 
+
+@router.post("/scrape/jobs", response_model=ImportJobOut)
+def import_from_scraper_in_background(
+    payload: BetanoScrapeRequest,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+):
+    """
+    Import tiketů z Betano na pozadí (velké importy historie).
+    Hned vrátí job se stavem "pending"; průběh a výsledek přes GET /api/import/jobs/{job_id}.
+    """
+    overlay_sync = getattr(payload, "overlay_sync", False) or False
+    return import_jobs.start_import_job(db, background_tasks, _PLUGIN, payload.tickets, overlay_sync=overlay_sync)
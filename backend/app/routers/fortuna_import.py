@@ -1,89 +1,37 @@
-from datetime import timedelta, datetime
 from decimal import Decimal
-from typing import List
 
-from fastapi import APIRouter, Depends
-from sqlalchemy.exc import SQLAlchemyError
+from fastapi import APIRouter, BackgroundTasks, Depends
 from sqlalchemy.orm import Session
 
 from app.database import get_db
-from app.models import Bookmaker, Sport, Ticket, TicketStatus
+from app.models import TicketStatus
 from app.schemas import (
-    TicketCreate,
-    TicketUpdate,
     FortunaScrapeRequest,
     FortunaScrapeResponse,
     FortunaScrapeResultItem,
     FortunaScrapeTicketIn,
     FortunaScrapePreviewResponse,
-    ScrapePreviewTicket,
+    ImportJobOut,
 )
-from app.routers.tickets import create_ticket as _create_ticket
-from app.routers.tickets import update_ticket as _update_ticket
-from app.preview_store import create_preview_id, set_preview
+from app.services import import_jobs, import_pipeline
+from app.services.import_pipeline import BookmakerPlugin, ParsedTicket
+from app.utils.sport_mapping import fortuna_icon_to_label
+from app.utils.status_mapping import fortuna_raw_status
 
 
 router = APIRouter(prefix="/api/import/fortuna", tags=["Import – Fortuna"])
 
-_FORTUNA_KEY_PREFIX = "fortuna:"
-
-from app.utils.sport_mapping import fortuna_icon_to_label, normalize_sport_label_for_db
-
-
-def _get_fortuna_bookmaker_id(db: Session) -> int:
-    """Najde ID sázkovky Fortuna (využívá seed; pokud chybí, vytvoří)."""
-    fortuna = db.query(Bookmaker).filter(Bookmaker.name == "Fortuna").first()
-    if not fortuna:
-        fortuna = Bookmaker(name="Fortuna", currency="CZK")
-        db.add(fortuna)
-        db.commit()
-        db.refresh(fortuna)
-    return fortuna.id
-
 
 def _map_fortuna_sport_icon_to_label(icon_id: str | None) -> str | None:
     """Převede kód ikony Fortuny (0i, 00, 0w, 07, 0y, 0x, 0m z Ticket_Mapping) na název sportu v DB."""
     return fortuna_icon_to_label(icon_id)
 
 
-def _map_sport_label_to_id(db: Session, label: str | None) -> int:
-    """Převede název sportu (z mapování ikony nebo přímo) na sport_id. Neznámý → Ostatní."""
-    raw = (label or "").strip()
-    name = normalize_sport_label_for_db(raw) or raw
-    if name:
-        sport = db.query(Sport).filter(Sport.name.ilike(name)).first()
-        if sport:
-            return sport.id
-        normal = name.lower()
-        if normal in ("fotbal", "football", "soccer"):
-            sport = db.query(Sport).filter(Sport.name.ilike("%otbal%")).first()
-            if sport:
-                return sport.id
-        if normal in ("ragby", "rugby"):
-            sport = db.query(Sport).filter(Sport.name.ilike("%agby%")).first()
-            if sport:
-                return sport.id
-    sport = db.query(Sport).filter(Sport.name == "Ostatní").first()
-    if not sport:
-        sport = Sport(name="Ostatní", icon="🏆")
-        db.add(sport)
-        db.commit()
-        db.refresh(sport)
-    return sport.id
-
-
 def _map_status(raw: str | None, payout: Decimal | None) -> TicketStatus:
     """Převede surový status z Fortuny (cic_ticket-win, cic_ticket-waiting, …) na TicketStatus. Otevřené nikdy neukládat jako lost kvůli payout=0."""
-    val = (raw or "").strip().lower()
-    if val in ("waiting", "open", "čeká", "nevyhodnoceno", "pending", ""):
-        return TicketStatus.open
-    if val:
-        if val in ("won", "win", "výhra"):
-            return TicketStatus.won
-        if val in ("lost", "prohra"):
-            return TicketStatus.lost
-        if val in ("void", "vráceno"):
-            return TicketStatus.void
+    status = fortuna_raw_status(raw)
+    if status is not None:
+        return status
     if payout is not None and Decimal(payout) > 0:
         return TicketStatus.won
     return TicketStatus.open
@@ -108,123 +56,37 @@ def _normalize_market_and_selection(
     return market, selection
 
 
-def _build_ticket_create(
-    db: Session,
-    fortuna_bookmaker_id: int,
-    item: FortunaScrapeTicketIn,
-) -> TicketCreate:
-    """Namapuje jeden Fortuna tiket na TicketCreate."""
-    sport_label = _map_fortuna_sport_icon_to_label(getattr(item, "sport_icon_id", None))
-    sport_id = _map_sport_label_to_id(db, sport_label)
-    market_label, selection = _normalize_market_and_selection(
-        item.market_label_raw, item.selection_raw
-    )
-    ticket_type = _map_ticket_type(item.ticket_type_raw)
-    status = _map_status(item.status_raw, item.payout)
-
-    odds = item.odds if item.odds is not None else Decimal("1.0")
-    payout = item.payout
-    fortuna_ref = None
-    if item.fortuna_key:
-        fortuna_ref = f"{_FORTUNA_KEY_PREFIX}{item.fortuna_key.strip()}"
-
-    is_live = getattr(item, "is_live", None)
-    if is_live is None:
-        is_live = False
-
-    event_date = getattr(item, "event_start_at", None) or item.placed_at
-    return TicketCreate(
-        bookmaker_id=fortuna_bookmaker_id,
-        sport_id=sport_id,
-        league_id=None,
-        market_type_id=None,
-        parent_id=None,
-        home_team=item.home_team.strip(),
-        away_team=item.away_team.strip(),
-        event_date=event_date,
-        market_label=market_label,
-        selection=selection,
-        odds=odds,
-        stake=item.stake,
-        payout=payout,
-        profit=None,
-        status=status.value,
-        ticket_type=ticket_type,
-        is_live=is_live,
-        source="manual",
-        ocr_image_path=fortuna_ref,
-    )
-
+class _FortunaPlugin(BookmakerPlugin):
+    """Mapování scrapených tiketů z Fortuny (ifortuna.cz) pro import_pipeline."""
 
-def _find_duplicate(
-    db: Session,
-    bookmaker_id: int,
-    data: TicketCreate,
-    fortuna_key: str | None,
-) -> Ticket | None:
-    """Najde existující tiket – primárně podle fortuna_key, sekundárně podle týmy + stake + odds."""
-    if fortuna_key:
-        ref = f"{_FORTUNA_KEY_PREFIX}{fortuna_key.strip()}"
-        hit = (
-            db.query(Ticket)
-            .filter(
-                Ticket.bookmaker_id == bookmaker_id,
-                Ticket.ocr_image_path == ref,
-            )
-            .first()
-        )
-        if hit:
-            return hit
+    bookmaker_name = "Fortuna"
+    key_prefix = "fortuna:"
+    result_model = FortunaScrapeResultItem
+    sync_fields = frozenset({"status", "is_live", "payout", "odds", "event_date"})
 
-    query = db.query(Ticket).filter(
-        Ticket.bookmaker_id == bookmaker_id,
-        Ticket.home_team == data.home_team,
-        Ticket.away_team == data.away_team,
-        Ticket.stake == data.stake,
-        Ticket.odds == data.odds,
-    )
-    if data.event_date:
-        window_start = data.event_date - timedelta(minutes=15)
-        window_end = data.event_date + timedelta(minutes=15)
-        query = query.filter(
-            Ticket.event_date >= window_start,
-            Ticket.event_date <= window_end,
+    def parse(self, item: FortunaScrapeTicketIn) -> ParsedTicket:
+        """Namapuje jeden Fortuna tiket."""
+        market_label, selection = _normalize_market_and_selection(
+            item.market_label_raw, item.selection_raw
         )
-    hit = query.first()
-    if hit:
-        return hit
-    return (
-        db.query(Ticket)
-        .filter(
-            Ticket.bookmaker_id == bookmaker_id,
-            Ticket.home_team == data.home_team,
-            Ticket.away_team == data.away_team,
-            Ticket.stake == data.stake,
-            Ticket.odds == data.odds,
+        return ParsedTicket(
+            home_team=item.home_team.strip(),
+            away_team=item.away_team.strip(),
+            sport_label=_map_fortuna_sport_icon_to_label(getattr(item, "sport_icon_id", None)),
+            market_label=market_label,
+            selection=selection,
+            ticket_type=_map_ticket_type(item.ticket_type_raw),
+            status=_map_status(item.status_raw, item.payout),
+            stake=item.stake,
+            odds=item.odds,
+            payout=item.payout,
+            event_date=getattr(item, "event_start_at", None) or item.placed_at,
+            is_live=bool(getattr(item, "is_live", None)),
+            key=item.fortuna_key,
         )
-        .first()
-    )
 
 
-def _ticket_create_to_preview_fortuna(db: Session, data: TicketCreate) -> ScrapePreviewTicket:
-    sport = db.query(Sport).filter(Sport.id == data.sport_id).first()
-    sport_name = sport.name if sport else "Neznámý"
-    event_date_str = data.event_date.isoformat() if data.event_date else None
-    return ScrapePreviewTicket(
-        home_team=data.home_team,
-        away_team=data.away_team,
-        sport_id=data.sport_id,
-        sport_name=sport_name,
-        market_label=data.market_label,
-        selection=data.selection,
-        odds=data.odds,
-        stake=data.stake,
-        payout=data.payout,
-        status=data.status,
-        bookmaker_id=data.bookmaker_id,
-        ticket_type=data.ticket_type,
-        event_date=event_date_str,
-    )
+_PLUGIN = _FortunaPlugin()
 
 
 @router.post("/scrape/preview", response_model=FortunaScrapePreviewResponse)
@@ -233,28 +95,7 @@ def scrape_preview(
     db: Session = Depends(get_db),
 ):
     """Náhled importu: namapuje a vyfiltruje duplicity, nic neukládá."""
-    fortuna_bookmaker_id = _get_fortuna_bookmaker_id(db)
-    new_tickets: List[ScrapePreviewTicket] = []
-    skipped_count = 0
-
-    for item in payload.tickets:
-        try:
-            data = _build_ticket_create(db, fortuna_bookmaker_id, item)
-            duplicate = _find_duplicate(db, fortuna_bookmaker_id, data, item.fortuna_key)
-            if duplicate:
-                skipped_count += 1
-                continue
-            new_tickets.append(_ticket_create_to_preview_fortuna(db, data))
-        except (SQLAlchemyError, ValueError):
-            continue
-
-    preview_id = create_preview_id()
-    set_preview(preview_id, [t.model_dump(mode="json") for t in new_tickets])
-    return FortunaScrapePreviewResponse(
-        preview_id=preview_id,
-        new_tickets=new_tickets,
-        skipped_count=skipped_count,
-    )
+    return FortunaScrapePreviewResponse(**import_pipeline.run_preview(db, _PLUGIN, payload.tickets))
 
 
 @router.post("/scrape", response_model=FortunaScrapeResponse)
@@ -263,107 +104,21 @@ def import_from_scraper(
     db: Session = Depends(get_db),
 ):
     """Import tiketů z Fortuny (ifortuna.cz) přes browser scraper. overlay_sync=True: při update neměnit status."""
-    fortuna_bookmaker_id = _get_fortuna_bookmaker_id(db)
     overlay_sync = getattr(payload, "overlay_sync", False) or False
-    import_batch_id = datetime.utcnow().strftime("%Y%m%d%H%M%S")
-
-    results: List[FortunaScrapeResultItem] = []
-    created_count = 0
-    updated_count = 0
-    skipped_count = 0
-    error_count = 0
-
-    for idx, item in enumerate(payload.tickets):
-        try:
-            data = _build_ticket_create(db, fortuna_bookmaker_id, item)
-            data = data.model_copy(update={
-                "import_batch_id": import_batch_id,
-                "import_batch_index": idx,
-                "is_newly_imported": True,
-            })
-
-            duplicate = _find_duplicate(db, fortuna_bookmaker_id, data, item.fortuna_key)
-            if duplicate:
-                update_payload = {
-                    "import_batch_id": import_batch_id,
-                    "import_batch_index": idx,
-                    "is_newly_imported": True,
-                }
-                if data.payout is not None and (
-                    duplicate.payout is None or Decimal(duplicate.payout) != Decimal(data.payout)
-                ):
-                    update_payload["payout"] = data.payout
-                if not overlay_sync and (
-                    duplicate.status is None
-                    or str(getattr(duplicate.status, "value", duplicate.status)) != data.status
-                ):
-                    update_payload["status"] = data.status
-                if duplicate.is_live != data.is_live:
-                    update_payload["is_live"] = data.is_live
-                if data.odds is not None and (
-                    duplicate.odds is None or Decimal(duplicate.odds) != Decimal(data.odds)
-                ):
-                    update_payload["odds"] = data.odds
-                if (
-                    data.event_date is not None
-                    and (duplicate.event_date is None or duplicate.event_date != data.event_date)
-                ):
-                    update_payload["event_date"] = data.event_date
-                if item.fortuna_key:
-                    ref = f"{_FORTUNA_KEY_PREFIX}{item.fortuna_key.strip()}"
-                    if duplicate.ocr_image_path != ref:
-                        update_payload["ocr_image_path"] = ref
-
-                updated = _update_ticket(
-                    ticket_id=duplicate.id,
-                    data=TicketUpdate(**update_payload),
-                    db=db,
-                )
-                updated_count += 1
-                results.append(FortunaScrapeResultItem(
-                    index=idx,
-                    status="updated",
-                    ticket_id=updated.id,
-                    message=None,
-                ))
-                continue
-
-            created = _create_ticket(data=data, db=db)
-            if item.fortuna_key:
-                try:
-                    ref = f"{_FORTUNA_KEY_PREFIX}{item.fortuna_key.strip()}"
-                    _update_ticket(
-                        ticket_id=created.id,
-                        data=TicketUpdate(ocr_image_path=ref),
-                        db=db,
-                    )
-                except (SQLAlchemyError, ValueError):
-                    pass
-            created_count += 1
-            results.append(
-                FortunaScrapeResultItem(
-                    index=idx,
-                    status="created",
-                    ticket_id=created.id,
-                    message=None,
-                )
-            )
-        except (SQLAlchemyError, ValueError) as exc:
-            db.rollback()
-            error_count += 1
-            results.append(
-                FortunaScrapeResultItem(
-                    index=idx,
-                    status="error",
-                    ticket_id=None,
-                    message=str(exc),
-                )
-            )
-
     return FortunaScrapeResponse(
-        created=created_count,
-        updated=updated_count,
-        skipped=skipped_count,
-        errors=error_count,
-        results=results,
+        **import_jobs.run_import(db, _PLUGIN, payload.tickets, overlay_sync=overlay_sync)
     )
+
+
+@router.post("/scrape/jobs", response_model=ImportJobOut)
+def import_from_scraper_in_background(
+    payload: FortunaScrapeRequest,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+):
+    """
+    Import tiketů z Fortuny na pozadí (velké importy historie).
+    Hned vrátí job se stavem "pending"; průběh a výsledek přes GET /api/import/jobs/{job_id}.
+    """
+    overlay_sync = getattr(payload, "overlay_sync", False) or False
+    return import_jobs.start_import_job(db, background_tasks, _PLUGIN, payload.tickets, overlay_sync=overlay_sync)
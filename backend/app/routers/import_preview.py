@@ -1,9 +1,13 @@
 """
-Sdílený endpoint pro načtení náhledu importu (extension → frontend).
+Sdílené endpointy importu: náhled importu (extension → frontend) a stav importů na pozadí.
 """
-from fastapi import APIRouter, Body, HTTPException
+from fastapi import APIRouter, Body, Depends, HTTPException
+from sqlalchemy.orm import Session
 
+from app.database import get_db
+from app.models import ImportJob
 from app.preview_store import create_preview_id, get_preview, set_preview
+from app.schemas import ImportJobOut
 
 router = APIRouter(prefix="/api/import", tags=["Import"])
 
@@ -35,3 +39,15 @@ def create_preview_from_tickets(body: dict = Body(...)):
     preview_id = create_preview_id()
     set_preview(preview_id, list(tickets))
     return {"preview_id": preview_id}
+
+
+@router.get("/jobs/{job_id}", response_model=ImportJobOut)
+def get_import_job(job_id: int, db: Session = Depends(get_db)):
+    """
+    Stav importu na pozadí (POST /api/import/{sázkovka}/scrape/jobs) pro polling:
+    processed/total a průběžné counts, ve stavu "done" i výsledky po tiketech.
+    """
+    job = db.get(ImportJob, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Import job nenalezen.")
+    return job
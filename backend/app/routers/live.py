@@ -1,19 +1,21 @@
 """
-LIVE – příjem scraped stavu zápasu od extension, vyhodnocení přes AI, webhook notifikace.
+LIVE – příjem scraped stavu zápasu od extension, vyhodnocení (pravidla, jinak AI), notifikace (webhook, Telegram).
 """
 import logging
 import re
+import time
 from datetime import datetime
 from typing import Optional
 
-import httpx
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import func
 from sqlalchemy.orm import Session, joinedload
 
 from app.database import get_db
-from app.models import AppSettings, Ticket, TicketStatus
+from app.models import Sport, Ticket, TicketStatus
 from app.schemas import LiveTicketStateIn, LiveLinkIn
 from app.llm.client import evaluate_live_ticket_state
+from app.services import football_data_live, live_settlement, live_state_cache, notification_queue, rollup_service
 
 _TIPSPORT_REF_PREFIX = "tipsport:"
 
@@ -22,31 +24,6 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/live", tags=["LIVE"])
 
 
-def _get_settings(db: Session) -> AppSettings:
-    s = db.query(AppSettings).first()
-    if not s:
-        s = AppSettings()
-        db.add(s)
-        db.commit()
-        db.refresh(s)
-    return s
-
-
-def _send_webhook(db: Session, payload: dict) -> None:
-    """Odešle POST na webhook_url z AppSettings. Při chybě jen loguje."""
-    settings = _get_settings(db)
-    url = (settings.webhook_url or "").strip()
-    if not url:
-        return
-    try:
-        with httpx.Client(timeout=5.0) as client:
-            r = client.post(url, json=payload)
-            if r.status_code >= 400:
-                logger.warning("Webhook POST %s returned %s: %s", url, r.status_code, r.text[:200])
-    except Exception as e:
-        logger.warning("Webhook POST failed: %s", e)
-
-
 def _match_id_from_url(live_match_url: Optional[str]) -> Optional[str]:
     """Vytáhne tipsport_match_id z URL (poslední číselný segment)."""
     if not live_match_url:
@@ -74,12 +51,27 @@ def post_live_link(data: LiveLinkIn, db: Session = Depends(get_db)):
     return {"ok": True, "ticket_id": ticket.id}
 
 
-@router.post("/state")
-async def post_live_state(data: LiveTicketStateIn, db: Session = Depends(get_db)):
+@router.get("/football")
+def get_live_football_scores(db: Session = Depends(get_db)):
     """
-    Přijme scraped stav zápasu od extension. Najde tiket (ticket_id nebo tipsport_match_id),
-    uloží live_match_url/tipsport_match_id, vyhodnotí stav přes AI, při změně/konci pošle webhook.
+    Live skóre otevřených fotbalových tiketů z football-data.org – všechny tikety nad jedním
+    feedem (football_data_live.get_live_feed). Vrací jen tikety, jejichž zápas právě běží.
     """
+    tickets = (
+        db.query(Ticket.id, Ticket.home_team, Ticket.away_team)
+        .join(Sport, Ticket.sport_id == Sport.id)
+        .filter(
+            Ticket.status == TicketStatus.open,
+            func.lower(Sport.name).in_(football_data_live.FOOTBALL_SPORT_NAMES),
+        )
+        .all()
+    )
+    scores = football_data_live.live_scores_for_tickets(tickets)
+    return {"items": [{"ticket_id": ticket_id, **score} for ticket_id, score in scores.items()]}
+
+
+def _find_live_ticket(db: Session, data: LiveTicketStateIn) -> Optional[Ticket]:
+    """Tiket podle ticket_id, tipsport_match_id nebo live_match_url (v tomto pořadí)."""
     ticket = None
     q = db.query(Ticket).options(joinedload(Ticket.bookmaker))
     if data.ticket_id is not None:
@@ -92,56 +84,146 @@ async def post_live_state(data: LiveTicketStateIn, db: Session = Depends(get_db)
             ticket = q.filter(Ticket.tipsport_match_id == match_id).first()
         if not ticket:
             ticket = q.filter(Ticket.live_match_url == data.live_match_url).first()
-    if not ticket:
-        return {
-            "ok": False,
-            "ticket_id": None,
-            "detail": "Tiket nenalezen (ticket_id nebo tipsport_match_id). Propojte tiket přes detail tiketu na Tipsportu.",
-        }
+    return ticket
 
-    if data.live_match_url:
-        ticket.live_match_url = data.live_match_url
-        mid = _match_id_from_url(data.live_match_url)
-        if mid:
-            ticket.tipsport_match_id = mid
-    if data.tipsport_match_id and not ticket.tipsport_match_id:
-        ticket.tipsport_match_id = data.tipsport_match_id
 
+def _scraped_text(data: LiveTicketStateIn) -> str:
     scraped = data.scraped or {}
     scraped_text = scraped.get("fullText") or scraped.get("scoreText") or ""
     if isinstance(scraped_text, dict):
         scraped_text = str(scraped_text)
-    scraped_text = (scraped_text or "").strip()
-
-    eval_result = await evaluate_live_ticket_state(
-        market_label=ticket.market_label or "",
-        selection=ticket.selection or "",
-        home_team=ticket.home_team or "",
-        away_team=ticket.away_team or "",
-        scraped_text=scraped_text,
-    )
+    return (scraped_text or "").strip()
 
-    prev = (ticket.last_live_snapshot or {}) if isinstance(ticket.last_live_snapshot, dict) else {}
-    snapshot = {
+
+async def _evaluate(
+    market_label: str, selection: str, home_team: str, away_team: str, scraped_text: str, prev: dict,
+) -> dict:
+    """Vyhodnocení stavu: běžné trhy pravidly ze skóre, ostatní přes AI. Vrací rovnou snapshot."""
+    score = live_settlement.parse_live_score(scraped_text, home_team, away_team)
+    eval_result = None
+    if score is not None:
+        eval_result = live_settlement.evaluate(
+            score,
+            market_label=market_label,
+            selection=selection,
+            home_team=home_team,
+            away_team=away_team,
+            previous=prev,
+        )
+    if eval_result is None:
+        eval_result = await evaluate_live_ticket_state(
+            market_label=market_label,
+            selection=selection,
+            home_team=home_team,
+            away_team=away_team,
+            scraped_text=scraped_text,
+        )
+    return {
         "scraped_text": scraped_text[:2000],
         "match_ended": eval_result.get("match_ended"),
         "result": eval_result.get("result"),
         "message": eval_result.get("message"),
+        "score": score.text if score else None,
+        "score_ended": score.ended if score else None,
+        "source": eval_result.get("source", "llm"),
         "evaluated_at": datetime.utcnow().isoformat(),
     }
-    ticket.last_live_snapshot = snapshot
-    ticket.last_live_at = datetime.utcnow()
 
-    result = eval_result.get("result")
+
+def _settled_result(snapshot: dict, scraped_text: str) -> Optional[str]:
+    """won/lost, pokud se má tiket vypořádat (vyhodnocení, jinak text stránky), jinak None."""
+    result = snapshot.get("result")
     if not result and scraped_text:
         low = scraped_text.lower()
         if "výhra" in low or "vyhra" in low or "win" in low:
             result = "won"
         elif "prohra" in low or "loss" in low or "prohr" in low:
             result = "lost"
-    if (eval_result.get("match_ended") or result) and result in ("won", "lost"):
+    if (snapshot.get("match_ended") or result) and result in ("won", "lost"):
+        return result
+    return None
+
+
+def _same_evaluation(a: dict, b: dict) -> bool:
+    return all(a.get(k) == b.get(k) for k in ("match_ended", "result", "message"))
+
+
+def _ticket_context(ticket: Ticket) -> tuple:
+    """(trh, výběr, domácí, hosté) tiketu – vstup vyhodnocení (stejné pořadí jako LiveTicketEntry.context)."""
+    return (ticket.market_label or "", ticket.selection or "", ticket.home_team or "", ticket.away_team or "")
+
+
+def _state_response(ticket_id: int, snapshot: dict) -> dict:
+    return {
+        "ok": True,
+        "ticket_id": ticket_id,
+        "match_ended": snapshot.get("match_ended"),
+        "result": snapshot.get("result"),
+        "message": snapshot.get("message"),
+    }
+
+
+@router.post("/state")
+async def post_live_state(data: LiveTicketStateIn, db: Session = Depends(get_db)):
+    """
+    Přijme scraped stav zápasu od extension. Najde tiket (ticket_id nebo tipsport_match_id),
+    uloží live_match_url/tipsport_match_id, vyhodnotí stav (běžné trhy pravidly ze skóre,
+    ostatní přes AI – jen když se skóre změnilo), při změně/konci zařadí notifikaci
+    (notification_queue – na doručení se nečeká).
+    Opakovaný stejný text i změny bez vlivu na vyhodnocení řeší live_state_cache bez DB.
+    """
+    scraped_text = _scraped_text(data)
+    key = live_state_cache.request_key(data.ticket_id, data.tipsport_match_id, data.live_match_url)
+    text_hash = live_state_cache.text_hash(scraped_text)
+
+    cached = live_state_cache.get(key)
+    if cached is not None:
+        if cached.text_hash == text_hash:
+            return cached.response
+        snapshot = await _evaluate(
+            cached.market_label, cached.selection, cached.home_team, cached.away_team,
+            scraped_text, cached.snapshot,
+        )
+        if (
+            _same_evaluation(snapshot, cached.snapshot)
+            and not _settled_result(snapshot, scraped_text)
+            and not cached.write_due(time.monotonic())
+        ):
+            # Beze změny vyhodnocení: zápis počká (nejvýš live_state_write_interval_seconds)
+            cached.text_hash = text_hash
+            cached.snapshot = snapshot
+            return cached.response
+
+    ticket = _find_live_ticket(db, data)
+    if not ticket:
+        return {
+            "ok": False,
+            "ticket_id": None,
+            "detail": "Tiket nenalezen (ticket_id nebo tipsport_match_id). Propojte tiket přes detail tiketu na Tipsportu.",
+        }
+
+    if data.live_match_url:
+        ticket.live_match_url = data.live_match_url
+        mid = _match_id_from_url(data.live_match_url)
+        if mid:
+            ticket.tipsport_match_id = mid
+    if data.tipsport_match_id and not ticket.tipsport_match_id:
+        ticket.tipsport_match_id = data.tipsport_match_id
+
+    prev = (ticket.last_live_snapshot or {}) if isinstance(ticket.last_live_snapshot, dict) else {}
+    context = _ticket_context(ticket)
+    # Snapshot z cache platí jen pro stejný tiket se stejným trhem/výběrem/týmy jako v DB
+    if cached is None or cached.ticket_id != ticket.id or cached.context != context:
+        snapshot = await _evaluate(*context, scraped_text, prev)
+    ticket.last_live_snapshot = snapshot
+    ticket.last_live_at = datetime.utcnow()
+
+    result = _settled_result(snapshot, scraped_text)
+    if result:
+        before = rollup_service.snapshot(ticket)
         ticket.status = TicketStatus.won if result == "won" else TicketStatus.lost
         ticket.is_live = False
+        rollup_service.apply_ticket_change(db, before, rollup_service.snapshot(ticket))
         logger.info("LIVE: tiket %s vyhodnocen jako %s, odstraněn z overlay", ticket.id, result)
 
     db.add(ticket)
@@ -149,32 +231,36 @@ async def post_live_state(data: LiveTicketStateIn, db: Session = Depends(get_db)
 
     send_webhook = False
     event = "change"
-    if eval_result.get("match_ended") and eval_result.get("result"):
+    if snapshot.get("match_ended") and snapshot.get("result"):
         event = "match_end"
         send_webhook = True
-    elif eval_result.get("match_ended") and not prev.get("match_ended"):
+    elif snapshot.get("match_ended") and not prev.get("match_ended"):
         send_webhook = True
-    elif eval_result.get("message") and eval_result.get("message") != (prev.get("message") or ""):
+    elif snapshot.get("message") and snapshot.get("message") != (prev.get("message") or ""):
         send_webhook = True
 
     if send_webhook:
         bookmaker_name = ticket.bookmaker.name if ticket.bookmaker else "Tipsport"
-        _send_webhook(
-            db,
-            {
-                "event": event,
-                "ticket_id": ticket.id,
-                "message": eval_result.get("message") or "",
-                "bookmaker": bookmaker_name,
-                "score": scraped_text[:200] if scraped_text else "",
-                "result": eval_result.get("result"),
-            },
-        )
+        notification_queue.enqueue({
+            "event": event,
+            "ticket_id": ticket.id,
+            "message": snapshot.get("message") or "",
+            "bookmaker": bookmaker_name,
+            "score": scraped_text[:200] if scraped_text else "",
+            "result": snapshot.get("result"),
+        })
 
-    return {
-        "ok": True,
-        "ticket_id": ticket.id,
-        "match_ended": eval_result.get("match_ended"),
-        "result": eval_result.get("result"),
-        "message": eval_result.get("message"),
-    }
+    response = _state_response(ticket.id, snapshot)
+    market_label, selection, home_team, away_team = context
+    live_state_cache.put(key, live_state_cache.LiveTicketEntry(
+        ticket_id=ticket.id,
+        market_label=market_label,
+        selection=selection,
+        home_team=home_team,
+        away_team=away_team,
+        text_hash=text_hash,
+        snapshot=snapshot,
+        response=response,
+        written_at=time.monotonic(),
+    ))
+    return response
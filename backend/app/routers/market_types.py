@@ -4,6 +4,7 @@ from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import func, text
 
 from app.database import get_db
+from app.services import lookup_cache
 from app.models.models import MarketType, Ticket, TicketStatus, Sport
 from app.schemas.schemas import (
     MarketTypeCreate,
@@ -94,6 +95,23 @@ def _market_type_with_sports(db: Session, mt_id: int):
     return db.query(MarketType).options(joinedload(MarketType.sports)).filter(MarketType.id == mt_id).first()
 
 
+def _find_market_type(db: Session, normalized: str) -> Optional[MarketType]:
+    """
+    Aktivní typ sázky podle normalizovaného názvu: z lookup_cache (normalized_name i normalizovaný
+    name starších záznamů), jinak dotazem – typ vytvořený v této transakci ještě v cache není.
+    """
+    mt_id = lookup_cache.get(db).market_type_ids.get(normalized)
+    if mt_id is not None:
+        mt = db.get(MarketType, mt_id)
+        if mt is not None and mt.is_active:
+            return mt
+    return (
+        db.query(MarketType)
+        .filter(MarketType.is_active == True, MarketType.normalized_name == normalized)
+        .first()
+    )
+
+
 def get_or_create_canonical_market_type(db: Session, raw_name: str | None):
     """
     Pro skripty: podle surového názvu (od sázkovky) najde nebo vytvoří typ sázky
@@ -105,16 +123,9 @@ def get_or_create_canonical_market_type(db: Session, raw_name: str | None):
     canonical = market_label_to_canonical(name)
     name_to_use = canonical if canonical else name
     normalized = _normalize_market_type_name(name_to_use)
-    existing = (
-        db.query(MarketType)
-        .filter(MarketType.is_active == True, MarketType.normalized_name == normalized)
-        .first()
-    )
+    existing = _find_market_type(db, normalized)
     if existing:
         return existing, False
-    for mt in db.query(MarketType).filter(MarketType.is_active == True).all():
-        if _normalize_market_type_name(mt.name) == normalized:
-            return mt, False
     mt = MarketType(name=name_to_use, normalized_name=normalized, is_active=True)
     mt.sports = db.query(Sport).all()
     db.add(mt)
@@ -133,24 +144,12 @@ def find_or_create_market_type(data: MarketTypeCreate, db: Session = Depends(get
     name_to_use = canonical if canonical else name
     normalized = _normalize_market_type_name(name_to_use)
 
-    # 1) Primární lookup podle canonical hodnoty (normalized_name)
-    existing = (
-        db.query(MarketType)
-        .filter(
-            MarketType.is_active == True,
-            MarketType.normalized_name == normalized,
-        )
-        .first()
-    )
+    # 1) Lookup podle canonical hodnoty (normalized_name, u starších záznamů normalizovaný název)
+    existing = _find_market_type(db, normalized)
     if existing:
         return _market_type_with_sports(db, existing.id)
 
-    # 2) Fallback pro starší záznamy bez normalized_name
-    for mt in db.query(MarketType).filter(MarketType.is_active == True).all():
-        if _normalize_market_type_name(mt.name) == normalized:
-            return _market_type_with_sports(db, mt.id)
-
-    # 3) Vytvořit nový typ (ukládáme kanonický / jednotný název)
+    # 2) Vytvořit nový typ (ukládáme kanonický / jednotný název)
     mt = MarketType(
         name=name_to_use,
         normalized_name=normalized,
@@ -4,6 +4,7 @@ from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models import AppSettings
 from app.schemas import AppSettingsOut, AppSettingsUpdate
+from app.services import notification_queue
 
 
 router = APIRouter(prefix="/api/settings", tags=["Nastavení"])
@@ -48,6 +49,7 @@ def update_app_settings(data: AppSettingsUpdate, db: Session = Depends(get_db)):
     db.add(settings)
     db.commit()
     db.refresh(settings)
+    notification_queue.invalidate_targets()
     return AppSettingsOut(
         bankroll=settings.bankroll,
         webhook_url=settings.webhook_url,
@@ -4,12 +4,15 @@ from typing import Optional, List
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, Query, Body
 from fastapi.responses import StreamingResponse
-from sqlalchemy import case, or_, and_
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import case, func, or_, and_
+from sqlalchemy.orm import Session, aliased, joinedload
 
-from app.database import get_db
-from app.models import Ticket, TicketStatus, TicketType, TicketSource, Sport, League
+from app.database import SessionLocal, get_db
+from app.models import Ticket, TicketStatus, TicketType, TicketSource, Sport, Bookmaker, League
 from app.schemas import TicketCreate, TicketUpdate, TicketOut, TicketListResponse
+from app.services import aku_leg_index, live_state_cache, rollup_service, stats_cache, ticket_search
+from app.services.bulk_import_service import settlement_amounts, updated_amounts
+from app.utils import columnar, keyset
 
 router = APIRouter(prefix="/api/tickets", tags=["Tikety"])
 
@@ -34,30 +37,14 @@ def create_ticket(data: TicketCreate, db: Session = Depends(get_db)):
     ticket = Ticket(**ticket_data)
 
     # Automatický výpočet profitu
-    if ticket.status == TicketStatus.won and ticket.stake:
-        if ticket.payout is not None:
-            ticket.profit = ticket.payout - ticket.stake
-        else:
-            ticket.payout = ticket.stake * ticket.odds
-            ticket.profit = ticket.payout - ticket.stake
-    elif ticket.status == TicketStatus.half_win and ticket.stake:
-        if ticket.payout is not None:
-            ticket.profit = ticket.payout - ticket.stake
-        else:
-            # polovina výhry: stake + (stake*odds - stake)/2
-            ticket.payout = ticket.stake * (1 + float(ticket.odds)) / 2
-            ticket.profit = ticket.payout - ticket.stake
-    elif ticket.status == TicketStatus.lost:
-        ticket.profit = -ticket.stake
-        ticket.payout = 0
-    elif ticket.status == TicketStatus.half_loss:
-        ticket.profit = -(ticket.stake / 2)
-        ticket.payout = ticket.stake / 2
-    elif ticket.status == TicketStatus.void:
-        ticket.profit = 0
-        ticket.payout = ticket.stake
+    ticket.payout, ticket.profit = settlement_amounts(
+        ticket.status, ticket.stake, ticket.odds, ticket.payout, ticket.profit,
+    )
 
     db.add(ticket)
+    db.flush()  # doplní created_at a id
+    rollup_service.apply_ticket_change(db, None, rollup_service.snapshot(ticket))
+    aku_leg_index.refresh_parents(db, [ticket.parent_id])
     db.commit()
     
     # Re-fetch with relationships to ensure they are populated in the response
@@ -90,11 +77,18 @@ def list_tickets(
     sort_dir: str = Query(default="desc"),
     limit: int = Query(default=100, le=500),
     offset: int = Query(default=0),
+    pagination: str = Query(default="offset", description="offset | cursor (keyset stránkování přes next_cursor)"),
+    cursor: Optional[str] = Query(None, description="next_cursor z předchozí stránky (zapne pagination=cursor)"),
     db: Session = Depends(get_db),
 ):
-    """Seznam tiketů s filtry, řazením a stránkováním. Při výchozím řazení jdou děti hned za rodičem (AKU)."""
-    query = _tickets_query(
-        db, sport_id=sport_id, league_id=league_id, bookmaker_id=bookmaker_id,
+    """
+    Seznam tiketů s filtry, řazením a stránkováním. Při výchozím řazení jdou děti hned za rodičem (AKU).
+
+    pagination=cursor: místo offsetu se pokračuje od posledního řádku (next_cursor, None = konec);
+    total se v tomto režimu bere z cache (platí do dalšího zápisu tiketů).
+    """
+    filters = dict(
+        sport_id=sport_id, league_id=league_id, bookmaker_id=bookmaker_id,
         status=status, market_type_id=market_type_id, parent_id=parent_id,
         ticket_type=ticket_type,
         is_live=is_live, date_from=date_from, date_to=date_to,
@@ -102,11 +96,37 @@ def list_tickets(
         incomplete=incomplete in ("1", "true", "True", True) if incomplete is not None else None,
         active_or_live=active_or_live in (True, "1", "true", "True") if active_or_live is not None else None,
         search=search,
-        sort_by=sort_by, sort_dir=sort_dir,
     )
-    total = query.count()
-    items = query.offset(offset).limit(limit).all()
-    return {"items": items, "total": total}
+    query = _tickets_query(db, **filters, sort_by=sort_by, sort_dir=sort_dir)
+
+    if cursor is None and pagination != "cursor":
+        total = _count_tickets(query)
+        items = query.offset(offset).limit(limit).all()
+        return {"items": items, "total": total}
+
+    spec = _sort_spec(db, sort_by, sort_dir, search)
+    signature = f"{sort_by}:{sort_dir}:{search or ''}"
+    if cursor:
+        try:
+            last_values = keyset.decode_cursor(cursor, signature, len(spec))
+        except keyset.InvalidCursor as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        query = query.filter(keyset.after_condition(spec, last_values))
+
+    # Hodnoty řadicích výrazů načíst s řádkem (pro další cursor); o 1 víc = existuje další stránka
+    rows = query.add_columns(*[part.expr for part in spec]).limit(limit + 1).all()
+    items = [row[0] for row in rows[:limit]]
+    next_cursor = keyset.encode_cursor(signature, list(rows[limit - 1][1:])) if len(rows) > limit else None
+    total = stats_cache.get_or_compute(
+        "tickets_total", filters,
+        lambda: _count_tickets(_tickets_query(db, **filters)),
+    )
+    return {"items": items, "total": total, "next_cursor": next_cursor}
+
+
+def _count_tickets(query) -> int:
+    """Počet tiketů dotazu – jen COUNT nad filtry, bez joinedload a ORDER BY."""
+    return query.order_by(None).with_entities(func.count(Ticket.id)).scalar()
 
 
 def _tickets_query(
@@ -133,7 +153,8 @@ def _tickets_query(
 
     incomplete=True: jen tikety k doplnění.
     active_or_live=True: pouze status=open (nevyhodnocené), aby v overlay zmizely hned po vyhodnocení.
-    search: fulltext přes základní textová pole (týmy, liga, trh, výběr).
+    search: fulltext přes základní textová pole (týmy, liga, trh, výběr) – viz ticket_search;
+    sort_by="relevance" řadí výsledky hledání podle shody.
     """
     query = db.query(Ticket).options(
         joinedload(Ticket.bookmaker),
@@ -190,52 +211,47 @@ def _tickets_query(
     if odds_max:
         query = query.filter(Ticket.odds <= odds_max)
     if search:
-        pattern = f"%{search}%"
-        # join na ligu kvůli filtrování podle jejího názvu
-        query = query.outerjoin(League, Ticket.league_id == League.id)
-        query = query.filter(
-            or_(
-                Ticket.home_team.ilike(pattern),
-                Ticket.away_team.ilike(pattern),
-                Ticket.market_label.ilike(pattern),
-                Ticket.selection.ilike(pattern),
-                League.name.ilike(pattern),
-            )
-        )
+        query = query.filter(ticket_search.search_condition(db, search))
+
+    return query.order_by(*keyset.order_by_clauses(_sort_spec(db, sort_by, sort_dir, search)))
 
-    # Řazení: rodič AKU + děti držet pohromadě
-    order_key = case(
-        (Ticket.parent_id.isnot(None), Ticket.parent_id),
-        else_=Ticket.id,
-    )
 
+def _sort_spec(db: Session, sort_by="created_at", sort_dir="desc", search=None) -> List[keyset.SortPart]:
+    """Řazení seznamu tiketů – sdílí ho ORDER BY i keyset cursor. Vždy končí na Ticket.id."""
+    desc = sort_dir == "desc"
+    # Řazení podle relevance hledání (bez hledaného textu = výchozí řazení)
+    if sort_by == "relevance" and not search:
+        sort_by = "created_at"
+    if sort_by == "relevance":
+        return [
+            keyset.SortPart(ticket_search.search_rank(db, search), True),
+            keyset.SortPart(Ticket.id, True),
+        ]
     # Speciální zacházení pro datumové řazení, aby šlo použít event_date i created_at
     if sort_by == "event_date":
         sort_col = case(
             (Ticket.event_date.is_(None), Ticket.created_at),
             else_=Ticket.event_date,
         )
-        query = query.order_by(
-            sort_col.desc() if sort_dir == "desc" else sort_col.asc(),
-            Ticket.id.desc() if sort_dir == "desc" else Ticket.id.asc(),
+        return [keyset.SortPart(sort_col, desc, nullable=True), keyset.SortPart(Ticket.id, desc)]
+    if sort_by in ("created_at", "id"):
+        # Řazení: rodič AKU + děti držet pohromadě
+        order_key = case(
+            (Ticket.parent_id.isnot(None), Ticket.parent_id),
+            else_=Ticket.id,
         )
-    else:
-        sort_col = getattr(Ticket, sort_by, Ticket.created_at)
-        if sort_by in ("created_at", "id"):
-            # Výchozí řazení: nejdřív po dávkách importu (v pořadí ze sázkovky), pak ostatní
-            query = query.order_by(
-                Ticket.import_batch_id.desc().nullslast(),
-                Ticket.import_batch_index.asc().nullslast(),
-                order_key.desc() if sort_dir == "desc" else order_key.asc(),
-                Ticket.id.desc() if sort_dir == "desc" else Ticket.id.asc(),
-            )
-        else:
-            query = query.order_by(sort_col.desc() if sort_dir == "desc" else sort_col.asc())
-    return query
+        # Výchozí řazení: nejdřív po dávkách importu (v pořadí ze sázkovky), pak ostatní
+        return [
+            keyset.SortPart(Ticket.import_batch_id, True, nullable=True),
+            keyset.SortPart(Ticket.import_batch_index, False, nullable=True),
+            keyset.SortPart(order_key, desc),
+            keyset.SortPart(Ticket.id, desc),
+        ]
+    sort_col = getattr(Ticket, sort_by) if sort_by in Ticket.__table__.c else Ticket.created_at
+    return [keyset.SortPart(sort_col, desc, nullable=True), keyset.SortPart(Ticket.id, desc)]
 
 
-@router.get("/export")
-def export_tickets_csv(
+def _export_filters(
     sport_id: Optional[int] = None,
     league_id: Optional[int] = None,
     bookmaker_id: Optional[int] = None,
@@ -249,11 +265,9 @@ def export_tickets_csv(
     search: Optional[str] = None,
     sort_by: str = Query(default="created_at"),
     sort_dir: str = Query(default="desc"),
-    db: Session = Depends(get_db),
-):
-    """Export tiketů jako CSV (s aktuálními filtry)."""
-    query = _tickets_query(
-        db,
+) -> dict:
+    """Filtry a řazení exportů (stejné jako seznam tiketů, bez stránkování)."""
+    return dict(
         sport_id=sport_id,
         league_id=league_id,
         bookmaker_id=bookmaker_id,
@@ -268,41 +282,121 @@ def export_tickets_csv(
         sort_by=sort_by,
         sort_dir=sort_dir,
     )
-    rows = query.all()
-    buf = io.StringIO()
-    writer = csv.writer(buf, delimiter=";")
-    writer.writerow([
-        "id", "created_at", "sport", "bookmaker", "league", "home_team", "away_team",
-        "market_label", "selection", "odds", "stake", "payout", "profit", "status", "ticket_type", "parent_id", "is_live",
-    ])
-    for t in rows:
-        writer.writerow([
-            t.id,
-            t.created_at.isoformat() if t.created_at else "",
-            t.sport.name if t.sport else "",
-            t.bookmaker.name if t.bookmaker else "",
-            t.league.name if t.league else "",
-            t.home_team or "",
-            t.away_team or "",
-            t.market_label or "",
-            t.selection or "",
-            str(t.odds) if t.odds is not None else "",
-            str(t.stake) if t.stake is not None else "",
-            str(t.payout) if t.payout is not None else "",
-            str(t.profit) if t.profit is not None else "",
-            t.status.value if hasattr(t.status, "value") else str(t.status),
-            t.ticket_type.value if hasattr(t.ticket_type, "value") else str(t.ticket_type),
-            str(t.parent_id) if t.parent_id is not None else "",
-            "1" if t.is_live else "0",
-        ])
-    buf.seek(0)
+
+
+@router.get("/export")
+def export_tickets_csv(filters: dict = Depends(_export_filters)):
+    """Export tiketů jako CSV (s aktuálními filtry). Řádky se streamují po dávkách – paměť nezávisí na počtu tiketů."""
     return StreamingResponse(
-        iter([buf.getvalue()]),
+        _iter_export_csv(filters),
         media_type="text/csv; charset=utf-8",
         headers={"Content-Disposition": "attachment; filename=tikety_export.csv"},
     )
 
 
+@router.get("/export/{fmt}")
+def export_tickets_columnar(fmt: str, filters: dict = Depends(_export_filters)):
+    """
+    Export tiketů jako Parquet (fmt=parquet) nebo Arrow IPC stream (fmt=arrow) – typované sloupce
+    (decimal, timestamp) pro načtení do pandas/polars. Vyžaduje volitelný balíček pyarrow.
+    """
+    if fmt not in columnar.FORMATS:
+        raise HTTPException(status_code=404, detail=f"Neznámý formát exportu: {fmt} (parquet, arrow)")
+    try:
+        columnar.require_pyarrow()
+    except columnar.ColumnarUnavailable as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    media_type, extension = columnar.FORMATS[fmt]
+    return StreamingResponse(
+        _iter_export_columnar(filters, fmt),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename=tikety_export.{extension}"},
+    )
+
+
+_EXPORT_COLUMNS = [
+    "id", "created_at", "sport", "bookmaker", "league", "home_team", "away_team",
+    "market_label", "selection", "odds", "stake", "payout", "profit", "status", "ticket_type", "parent_id", "is_live",
+]
+_EXPORT_CHUNK_ROWS = 1000
+_EXPORT_BATCH_ROWS = 10000  # Parquet/Arrow: řádků na record batch (row group)
+
+
+def _export_query(db: Session, filters: dict):
+    """Dotaz exportu: jen potřebné sloupce (názvy z číselníků přes outer join), bez ORM objektů a joinedload."""
+    # Alias: řazení podle relevance má korelovaný subselect na leagues, nesmí se navázat na tento join
+    league = aliased(League)
+    return (
+        _tickets_query(db, **filters)
+        .enable_eagerloads(False)
+        .outerjoin(Sport, Ticket.sport_id == Sport.id)
+        .outerjoin(Bookmaker, Ticket.bookmaker_id == Bookmaker.id)
+        .outerjoin(league, Ticket.league_id == league.id)
+        .with_entities(
+            Ticket.id, Ticket.created_at, Sport.name, Bookmaker.name, league.name,
+            Ticket.home_team, Ticket.away_team, Ticket.market_label, Ticket.selection,
+            Ticket.odds, Ticket.stake, Ticket.payout, Ticket.profit,
+            Ticket.status, Ticket.ticket_type, Ticket.parent_id, Ticket.is_live,
+        )
+    )
+
+
+def _export_csv_row(row) -> list:
+    (ticket_id, created_at, sport, bookmaker, league, home_team, away_team, market_label, selection,
+     odds, stake, payout, profit, status, ticket_type, parent_id, is_live) = row
+    return [
+        ticket_id,
+        created_at.isoformat() if created_at else "",
+        sport or "",
+        bookmaker or "",
+        league or "",
+        home_team or "",
+        away_team or "",
+        market_label or "",
+        selection or "",
+        str(odds) if odds is not None else "",
+        str(stake) if stake is not None else "",
+        str(payout) if payout is not None else "",
+        str(profit) if profit is not None else "",
+        status.value if hasattr(status, "value") else str(status),
+        ticket_type.value if hasattr(ticket_type, "value") else str(ticket_type),
+        str(parent_id) if parent_id is not None else "",
+        "1" if is_live else "0",
+    ]
+
+
+def _iter_export_csv(filters: dict):
+    """Generátor CSV po blocích _EXPORT_CHUNK_ROWS řádků (yield_per = server-side cursor u PostgreSQL)."""
+    # Vlastní session: závislosti s yield (get_db) FastAPI zavře dřív, než se začne streamovat odpověď
+    db = SessionLocal()
+    try:
+        buf = io.StringIO()
+        writer = csv.writer(buf, delimiter=";")
+        writer.writerow(_EXPORT_COLUMNS)
+        rows = _export_query(db, filters).yield_per(_EXPORT_CHUNK_ROWS)
+        for n, row in enumerate(rows, start=1):
+            writer.writerow(_export_csv_row(row))
+            if n % _EXPORT_CHUNK_ROWS == 0:
+                yield buf.getvalue()
+                buf.seek(0)
+                buf.truncate()
+        yield buf.getvalue()
+    finally:
+        db.close()
+
+
+def _iter_export_columnar(filters: dict, fmt: str):
+    """Generátor Parquet/Arrow po record batchích (stejný dotaz a vlastní session jako CSV)."""
+    db = SessionLocal()
+    try:
+        query = _export_query(db, filters)
+        sql_types = [col["type"] for col in query.column_descriptions]
+        rows = query.yield_per(_EXPORT_BATCH_ROWS)
+        yield from columnar.iter_columnar(rows, _EXPORT_COLUMNS, sql_types, fmt, batch_rows=_EXPORT_BATCH_ROWS)
+    finally:
+        db.close()
+
+
 @router.post("/clear-new-mark")
 def clear_newly_imported_mark(
     ticket_ids: Optional[List[int]] = Body(None, embed=True),
@@ -352,27 +446,24 @@ def update_ticket(ticket_id: int, data: TicketUpdate, db: Session = Depends(get_
             update_data["ticket_type"] = TicketType(update_data["ticket_type"])
         except ValueError:
             pass  # nechat stávající
+    before = rollup_service.snapshot(ticket)
+    leg_before = (ticket.parent_id, ticket.home_team, ticket.away_team)
     for key, value in update_data.items():
         setattr(ticket, key, value)
 
     # Přepočítat profit; u výhry doplnit payout z odds*stake, pokud chybí
-    if ticket.status == TicketStatus.won and ticket.stake is not None:
-        if ticket.payout is None or ticket.payout == 0:
-            ticket.payout = ticket.stake * ticket.odds
-        ticket.profit = ticket.payout - ticket.stake
-    elif ticket.status == TicketStatus.half_win and ticket.payout is not None and ticket.stake is not None:
-        ticket.profit = ticket.payout - ticket.stake
-    elif ticket.status == TicketStatus.lost:
-        ticket.profit = -ticket.stake
-        ticket.payout = 0
-    elif ticket.status == TicketStatus.half_loss:
-        ticket.profit = -(ticket.stake / 2)
-        ticket.payout = ticket.stake / 2
-    elif ticket.status == TicketStatus.void:
-        ticket.profit = 0
-        ticket.payout = ticket.stake
+    ticket.payout, ticket.profit = updated_amounts(
+        ticket.status, ticket.stake, ticket.odds, ticket.payout, ticket.profit,
+    )
+    # Ruční úprava: příští import tiket znovu porovná se sázkovkou (viz import_pipeline.DuplicateSync)
+    ticket.import_digest = None
 
+    rollup_service.apply_ticket_change(db, before, rollup_service.snapshot(ticket))
+    if (ticket.parent_id, ticket.home_team, ticket.away_team) != leg_before:
+        aku_leg_index.refresh_parents(db, [leg_before[0], ticket.parent_id])
     db.commit()
+    # LIVE cache drží trh/výběr/týmy tiketu – po úpravě vyhodnocovat z nových
+    live_state_cache.discard_ticket(ticket_id)
     
     # Re-fetch with relationships to ensure they are populated in the response
     return db.query(Ticket).options(
@@ -389,6 +480,17 @@ def delete_ticket(ticket_id: int, db: Session = Depends(get_db)):
     ticket = db.query(Ticket).filter(Ticket.id == ticket_id).first()
     if not ticket:
         raise HTTPException(status_code=404, detail="Tiket nenalezen")
+    # Smazáním rodiče AKU se dětem vynuluje parent_id – i to mění jejich příspěvek do rollupu
+    children = list(ticket.children)
+    children_before = [rollup_service.snapshot(c) for c in children]
+    before = rollup_service.snapshot(ticket)
+    before_parent_id = ticket.parent_id
     db.delete(ticket)
+    db.flush()
+    rollup_service.apply_ticket_change(db, before, None)
+    for child, before in zip(children, children_before):
+        rollup_service.apply_ticket_change(db, before, rollup_service.snapshot(child))
+    aku_leg_index.refresh_parents(db, [before_parent_id, ticket_id if children else None])
     db.commit()
+    live_state_cache.discard_ticket(ticket_id)
     return {"detail": "Tiket smazán"}
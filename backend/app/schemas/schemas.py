@@ -170,6 +170,7 @@ class TicketListResponse(BaseModel):
     """Paginated list of tickets with total count."""
     items: List[TicketOut]
     total: int
+    next_cursor: Optional[str] = None  # jen pagination=cursor; None = poslední stránka
 
 
 class SofaScoreEventOut(BaseModel):
@@ -496,6 +497,31 @@ class FortunaScrapePreviewResponse(BaseModel):
     skipped_count: int
 
 
+# ─── Import Jobs (import na pozadí) ─────────────────────────
+
+class ImportJobResultItem(BaseModel):
+    index: int
+    status: str                 # "created" | "updated" | "skipped" | "error"
+    ticket_id: Optional[int] = None
+    message: Optional[str] = None
+
+
+class ImportJobOut(BaseModel):
+    id: int
+    created_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    bookmaker: str
+    status: str                 # pending | running | done | error
+    total: int
+    processed: int
+    counts: Optional[dict] = None   # {created, updated, skipped, errors} – průběžně i po dokončení
+    results: Optional[List[ImportJobResultItem]] = None  # až ve stavu done
+    error_message: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
 # ─── Analytics ─────────────────────────────────────────────
 
 class AnalyticsKpis(BaseModel):
@@ -0,0 +1,120 @@
+"""
+Index noh AKU pro dedupe importů (sloupec tickets.leg_signature + tabulka ticket_aku_legs).
+
+- leg_signature rodiče = hash seřazené množiny dvojic (domácí, hosté) jeho dětí
+  → přesná shoda noh je jeden indexovaný dotaz,
+- ticket_aku_legs (hash dvojice → rodič) = invertovaný index pro částečnou shodu
+  (např. z karty tiketu známe jen první zápas).
+
+Při zápisu tiketů se volá refresh_parents() pro rodiče, kterým se změnily děti
+(vytvoření, úprava týmů / parent_id, smazání). rebuild_leg_index() přepočítá vše
+(migrace add_aku_leg_index).
+"""
+import hashlib
+from typing import Iterable, List, Optional
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.models import Ticket, TicketAkuLeg, TicketType
+
+L = TicketAkuLeg
+
+
+def normalize_leg_pair(home: Optional[str], away: Optional[str]) -> tuple[str, str]:
+    """Normalizuje dvojici domácí–hosté pro porovnání (strip, prázdné řetězce)."""
+    return ((home or "").strip(), (away or "").strip())
+
+
+def leg_hash(pair: tuple[str, str]) -> str:
+    return hashlib.sha256("\x1f".join(pair).encode("utf-8")).hexdigest()
+
+
+def leg_signature(pairs: Iterable[tuple[str, str]]) -> Optional[str]:
+    """Hash množiny dvojic (nezávisí na pořadí ani opakování); None pro prázdnou množinu."""
+    hashes = sorted({leg_hash(p) for p in pairs})
+    if not hashes:
+        return None
+    return hashlib.sha256("\x1e".join(hashes).encode("utf-8")).hexdigest()
+
+
+def refresh_parents(db: Session, parent_ids: Iterable[Optional[int]]) -> None:
+    """Přepočítá signaturu a invertovaný index pro zadané rodiče (podle jejich aktuálních dětí)."""
+    ids = sorted({pid for pid in parent_ids if pid is not None})
+    if not ids:
+        return
+    db.flush()
+    legs: dict[int, set] = {pid: set() for pid in ids}
+    rows = db.execute(
+        select(Ticket.parent_id, Ticket.home_team, Ticket.away_team).where(Ticket.parent_id.in_(ids))
+    )
+    for parent_id, home, away in rows:
+        legs[parent_id].add(normalize_leg_pair(home, away))
+    db.execute(delete(L).where(L.parent_id.in_(ids)))
+    _write(db, legs)
+
+
+def rebuild_leg_index(db: Session) -> int:
+    """Smaže a znovu napočítá index pro všechny rodiče. Vrací počet rodičů s nohami."""
+    db.flush()
+    db.execute(delete(L))
+    db.execute(update(Ticket).where(Ticket.leg_signature.isnot(None)).values(leg_signature=None))
+    legs: dict[int, set] = {}
+    rows = db.execute(
+        select(Ticket.parent_id, Ticket.home_team, Ticket.away_team)
+        .where(Ticket.parent_id.isnot(None))
+        .execution_options(yield_per=5000)
+    )
+    for parent_id, home, away in rows:
+        legs.setdefault(parent_id, set()).add(normalize_leg_pair(home, away))
+    _write(db, legs)
+    return len(legs)
+
+
+def _write(db: Session, legs: dict[int, set]) -> None:
+    for parent_id, pairs in legs.items():
+        db.execute(
+            update(Ticket)
+            .where(Ticket.id == parent_id)
+            .values(leg_signature=leg_signature(pairs))
+            .execution_options(synchronize_session=False)
+        )
+    rows = [{"leg_hash": leg_hash(p), "parent_id": pid} for pid, pairs in legs.items() for p in pairs]
+    if rows:
+        db.execute(insert(L), rows)
+
+
+def _aku_parent_conditions(bookmaker_id: int) -> list:
+    return [
+        Ticket.bookmaker_id == bookmaker_id,
+        Ticket.ticket_type == TicketType.aku,
+        Ticket.parent_id.is_(None),
+    ]
+
+
+def find_parent(db: Session, bookmaker_id: int, pairs: List[tuple[str, str]]) -> Optional[int]:
+    """
+    ID existujícího AKU rodiče sázkovky, jehož děti odpovídají předaným dvojicím (domácí, hosté):
+    nejdřív přesná shoda množiny noh, jinak rodič, který má všechny předané dvojice
+    (částečná informace – známe jen některé nohy).
+    """
+    pairs = {normalize_leg_pair(*p) for p in pairs}
+    if not pairs:
+        return None
+    exact = db.scalar(
+        select(Ticket.id)
+        .where(*_aku_parent_conditions(bookmaker_id), Ticket.leg_signature == leg_signature(pairs))
+        .order_by(Ticket.id)
+        .limit(1)
+    )
+    if exact is not None:
+        return exact
+    return db.scalar(
+        select(L.parent_id)
+        .join(Ticket, Ticket.id == L.parent_id)
+        .where(L.leg_hash.in_([leg_hash(p) for p in pairs]), *_aku_parent_conditions(bookmaker_id))
+        .group_by(L.parent_id)
+        .having(func.count() == len(pairs))
+        .order_by(L.parent_id)
+        .limit(1)
+    )
@@ -0,0 +1,306 @@
+"""
+Hromadný zápis nových tiketů z importů sázkovek.
+
+Místo create_ticket po jednom (kontrola sportu, commit a re-fetch s joinedload
+na každý tiket i nohu AKU) se nové tikety sbírají v BulkTicketWriter a flush()
+zapíše celou dávku: payout/profit spočítané v paměti, rodiče jedním INSERT …
+ON CONFLICT (import_fingerprint) … RETURNING id, nohy AKU jedním executemany,
+rollup + equity + index noh AKU a jeden commit.
+"""
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Callable, List, Optional
+
+from sqlalchemy import Boolean, insert, literal_column
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.models import Ticket, TicketSource, TicketStatus, TicketType
+from app.schemas import TicketCreate
+from app.services import aku_leg_index, lookup_cache, rollup_service
+
+
+def settlement_amounts(status, stake, odds, payout, profit) -> tuple:
+    """(payout, profit) tiketu podle stavu – automatický výpočet při vytvoření tiketu."""
+    if status == TicketStatus.won and stake:
+        if payout is None:
+            payout = stake * odds
+        profit = payout - stake
+    elif status == TicketStatus.half_win and stake:
+        if payout is None:
+            # polovina výhry: stake + (stake*odds - stake)/2
+            payout = stake * (1 + Decimal(odds)) / 2
+        profit = payout - stake
+    elif status == TicketStatus.lost:
+        profit = -stake
+        payout = 0
+    elif status == TicketStatus.half_loss:
+        profit = -(stake / 2)
+        payout = stake / 2
+    elif status == TicketStatus.void:
+        profit = 0
+        payout = stake
+    return payout, profit
+
+
+def updated_amounts(status, stake, odds, payout, profit) -> tuple:
+    """(payout, profit) po úpravě tiketu (update_ticket, synchronizace duplicit z importu)."""
+    if status == TicketStatus.won and stake is not None:
+        # u výhry doplnit payout z odds*stake, pokud chybí
+        if payout is None or payout == 0:
+            payout = stake * odds
+        profit = payout - stake
+    elif status == TicketStatus.half_win and payout is not None and stake is not None:
+        profit = payout - stake
+    elif status == TicketStatus.lost:
+        profit = -stake
+        payout = 0
+    elif status == TicketStatus.half_loss:
+        profit = -(stake / 2)
+        payout = stake / 2
+    elif status == TicketStatus.void:
+        profit = 0
+        payout = stake
+    return payout, profit
+
+
+@dataclass
+class PendingTicket:
+    """Nový tiket čekající na zápis; id a zapsané hodnoty (i nohou AKU) doplní flush()."""
+    data: TicketCreate
+    children: List[TicketCreate] = field(default_factory=list)
+    # Výsledky importu k doplnění ticket_id: (výsledek rodiče, [výsledky noh]), viz flush_into_results
+    context: Any = None
+    fingerprint: Optional[str] = None  # tickets.import_fingerprint, viz import_fingerprint
+    digest: Optional[str] = None       # tickets.import_digest
+    id: Optional[int] = None
+    values: Optional[dict] = None  # zapsané hodnoty sloupců včetně id
+    child_values: List[dict] = field(default_factory=list)
+    # Tiket se stejným otiskem už v DB byl (např. ze souběžného importu): id je jeho, nic se nezapsalo
+    conflict: bool = False
+
+
+class BulkTicketWriter:
+    """
+    Sbírá nové tikety importu a zapisuje je po dávkách (flush() při full a na konci importu).
+
+    Importy hledají duplicity v DB – tiket čekající na zápis by nenašly. Před hledáním
+    duplicity proto volají has_pending() (AKU s nohami i has_pending_aku()) a při možné shodě
+    nejdřív flush(). Jedna dávka tak nemá dva tikety se stejným otiskem (ON CONFLICT DO UPDATE
+    nesmí řádek změnit dvakrát).
+    """
+
+    def __init__(self, db: Session, batch_size: int = 500):
+        self.db = db
+        self.batch_size = batch_size
+        self.pending: List[PendingTicket] = []
+        self._pending_fingerprints: set = set()
+        self._pending_teams: dict = {}  # (domácí, hosté) -> [PendingTicket]
+        # Nohy čekajících AKU rodičů ve tvaru aku_leg_index (leg_signature / leg_hash)
+        self._pending_leg_signatures: set = set()
+        self._pending_leg_hashes: set = set()
+
+    def add(
+        self,
+        data: TicketCreate,
+        children: List[TicketCreate] = (),
+        context: Any = None,
+        fingerprint: Optional[str] = None,
+        digest: Optional[str] = None,
+    ) -> PendingTicket:
+        """Zařadí tiket (a nohy AKU) k zápisu."""
+        pending = PendingTicket(
+            data=data, children=list(children), context=context, fingerprint=fingerprint, digest=digest,
+        )
+        self.pending.append(pending)
+        if fingerprint:
+            self._pending_fingerprints.add(fingerprint)
+        self._pending_teams.setdefault((data.home_team, data.away_team), []).append(pending)
+        if pending.children:
+            pairs = {aku_leg_index.normalize_leg_pair(c.home_team, c.away_team) for c in pending.children}
+            self._pending_leg_signatures.add(aku_leg_index.leg_signature(pairs))
+            self._pending_leg_hashes.update(aku_leg_index.leg_hash(pair) for pair in pairs)
+        return pending
+
+    @property
+    def full(self) -> bool:
+        return len(self.pending) >= self.batch_size
+
+    def has_pending(
+        self,
+        fingerprint: Optional[str],
+        home_team: str,
+        away_team: str,
+        matches: Optional[Callable[[TicketCreate], bool]] = None,
+    ) -> bool:
+        """
+        Mohl by tiket být duplicitou tiketu, který ještě není v DB? Stejný otisk, nebo stejné
+        týmy – s matches(data čekajícího tiketu) jen ty, které by párování opravdu spárovalo
+        (vklad, kurz, čas; AKU rodiče mají u Tipsportu všichni stejné "týmy").
+        """
+        if fingerprint is not None and fingerprint in self._pending_fingerprints:
+            return True
+        same_teams = self._pending_teams.get((home_team, away_team), ())
+        if matches is None:
+            return bool(same_teams)
+        return any(matches(pending.data) for pending in same_teams)
+
+    def has_pending_aku(self, pairs) -> bool:
+        """
+        Mohl by AKU tiket s nohami pairs (domácí, hosté) být duplicitou AKU rodiče, který ještě
+        není v DB? Stejná shoda jako aku_leg_index.find_parent: přesná množina noh (leg_signature),
+        nebo všechny nohy u čekajících rodičů (částečná shoda; stačí nutná podmínka).
+        """
+        pairs = {aku_leg_index.normalize_leg_pair(*pair) for pair in pairs}
+        if not pairs or not self._pending_leg_hashes:
+            return False
+        if aku_leg_index.leg_signature(pairs) in self._pending_leg_signatures:
+            return True
+        return all(aku_leg_index.leg_hash(pair) in self._pending_leg_hashes for pair in pairs)
+
+    def _resolve_sport_id(self, sport_id: int) -> int:
+        """Sport fallback jako v create_ticket: neexistující sport_id → "Ostatní"."""
+        lookups = lookup_cache.get(self.db)
+        if sport_id in lookups.sport_names:
+            return sport_id
+        fallback_id = lookups.sport_ids.get(lookup_cache.FALLBACK_SPORT[0].lower())
+        if fallback_id is None:
+            raise ValueError("Neplatný sport_id a v databázi chybí sport 'Ostatní'")
+        return fallback_id
+
+    def _row(self, data: TicketCreate, **columns) -> dict:
+        """Hodnoty sloupců nového tiketu; columns = sloupce mimo TicketCreate (parent_id, otisk, digest)."""
+        row = data.model_dump()
+        row["sport_id"] = self._resolve_sport_id(data.sport_id)
+        try:
+            row["ticket_type"] = TicketType(row["ticket_type"] or TicketType.solo)
+        except ValueError:
+            row["ticket_type"] = TicketType.solo
+        row["status"] = TicketStatus(row["status"])
+        row["source"] = TicketSource(row["source"] or TicketSource.manual)
+        row["payout"], row["profit"] = settlement_amounts(
+            row["status"], row["stake"], row["odds"], row["payout"], row["profit"],
+        )
+        if row["status"] == TicketStatus.won and row["stake"] is not None and row["profit"] is None:
+            # Nulový vklad (freebet): importy dřív po vytvoření volaly update_ticket, který profit dopočítal
+            row["payout"] = row["payout"] or row["stake"] * row["odds"]
+            row["profit"] = row["payout"] - row["stake"]
+        row.update(columns)
+        row["created_at"] = datetime.utcnow()
+        return row
+
+    def _insert(self, rows: List[dict]) -> List[int]:
+        result = self.db.execute(
+            insert(Ticket).returning(Ticket.id, sort_by_parameter_order=True),
+            rows,
+        )
+        return list(result.scalars())
+
+    def _upsert(self, rows: List[dict]) -> List[tuple]:
+        """
+        INSERT … ON CONFLICT (import_fingerprint): existující tiket se stejným otiskem se nepřepíše,
+        jen vrátí své id. Vrací (id, vložen) po řádcích – vložen=False = konflikt.
+
+        PostgreSQL: RETURNING (xmax = 0) – nově vložený řádek nemá xmax, řádek změněný
+        ON CONFLICT DO UPDATE ano. SQLite (vývoj) takový příznak nemá: konflikt pozná podle
+        created_at, který vrátí RETURNING – u existujícího řádku je jiný než zapisovaný
+        (zápisy do SQLite jsou serializované a čas se ukládá přesně jako text).
+        """
+        dialect = self.db.get_bind().dialect.name
+        if dialect == "postgresql":
+            stmt = postgresql.insert(Ticket)
+        elif dialect == "sqlite":
+            stmt = sqlite.insert(Ticket)
+        else:
+            # Bez ON CONFLICT: duplicitní otisk skončí IntegrityError (dávka se vrátí)
+            stmt = insert(Ticket)
+        if dialect in ("postgresql", "sqlite"):
+            # DO NOTHING by konfliktní řádek nevrátil v RETURNING – "update" na stejnou hodnotu ano
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[Ticket.import_fingerprint],
+                set_={"import_fingerprint": stmt.excluded.import_fingerprint},
+            )
+        if dialect == "postgresql":
+            inserted = literal_column("(xmax = 0)", Boolean).label("inserted")
+            result = self.db.execute(stmt.returning(Ticket.id, inserted, sort_by_parameter_order=True), rows)
+            return [(ticket_id, bool(was_inserted)) for ticket_id, was_inserted in result]
+        result = self.db.execute(
+            stmt.returning(Ticket.id, Ticket.created_at, sort_by_parameter_order=True),
+            rows,
+        )
+        if dialect != "sqlite":
+            return [(ticket_id, True) for ticket_id, _ in result]
+        return [
+            (ticket_id, created_at == row["created_at"])
+            for row, (ticket_id, created_at) in zip(rows, result)
+        ]
+
+    def flush(self, commit: bool = True) -> List[PendingTicket]:
+        """Zapíše čekající tikety (jedna transakce) a vrátí je s doplněnými id (i konfliktní, viz conflict)."""
+        batch, self.pending = self.pending, []
+        self._pending_fingerprints.clear()
+        self._pending_teams.clear()
+        self._pending_leg_signatures.clear()
+        self._pending_leg_hashes.clear()
+        if not batch:
+            return batch
+
+        parent_rows = [
+            self._row(p.data, import_fingerprint=p.fingerprint, import_digest=p.digest) for p in batch
+        ]
+        for pending, row, (ticket_id, inserted) in zip(batch, parent_rows, self._upsert(parent_rows)):
+            pending.id = ticket_id
+            if not inserted:
+                pending.conflict = True
+                continue
+            pending.values = {**row, "id": ticket_id}
+        written = [p for p in batch if not p.conflict]
+
+        all_values = [p.values for p in written]
+        child_rows, owners = [], []
+        for pending in written:
+            for child in pending.children:
+                child_rows.append(self._row(child, parent_id=pending.id))
+                owners.append(pending)
+        if child_rows:
+            for owner, row, child_id in zip(owners, child_rows, self._insert(child_rows)):
+                owner.child_values.append({**row, "id": child_id})
+                all_values.append(owner.child_values[-1])
+
+        rollup_service.apply_new_tickets(self.db, [rollup_service.entry_from_values(v) for v in all_values])
+        aku_leg_index.refresh_parents(self.db, [p.id for p in written if p.children])
+        if commit:
+            self.db.commit()
+        return batch
+
+
+def flush_into_results(writer: BulkTicketWriter) -> List[PendingTicket]:
+    """
+    flush() a doplnění ticket_id do výsledků importu (context = (výsledek rodiče, [výsledky noh])).
+    Při chybě DB se dávka vrátí (rollback) a její výsledky se přepíšou na error. Vrací tikety
+    z dávky; u konfliktních (conflict=True) nohy nevznikly a výsledek rodiče řeší volající.
+    """
+    batch = list(writer.pending)
+    try:
+        written = writer.flush()
+    except SQLAlchemyError as exc:
+        writer.db.rollback()
+        for pending in batch:
+            parent_result, leg_results = pending.context
+            for result in (parent_result, *leg_results):
+                result.status = "error"
+                result.message = str(exc)
+            # Nohy AKU se bez rodiče nevypisují zvlášť
+            leg_results.clear()
+        return []
+    for pending in written:
+        parent_result, leg_results = pending.context
+        parent_result.ticket_id = pending.id
+        if pending.conflict:
+            leg_results.clear()
+            continue
+        for result, values in zip(leg_results, pending.child_values):
+            result.ticket_id = values["id"]
+    return written
@@ -0,0 +1,169 @@
+"""
+Persistovaný průběh equity a streaků (tabulka ticket_equity_points).
+
+Pro každý vypořádaný tiket (bez rodičů AKU) se ukládá stav SequenceState po jeho
+započtení, v pořadí (created_at – NULL první, id). Globální streak a max. drawdown
+jsou pak poslední bod – bez čtení celé historie.
+
+- nový vypořádaný tiket na konci historie = jeden SELECT posledního bodu + INSERT,
+- změna/smazání/vložení uprostřed = smazat body od místa změny a dopočítat je
+  z bodu těsně před ním.
+"""
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import and_, delete, insert, or_, select
+from sqlalchemy.orm import Session
+
+from app.models import Ticket, TicketEquityPoint, TicketStatus, TicketType
+from app.services.stats_service import SETTLED_STATUSES, SequenceState, last_equity_point
+
+_SETTLED_VALUES = {s.value for s in SETTLED_STATUSES}
+
+P = TicketEquityPoint
+
+
+def _in_sequence(entry) -> bool:
+    """Patří tiket (RollupEntry z rollup_service) do sekvence pro streaky/drawdown?"""
+    return (
+        entry is not None
+        and entry.ticket_id is not None
+        and entry.key.status in _SETTLED_VALUES
+        and not entry.key.is_aku_parent
+    )
+
+
+def _sort_key(created_at: Optional[datetime], ticket_id: int) -> tuple:
+    """Pořadí jako ORDER BY created_at NULLS FIRST, id."""
+    return (created_at is not None, created_at or datetime.min, ticket_id)
+
+
+def _at_or_after(created_col, id_col, created_at: Optional[datetime], ticket_id: int):
+    """SQL podmínka: pozice (created_col, id_col) je >= (created_at, ticket_id)."""
+    if created_at is None:
+        return or_(created_col.isnot(None), id_col >= ticket_id)
+    return or_(
+        created_col > created_at,
+        and_(created_col == created_at, id_col >= ticket_id),
+    )
+
+
+def _point_values(ticket_id: int, created_at: Optional[datetime], state: SequenceState) -> dict:
+    return {
+        "ticket_id": ticket_id,
+        "created_at": created_at,
+        "cumulative": state.cumulative,
+        "peak": state.peak,
+        "max_drawdown": state.max_dd,
+        "streak": state.current_streak,
+        "best_streak": state.best_streak,
+        "worst_streak": state.worst_streak,
+    }
+
+
+def recompute_from(db: Session, created_at: Optional[datetime] = None, ticket_id: Optional[int] = None) -> int:
+    """
+    Přepočítá body od pozice (created_at, ticket_id) dál; bez pozice celou historii.
+    Vrací počet zapsaných bodů.
+    """
+    db.flush()
+    ticket_conds = [
+        Ticket.status.in_(SETTLED_STATUSES),
+        or_(Ticket.parent_id.isnot(None), Ticket.ticket_type != TicketType.aku),
+    ]
+    if ticket_id is None:
+        db.execute(delete(P))
+        start = None
+    else:
+        db.execute(
+            delete(P)
+            .where(_at_or_after(P.created_at, P.ticket_id, created_at, ticket_id))
+            .execution_options(synchronize_session=False)
+        )
+        start = last_equity_point(db)
+        ticket_conds.append(_at_or_after(Ticket.created_at, Ticket.id, created_at, ticket_id))
+
+    state = SequenceState.from_point(start)
+    rows = db.execute(
+        select(Ticket.id, Ticket.created_at, Ticket.status, Ticket.profit)
+        .where(*ticket_conds)
+        .order_by(Ticket.created_at.asc().nullsfirst(), Ticket.id.asc())
+        .execution_options(yield_per=5000)
+    )
+    points = []
+    for tid, t_created, status, profit in rows:
+        state.push(status, profit)
+        points.append(_point_values(tid, t_created, state))
+    if points:
+        db.execute(insert(P), points)
+    return len(points)
+
+
+def rebuild_equity(db: Session) -> int:
+    """Smaže a znovu napočítá všechny body. Vrací jejich počet."""
+    return recompute_from(db)
+
+
+def _affects_sequence(before, after) -> bool:
+    was_in, is_in = _in_sequence(before), _in_sequence(after)
+    if not was_in and not is_in:
+        return False
+    return not (
+        was_in and is_in
+        and before.created_at == after.created_at
+        and before.key.status == after.key.status
+        and before.profit == after.profit
+    )
+
+
+def apply_ticket_change(db: Session, before, after) -> None:
+    """Promítne změnu tiketu (RollupEntry před/po, viz rollup_service) do průběhu equity."""
+    if not _affects_sequence(before, after):
+        return
+    was_in, is_in = _in_sequence(before), _in_sequence(after)
+
+    if is_in and not was_in:
+        last = last_equity_point(db)
+        if last is None or _sort_key(last.created_at, last.ticket_id) < _sort_key(after.created_at, after.ticket_id):
+            # Nové vypořádání na konci historie – O(1)
+            state = SequenceState.from_point(last)
+            state.push(TicketStatus(after.key.status), after.profit)
+            db.execute(insert(P).values(**_point_values(after.ticket_id, after.created_at, state)))
+            return
+
+    # Změna uprostřed historie – přepočet od nejdřívější dotčené pozice
+    positions = [e for e in (before, after) if _in_sequence(e)]
+    first = min(positions, key=lambda e: _sort_key(e.created_at, e.ticket_id))
+    recompute_from(db, first.created_at, first.ticket_id)
+
+
+def apply_ticket_changes(db: Session, changes: list) -> None:
+    """Dávka změn [(before, after), …]: jeden přepočet od nejdřívější dotčené pozice."""
+    changes = [(before, after) for before, after in changes if _affects_sequence(before, after)]
+    if len(changes) <= 1:
+        for before, after in changes:
+            apply_ticket_change(db, before, after)
+        return
+    positions = [e for change in changes for e in change if _in_sequence(e)]
+    first = min(positions, key=lambda e: _sort_key(e.created_at, e.ticket_id))
+    recompute_from(db, first.created_at, first.ticket_id)
+
+
+def apply_new_tickets(db: Session, entries: list) -> None:
+    """Promítne dávku nově vložených tiketů; na konci historie jedním executemany INSERT."""
+    new = sorted(
+        (e for e in entries if _in_sequence(e)),
+        key=lambda e: _sort_key(e.created_at, e.ticket_id),
+    )
+    if not new:
+        return
+    last = last_equity_point(db)
+    if last is not None and _sort_key(last.created_at, last.ticket_id) > _sort_key(new[0].created_at, new[0].ticket_id):
+        recompute_from(db, new[0].created_at, new[0].ticket_id)
+        return
+    state = SequenceState.from_point(last)
+    points = []
+    for entry in new:
+        state.push(TicketStatus(entry.key.status), entry.profit)
+        points.append(_point_values(entry.ticket_id, entry.created_at, state))
+    db.execute(insert(P), points)
@@ -1,23 +1,31 @@
 """
 Live skóre pro fotbal přes football-data.org API (jen fotbal).
-Bez Playwrightu, jeden HTTP request pro fotbalové tikety.
+Bez Playwrightu: feed /matches?status=LIVE se stáhne jednou za football_data_live_interval_seconds
+(free tarif má limit požadavků za minutu, po 429 se čeká na reset) a drží v paměti procesu
+i s indexem slov názvů týmů – všechny otevřené fotbalové tikety se párují proti němu,
+ne každý tiket vlastním stažením celého feedu a průchodem všech zápasů.
 """
 import logging
 import re
+import threading
+import time
 import unicodedata
-from typing import Optional
+from typing import NamedTuple, Optional
 
-import httpx
+from app import http_clients
+from app.config import get_settings
 
 logger = logging.getLogger(__name__)
 
 FOOTBALL_DATA_API_BASE = "https://api.football-data.org/v4"
 
+# Při výpadku API se použije poslední feed, nejdéle tolik intervalů stahování
+_MAX_FEED_AGE = 5
+
 
 def _get_api_key() -> str:
     """API klíč z env FOOTBALL_DATA_ORG_API_KEY nebo z app config."""
     try:
-        from app.config import get_settings
         return (get_settings().football_data_org_api_key or "").strip()
     except Exception:
         pass
@@ -67,61 +75,188 @@ def _teams_match(api_home: str, api_away: str, our_home: str, our_away: str) ->
     return True
 
 
-def fetch_live_score_football_api(home_team: str, away_team: str) -> Optional[dict]:
+class LiveMatch(NamedTuple):
+    home_team: str
+    away_team: str
+    score: dict
+
+
+def _parse_match(m: dict) -> Optional[LiveMatch]:
+    """Zápas z API → LiveMatch se skóre ve tvaru výsledku fetch_live_score_football_api."""
+    if not isinstance(m, dict):
+        return None
+    ht = (m.get("homeTeam") or {}).get("name") or ""
+    at = (m.get("awayTeam") or {}).get("name") or ""
+    score = m.get("score") or {}
+    ft = score.get("fullTime") or score.get("regularTime") or {}
+    sh = ft.get("home")
+    sa = ft.get("away")
+    if sh is None and sa is None:
+        sh = score.get("home")
+        sa = score.get("away")
+    minute = m.get("minute")
+    if isinstance(minute, (int, float)):
+        minute = int(minute)
+    parts = []
+    if minute is not None:
+        parts.append(f"{int(minute)}'")
+    if sh is not None and sa is not None:
+        parts.append(f"{int(sh)}:{int(sa)}")
+    return LiveMatch(
+        home_team=ht,
+        away_team=at,
+        score={
+            "minute": int(minute) if minute is not None else None,
+            "score_home": int(sh) if sh is not None else None,
+            "score_away": int(sa) if sa is not None else None,
+            "source": "football-data.org",
+            "scraped_text": " · ".join(parts) if parts else None,
+        },
+    )
+
+
+class LiveFeed:
     """
-    Pro fotbal: načte live zápasy z football-data.org a vrátí skóre pro shodující se zápas.
-    Vrací dict: { minute, score_home, score_away, source, scraped_text }.
+    Jeden stažený feed /matches?status=LIVE: zápasy v pořadí z API a index slov názvů týmů
+    (_team_tokens) → pozice zápasů, zvlášť pro domácí a hosty.
     """
-    api_key = _get_api_key()
-    if not api_key:
+
+    def __init__(self, matches: list, fetched_at: float):
+        self.matches = matches
+        self.fetched_at = fetched_at
+        self._home_index: dict = {}
+        self._away_index: dict = {}
+        for i, match in enumerate(matches):
+            for token in set(_normalize(match.home_team).split()):
+                self._home_index.setdefault(token, set()).add(i)
+            for token in set(_normalize(match.away_team).split()):
+                self._away_index.setdefault(token, set()).add(i)
+        # (strana, token našeho názvu) → pozice zápasů; tikety se opakují, feed se nemění
+        self._candidates_memo: dict = {}
+
+    def _candidates(self, side: str, token: str) -> set:
+        """Zápasy, jejichž název na dané straně obsahuje token (jako `t in api` v _teams_match)."""
+        key = (side, token)
+        found = self._candidates_memo.get(key)
+        if found is None:
+            index = self._home_index if side == "home" else self._away_index
+            found = set(index.get(token, ()))
+            # Token může být i částí slova ("man" v "manchester") – slov ve feedu jsou jednotky stovek
+            for word, positions in index.items():
+                if token in word and word != token:
+                    found |= positions
+            self._candidates_memo[key] = found
+        return found
+
+    def find(self, home_team: str, away_team: str) -> Optional[dict]:
+        """Skóre prvního zápasu, který sedí na týmy (_teams_match), nebo None."""
+        candidates = None
+        for side, name in (("home", home_team), ("away", away_team)):
+            for token in _team_tokens(name):
+                positions = self._candidates(side, token)
+                candidates = positions if candidates is None else candidates & positions
+                if not candidates:
+                    return None
+        # Název bez použitelných slov (např. jen "FC") – ověří se všechny zápasy
+        order = sorted(candidates) if candidates is not None else range(len(self.matches))
+        for i in order:
+            match = self.matches[i]
+            if _teams_match(match.home_team, match.away_team, home_team, away_team):
+                return dict(match.score)
         return None
-    url = f"{FOOTBALL_DATA_API_BASE}/matches?status=LIVE"
+
+
+_lock = threading.Lock()
+_feed: Optional[LiveFeed] = None
+# time.monotonic(), do kdy se API nevolá (interval, nebo reset po 429)
+_next_fetch_at = 0.0
+
+
+def _fetch_feed(api_key: str, now: float) -> Optional[LiveFeed]:
+    """Stáhne feed; při chybě None. Nastaví _next_fetch_at podle intervalu / limitu API."""
+    global _next_fetch_at
+    interval = max(get_settings().football_data_live_interval_seconds, 1)
+    _next_fetch_at = now + interval
     try:
-        with httpx.Client(timeout=8.0) as client:
-            r = client.get(
-                url,
-                headers={"X-Auth-Token": api_key, "Accept": "application/json"},
-            )
-        if r.status_code != 200:
-            logger.debug("football-data.org API %s: %s", r.status_code, r.text[:200])
-            return None
-        data = r.json()
-        matches = data.get("matches") if isinstance(data, dict) else []
-        if not isinstance(matches, list):
-            return None
-        for m in matches:
-            ht = (m.get("homeTeam") or {}).get("name") or ""
-            at = (m.get("awayTeam") or {}).get("name") or ""
-            if not _teams_match(ht, at, home_team, away_team):
-                continue
-            score = m.get("score") or {}
-            ft = score.get("fullTime") or score.get("regularTime") or {}
-            sh = ft.get("home")
-            sa = ft.get("away")
-            if sh is None and sa is None:
-                sh = score.get("home")
-                sa = score.get("away")
-            minute = m.get("minute")
-            if minute is None and "minute" in m:
-                minute = m["minute"]
-            if isinstance(minute, (int, float)):
-                minute = int(minute)
-            parts = []
-            if minute is not None:
-                parts.append(f"{int(minute)}'")
-            if sh is not None and sa is not None:
-                parts.append(f"{int(sh)}:{int(sa)}")
-            return {
-                "minute": int(minute) if minute is not None else None,
-                "score_home": int(sh) if sh is not None else None,
-                "score_away": int(sa) if sa is not None else None,
-                "source": "football-data.org",
-                "scraped_text": " · ".join(parts) if parts else None,
-            }
-        return None
+        r = http_clients.football_data().get(
+            f"{FOOTBALL_DATA_API_BASE}/matches?status=LIVE",
+            headers={"X-Auth-Token": api_key, "Accept": "application/json"},
+            timeout=8.0,
+        )
     except Exception as e:
         logger.debug("football-data.org fetch failed: %s", e)
         return None
+    if r.status_code == 429:
+        # Vyčerpaný limit požadavků – API vrací počet sekund do resetu
+        try:
+            reset = int(r.headers.get("X-RequestCounter-Reset") or 0)
+        except ValueError:
+            reset = 0
+        _next_fetch_at = now + max(reset, interval)
+        logger.warning("football-data.org: limit požadavků vyčerpán, další dotaz za %s s", _next_fetch_at - now)
+        return None
+    if r.status_code != 200:
+        logger.debug("football-data.org API %s: %s", r.status_code, r.text[:200])
+        return None
+    try:
+        data = r.json()
+    except ValueError:
+        return None
+    matches = data.get("matches") if isinstance(data, dict) else []
+    if not isinstance(matches, list):
+        return None
+    parsed = [match for match in map(_parse_match, matches) if match is not None]
+    return LiveFeed(parsed, now)
+
+
+def get_live_feed() -> Optional[LiveFeed]:
+    """
+    Aktuální live feed: z API nejvýš jednou za football_data_live_interval_seconds (po 429 až po
+    resetu limitu), mezitím z paměti. Při chybě API zůstává poslední feed, nejdéle _MAX_FEED_AGE
+    intervalů. Bez API klíče None.
+    """
+    global _feed
+    api_key = _get_api_key()
+    if not api_key:
+        return None
+    # Souběžné požadavky (threadpool) čekají na jedno stažení místo vlastního dotazu
+    with _lock:
+        now = time.monotonic()
+        if now >= _next_fetch_at:
+            feed = _fetch_feed(api_key, now)
+            if feed is not None:
+                _feed = feed
+        interval = max(get_settings().football_data_live_interval_seconds, 1)
+        if _feed is not None and now - _feed.fetched_at > _MAX_FEED_AGE * interval:
+            _feed = None
+        return _feed
+
+
+def fetch_live_score_football_api(home_team: str, away_team: str) -> Optional[dict]:
+    """
+    Pro fotbal: najde zápas v live feedu football-data.org (get_live_feed) a vrátí jeho skóre.
+    Vrací dict: { minute, score_home, score_away, source, scraped_text }.
+    """
+    feed = get_live_feed()
+    if feed is None:
+        return None
+    return feed.find(home_team, away_team)
+
+
+def live_scores_for_tickets(tickets: list) -> dict:
+    """
+    Skóre pro více tiketů nad jedním feedem: {ticket.id: skóre} jen pro nalezené zápasy.
+    Tikety potřebují id, home_team, away_team.
+    """
+    feed = get_live_feed()
+    if feed is None:
+        return {}
+    scores = {}
+    for ticket in tickets:
+        score = feed.find(ticket.home_team or "", ticket.away_team or "")
+        if score is not None:
+            scores[ticket.id] = score
+    return scores
 
 
 def is_football_sport(sport_name: Optional[str]) -> bool:
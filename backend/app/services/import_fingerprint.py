@@ -0,0 +1,123 @@
+"""
+Otisk importovaného tiketu (sloupec tickets.import_fingerprint, unikátní index)
+a hash jeho stavu u sázkovky (tickets.import_digest, viz state_digest).
+
+- tiket se stabilním klíčem sázkovky: hash (sázkovka, klíč) – např. "tipsport:…" z ocr_image_path,
+- bez klíče: hash normalizovaného obsahu (sázkovka, týmy, vklad, kurz, čas zápasu/podání na minuty).
+
+Otisk mají jen tikety z importů (rodiče, ne nohy AKU). Unikátní index z dedupe dělá záruku
+databáze: BulkTicketWriter zapisuje přes INSERT … ON CONFLICT (import_fingerprint), takže
+ani souběžný import stejný tiket nezaloží dvakrát. Tikety bez otisku (ruční, OCR, starší
+importy bez klíče) dál páruje import_pipeline.DuplicateIndex podle týmů a času.
+"""
+import hashlib
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Iterable, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.models import Ticket
+
+
+def _digest(*parts) -> str:
+    return hashlib.sha256("\x1f".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+
+
+def _amount(value) -> str:
+    """100 / 100.0 / 100.00 → stejný text."""
+    if value is None:
+        return ""
+    return format(Decimal(value).normalize(), "f")
+
+
+def key_fingerprint(bookmaker_id: int, ref: str) -> str:
+    """Otisk podle klíče sázkovky (ref = "<prefix><klíč>" jako v ocr_image_path)."""
+    return _digest("key", bookmaker_id, ref)
+
+
+def content_fingerprint(
+    bookmaker_id: int,
+    home_team: Optional[str],
+    away_team: Optional[str],
+    stake,
+    odds,
+    event_date: Optional[datetime],
+) -> str:
+    """Otisk tiketu bez klíče: týmy bez ohledu na velikost písmen, čas v UTC zaokrouhlený na minuty."""
+    if event_date is not None:
+        if event_date.tzinfo is not None:
+            event_date = event_date.astimezone(timezone.utc).replace(tzinfo=None)
+        event_date = event_date.replace(second=0, microsecond=0).isoformat()
+    return _digest(
+        "content",
+        bookmaker_id,
+        (home_team or "").strip().casefold(),
+        (away_team or "").strip().casefold(),
+        _amount(stake),
+        _amount(odds),
+        event_date or "",
+    )
+
+
+def ticket_fingerprint(data) -> str:
+    """Otisk nového tiketu z importu (TicketCreate s bookmaker_id a případně klíčem v ocr_image_path)."""
+    if data.ocr_image_path:
+        return key_fingerprint(data.bookmaker_id, data.ocr_image_path)
+    return content_fingerprint(
+        data.bookmaker_id, data.home_team, data.away_team, data.stake, data.odds, data.event_date,
+    )
+
+
+def backfill_key_fingerprints(db: Session, key_prefixes: Iterable[str]) -> int:
+    """
+    Doplní otisk existujícím tiketům s klíčem sázkovky (ocr_image_path s daným prefixem).
+    Starší duplicity se stejným klíčem otisk nedostanou – má ho jen tiket s nejnižším id.
+    Vrací počet doplněných tiketů.
+    """
+    prefixes = tuple(key_prefixes)
+    rows = db.execute(
+        select(Ticket.id, Ticket.bookmaker_id, Ticket.ocr_image_path)
+        .where(
+            Ticket.bookmaker_id.isnot(None),
+            Ticket.parent_id.is_(None),
+            Ticket.import_fingerprint.is_(None),
+            Ticket.ocr_image_path.isnot(None),
+        )
+        .order_by(Ticket.id)
+    )
+    seen: set = set()
+    values = []
+    for ticket_id, bookmaker_id, ref in rows:
+        if not ref.startswith(prefixes):
+            continue
+        fingerprint = key_fingerprint(bookmaker_id, ref)
+        if fingerprint not in seen:
+            seen.add(fingerprint)
+            values.append({"id": ticket_id, "import_fingerprint": fingerprint})
+    if values:
+        # ORM bulk UPDATE podle primárního klíče (executemany)
+        db.execute(update(Ticket), values)
+    return len(values)
+
+
+def _state_value(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, Decimal):
+        return _amount(value)
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value.isoformat()
+    return str(getattr(value, "value", value))
+
+
+def state_digest(data, fields: Iterable[str]) -> str:
+    """
+    Hash stavu tiketu u sázkovky (hodnoty synchronizovaných sloupců z TicketCreate a klíč).
+    Uloží se do tickets.import_digest; stejný stav při dalším importu = není co zapisovat.
+    """
+    names = sorted(set(fields) | {"ocr_image_path"})
+    return _digest("state", *(f"{name}={_state_value(getattr(data, name))}" for name in names))
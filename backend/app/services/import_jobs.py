@@ -0,0 +1,143 @@
+"""
+Importy ze scraperu na pozadí: endpoint /scrape/jobs jen založí ImportJob a hned vrátí
+jeho id, import_pipeline.run_import běží v BackgroundTasks (threadpool) s vlastní Session
+jako _run_strategy_analysis_job. Průběh (processed/total, průběžné počty) a po dokončení
+výsledky po tiketech čte extension pollingem GET /api/import/jobs/{id}.
+
+Importy jednoho procesu běží jeden po druhém (_run_lock – joby i synchronní /scrape přes
+run_import) – dva souběžné importy by si navzájem nenašly duplicity. Job přerušený restartem
+procesu označí při startu fail_interrupted_jobs jako "error". Uchovává se jen posledních
+_KEEP_JOBS dokončených jobů.
+"""
+import logging
+import threading
+from datetime import datetime
+
+from fastapi import BackgroundTasks
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models import ImportJob
+from app.services import import_pipeline
+from app.services.import_pipeline import BookmakerPlugin
+
+logger = logging.getLogger(__name__)
+
+_KEEP_JOBS = 20
+
+_INTERRUPTED_MESSAGE = "Import přerušen restartem serveru – spusťte ho znovu."
+
+_run_lock = threading.Lock()
+
+
+def start_import_job(
+    db: Session,
+    background_tasks: BackgroundTasks,
+    plugin: BookmakerPlugin,
+    items: list,
+    overlay_sync: bool = False,
+) -> ImportJob:
+    """Založí job se stavem "pending" a naplánuje import na pozadí."""
+    job = ImportJob(bookmaker=plugin.bookmaker_name, status="pending", total=len(items), processed=0)
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    _prune_old_jobs(db)
+
+    background_tasks.add_task(_run_import_job, job.id, plugin, items, overlay_sync)
+    return job
+
+
+def _prune_old_jobs(db: Session) -> None:
+    """Smaže dokončené joby nad posledních _KEEP_JOBS (běžící nechá)."""
+    old_jobs = (
+        db.query(ImportJob)
+        .filter(ImportJob.status.in_(("done", "error")))
+        .order_by(ImportJob.id.desc())
+        .offset(_KEEP_JOBS)
+        .all()
+    )
+    if old_jobs:
+        for job in old_jobs:
+            db.delete(job)
+        db.commit()
+
+
+def run_import(db: Session, plugin: BookmakerPlugin, items: list, overlay_sync: bool = False) -> dict:
+    """import_pipeline.run_import pro synchronní /scrape – čeká na běžící import (job i jiný /scrape)."""
+    with _run_lock:
+        return import_pipeline.run_import(db, plugin, items, overlay_sync=overlay_sync)
+
+
+def fail_interrupted_jobs() -> int:
+    """
+    Joby, které zůstaly "pending"/"running" po restartu procesu, označí jako "error" (lifespan –
+    startup). Jejich import na pozadí už neběží, extension by na ně jinak čekala donekonečna
+    a _prune_old_jobs by je nikdy nesmazal. Vrací počet označených jobů.
+    """
+    db = SessionLocal()
+    try:
+        jobs = db.query(ImportJob).filter(ImportJob.status.in_(("pending", "running"))).all()
+        for job in jobs:
+            job.status = "error"
+            job.error_message = _INTERRUPTED_MESSAGE
+            job.finished_at = datetime.utcnow()
+        if jobs:
+            db.commit()
+            logger.warning("Import joby %s přerušeny restartem serveru", [job.id for job in jobs])
+        return len(jobs)
+    finally:
+        db.close()
+
+
+def _fail_job(job_db: Session, job: ImportJob, message: str) -> None:
+    job_db.rollback()
+    job.status = "error"
+    job.error_message = message
+    job.finished_at = datetime.utcnow()
+    job_db.commit()
+
+
+def _run_import_job(job_id: int, plugin: BookmakerPlugin, items: list, overlay_sync: bool) -> None:
+    """Background job: import_pipeline.run_import s průběhem ukládaným do ImportJob."""
+    # Stav jobu má vlastní Session – import commituje po dávkách nezávisle na něm
+    job_db = SessionLocal()
+    db = SessionLocal()
+    job = None
+    try:
+        job = job_db.get(ImportJob, job_id)
+        if job is None:
+            return
+
+        with _run_lock:
+            job.status = "running"
+            job_db.commit()
+
+            def progress(processed: int, counts: dict) -> None:
+                job.processed = processed
+                job.counts = counts
+                job_db.commit()
+
+            response = import_pipeline.run_import(
+                db, plugin, items, overlay_sync=overlay_sync, progress=progress,
+            )
+            results = response.pop("results")
+            job.counts = response
+            job.results = [r.model_dump() for r in results]
+            job.processed = job.total
+            job.status = "done"
+            job.error_message = None
+            job.finished_at = datetime.utcnow()
+            job_db.commit()
+    except Exception as exc:  # pylint: disable=broad-except
+        # Job nesmí zůstat "running" – ať selže import, průběh nebo uložení výsledků
+        logger.exception("Import job %s (%s) selhal", job_id, plugin.bookmaker_name)
+        db.rollback()
+        if job is not None:
+            try:
+                _fail_job(job_db, job, str(exc))
+            except Exception:  # pylint: disable=broad-except
+                logger.exception("Import job %s: nelze uložit stav error", job_id)
+    finally:
+        db.close()
+        job_db.close()
@@ -0,0 +1,687 @@
+"""
+Společný průběh importu tiketů ze sázkovek (Tipsport, Betano, Fortuna).
+
+Sázkovka dodává jen plugin (BookmakerPlugin): parse() převede syrový tiket ze
+scraperu na ParsedTicket a atributy pluginu říkají, jak párovat duplicity a co
+na nich synchronizovat. Zbytek běží společně po fázích nad celým payloadem:
+
+1. parse + normalizace textů (plugin.parse),
+2. číselníky – sázkovka a sport z lookup_cache, sestavení TicketCreate,
+3. dedupe – otisk tiketu (import_fingerprint), kandidáti z DB jedním dotazem
+   (DuplicateIndex), AKU přes aku_leg_index,
+4. diff – duplicita se stejným stavem u sázkovky jako při posledním importu
+   (import_digest) se přeskočí, jinak změněné sloupce (sync_payload),
+5. zápis – nové tikety hromadně přes INSERT … ON CONFLICT (BulkTicketWriter),
+   změny duplicit hromadným UPDATE (DuplicateSync).
+"""
+import dataclasses
+from abc import ABC, abstractmethod
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Any, Callable, List, NamedTuple, Optional
+
+from sqlalchemy import or_, tuple_, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.models import Ticket, TicketStatus
+from app.preview_store import create_preview_id, set_preview
+from app.schemas import ScrapePreviewLeg, ScrapePreviewTicket, TicketCreate
+from app.services import aku_leg_index, import_fingerprint, lookup_cache, rollup_service
+from app.services.bulk_import_service import BulkTicketWriter, flush_into_results, updated_amounts
+
+# Okno pro párování podle času zápasu/podání
+_MATCH_WINDOW = timedelta(minutes=10)
+# Po kolika tiketech hlásit průběh importu (import na pozadí, viz import_jobs)
+_PROGRESS_EVERY = 50
+
+
+class ParsedLeg(NamedTuple):
+    """Jedna noha AKU tiketu po normalizaci."""
+    home_team: str
+    away_team: str
+    market_label: Optional[str] = None
+    selection: Optional[str] = None
+    odds: Optional[Decimal] = None
+
+
+@dataclasses.dataclass
+class ParsedTicket:
+    """Tiket ze scraperu převedený pluginem na hodnoty našeho systému (ještě bez id z číselníků)."""
+    home_team: str
+    away_team: str
+    sport_label: Optional[str]
+    market_label: Optional[str]
+    selection: Optional[str]
+    ticket_type: str            # "solo" | "aku"
+    status: TicketStatus
+    stake: Decimal
+    odds: Optional[Decimal]     # None = kurz se nepodařilo přečíst (uloží se 1.0)
+    payout: Optional[Decimal]
+    event_date: Optional[datetime]
+    is_live: bool = False
+    key: Optional[str] = None   # stabilní klíč tiketu u sázkovky
+    ticket_url: Optional[str] = None
+    legs: List[ParsedLeg] = dataclasses.field(default_factory=list)
+
+
+class BookmakerPlugin(ABC):
+    """
+    Část importu specifická pro sázkovku. Podtřída nastaví atributy a implementuje parse().
+    """
+    bookmaker_name: str = ""
+    key_prefix: str = ""        # klíč se ukládá do ocr_image_path jako "<prefix><klíč>" (bez migrace DB)
+    result_model: Any = None    # *ScrapeResultItem pro výsledky importu
+
+    # Dedupe: True = vždy porovnat vklad i kurz (i výchozí 1.0), False = jen spolehlivě přečtené
+    # (vklad > 0, kurz z payloadu), aby chyba v parsování nezpůsobila duplicitní tiket
+    strict_amounts: bool = True
+    # Když nic nesedí v časovém okně, zkusit stejné týmy/vklad/kurz bez data (staré tikety z OCR)
+    match_without_date: bool = True
+
+    # Synchronizace existujícího tiketu: které sloupce přepsat hodnotou ze sázkovky
+    sync_fields: frozenset = frozenset({"status", "payout", "odds", "event_date"})
+    # event_date se přepíše, jen když se liší víc než o tuto dobu
+    event_date_tolerance: timedelta = timedelta(0)
+    # Náhled (/scrape/preview) tiše synchronizuje nalezené duplicity
+    sync_duplicates_in_preview: bool = False
+
+    @abstractmethod
+    def parse(self, item) -> ParsedTicket:
+        """Syrový tiket z extension → ParsedTicket."""
+
+    def preview_fields(self, parsed: ParsedTicket) -> dict:
+        """Doplňková pole ScrapePreviewTicket specifická pro sázkovku."""
+        return {}
+
+    def ref(self, key: Optional[str]) -> Optional[str]:
+        key = (key or "").strip()
+        return f"{self.key_prefix}{key}" if key else None
+
+
+# ─── Číselníky a TicketCreate ─────────────────────────────
+
+def _ticket_create(db: Session, plugin: BookmakerPlugin, bookmaker_id: int, parsed: ParsedTicket) -> TicketCreate:
+    return TicketCreate(
+        bookmaker_id=bookmaker_id,
+        sport_id=lookup_cache.sport_id_for_label(db, parsed.sport_label),
+        league_id=None,
+        market_type_id=None,
+        parent_id=None,
+        home_team=parsed.home_team,
+        away_team=parsed.away_team,
+        event_date=parsed.event_date,
+        market_label=parsed.market_label,
+        selection=parsed.selection,
+        odds=parsed.odds if parsed.odds is not None else Decimal("1.0"),
+        stake=parsed.stake,
+        payout=parsed.payout,
+        profit=None,
+        status=parsed.status.value,
+        ticket_type=parsed.ticket_type,
+        is_live=bool(parsed.is_live),
+        source="manual",
+        ocr_image_path=plugin.ref(parsed.key),
+        bookmaker_ticket_url=parsed.ticket_url,
+    )
+
+
+def _leg_ticket_creates(data: TicketCreate, parsed: ParsedTicket) -> List[TicketCreate]:
+    """Nohy AKU jako dětské tikety (sport, stav a datum po rodiči; parent_id doplní zápis dávky)."""
+    if data.ticket_type != "aku":
+        return []
+    return [
+        TicketCreate(
+            bookmaker_id=data.bookmaker_id,
+            sport_id=data.sport_id,
+            league_id=None,
+            market_type_id=None,
+            parent_id=None,
+            home_team=leg.home_team,
+            away_team=leg.away_team,
+            event_date=data.event_date,
+            market_label=leg.market_label,
+            selection=leg.selection,
+            odds=leg.odds if leg.odds is not None else Decimal("1.0"),
+            stake=Decimal("0"),
+            payout=None,
+            profit=None,
+            status=data.status,
+            ticket_type="solo",
+            is_live=False,
+            source="manual",
+        )
+        for leg in parsed.legs
+    ]
+
+
+class _Prepared(NamedTuple):
+    parsed: ParsedTicket
+    data: TicketCreate
+    fingerprint: str
+    digest: str  # stav u sázkovky (import_fingerprint.state_digest)
+
+
+def _prepare(db: Session, plugin: BookmakerPlugin, bookmaker_id: int, items: list) -> list:
+    """Fáze 1–2 pro celý payload; chyba mapování zůstane u svého tiketu (jako výjimka)."""
+    prepared: list = []
+    for item in items:
+        try:
+            parsed = plugin.parse(item)
+            data = _ticket_create(db, plugin, bookmaker_id, parsed)
+            prepared.append(_Prepared(
+                parsed,
+                data,
+                import_fingerprint.ticket_fingerprint(data),
+                import_fingerprint.state_digest(data, plugin.sync_fields),
+            ))
+        except (SQLAlchemyError, ValueError) as exc:
+            prepared.append(exc)
+    return prepared
+
+
+# ─── Dedupe ───────────────────────────────────────────────
+
+class Existing(NamedTuple):
+    """Sloupce existujícího tiketu potřebné pro dedupe a synchronizaci (bez ORM objektu)."""
+    id: int
+    ocr_image_path: Optional[str]
+    home_team: Optional[str]
+    away_team: Optional[str]
+    stake: Optional[Decimal]
+    odds: Optional[Decimal]
+    event_date: Optional[datetime]
+    status: TicketStatus
+    sport_id: Optional[int]
+    payout: Optional[Decimal]
+    is_live: Optional[bool]
+    bookmaker_ticket_url: Optional[str]
+    import_fingerprint: Optional[str]
+    import_digest: Optional[str]
+    # zbytek sloupců pro příspěvek do rollupu (rollup_service.ENTRY_COLUMNS)
+    profit: Optional[Decimal]
+    created_at: Optional[datetime]
+    bookmaker_id: Optional[int]
+    league_id: Optional[int]
+    market_type_id: Optional[int]
+    ticket_type: Any
+    parent_id: Optional[int]
+
+
+_EXISTING_COLUMNS = [getattr(Ticket, name) for name in Existing._fields]
+
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Datum z payloadu může mít časovou zónu, v DB je bez ní (UTC)."""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class DuplicateIndex:
+    """
+    Dedupe celého importu v paměti: existující tikety sázkovky, které by mohly být
+    duplicitou některého tiketu z payloadu (stejný otisk nebo stejné týmy), se načtou
+    jedním dotazem. AKU podle noh hledá indexovaně aku_leg_index.
+    Tikety vytvořené/aktualizované během importu se přidávají přes remember*(),
+    takže se najdou i duplicity uvnitř jednoho payloadu.
+
+    Snapshoty (Existing) místo ORM objektů: commit po každém tiketu by ORM objekty
+    expiroval a každé další čtení atributu by byl nový SELECT.
+    """
+
+    def __init__(self, db: Session, plugin: BookmakerPlugin, bookmaker_id: int, prepared: list):
+        self.db = db
+        self.plugin = plugin
+        self.bookmaker_id = bookmaker_id
+        self._tickets: dict[int, Existing] = {}
+        self._by_fingerprint: dict[str, int] = {}
+        self._by_teams: dict[tuple, dict[int, None]] = {}  # (domácí, hosté) -> id v pořadí (jako uspořádaná množina)
+
+        ok = [p for p in prepared if isinstance(p, _Prepared)]
+        fingerprints = {p.fingerprint for p in ok}
+        teams = {(p.data.home_team, p.data.away_team) for p in ok}
+        conds = []
+        if fingerprints:
+            conds.append(Ticket.import_fingerprint.in_(fingerprints))
+        if teams:
+            conds.append(tuple_(Ticket.home_team, Ticket.away_team).in_(teams))
+        if conds:
+            rows = (
+                db.query(*_EXISTING_COLUMNS)
+                .filter(Ticket.bookmaker_id == bookmaker_id, or_(*conds))
+                .order_by(Ticket.id)
+                .all()
+            )
+            for row in rows:
+                self._index(Existing(*row))
+
+    def _index(self, ticket: Existing) -> None:
+        # Starší snapshot stejného tiketu se přepíše; zastaralé klíče ověří find() proti aktuálním hodnotám
+        self._tickets[ticket.id] = ticket
+        if ticket.import_fingerprint:
+            self._by_fingerprint[ticket.import_fingerprint] = ticket.id
+        self._by_teams.setdefault((ticket.home_team, ticket.away_team), {})[ticket.id] = None
+
+    def remember_values(self, values: dict) -> None:
+        """Zapamatuje tiket zapsaný hromadně (hodnoty sloupců z BulkTicketWriter / DuplicateSync)."""
+        self._index(Existing(**{name: values.get(name) for name in Existing._fields}))
+
+    def reload(self, ticket_ids: List[int]) -> None:
+        """Znovu načte snapshoty z DB (po vrácené dávce změn)."""
+        if ticket_ids:
+            for row in self.db.query(*_EXISTING_COLUMNS).filter(Ticket.id.in_(ticket_ids)):
+                self._index(Existing(*row))
+
+    def get(self, ticket_id: int) -> Existing:
+        """Snapshot tiketu podle id (z indexu, jinak z DB)."""
+        if ticket_id not in self._tickets:
+            row = self.db.query(*_EXISTING_COLUMNS).filter(Ticket.id == ticket_id).one()
+            self._index(Existing(*row))
+        return self._tickets[ticket_id]
+
+    def fingerprint_owner(self, fingerprint: str) -> Optional[int]:
+        """ID tiketu, který má daný otisk (podle načtených a zapamatovaných tiketů)."""
+        ticket = self._tickets.get(self._by_fingerprint.get(fingerprint))
+        return ticket.id if ticket is not None and ticket.import_fingerprint == fingerprint else None
+
+    def free_fingerprint(self, prepared: _Prepared, duplicate: Existing) -> Optional[str]:
+        """Otisk pro synchronizovaný tiket; None, pokud ho už má jiný tiket (unikátní index)."""
+        owner = self.fingerprint_owner(prepared.fingerprint)
+        return prepared.fingerprint if owner in (None, duplicate.id) else None
+
+    def _amounts(self, prepared: _Prepared) -> tuple:
+        """(vklad, kurz) pro párování; None = nepárovat podle této hodnoty."""
+        data = prepared.data
+        if self.plugin.strict_amounts:
+            return data.stake, data.odds
+        # Když vklad/kurz nejsou spolehlivě rozpoznané (stake=0 nebo odds jen fallback 1.0),
+        # raději je vynecháme, aby import nikdy nevynechal tiket jen kvůli chybě v parsování.
+        stake = data.stake if prepared.parsed.stake and data.stake > 0 else None
+        odds = data.odds if prepared.parsed.odds is not None else None
+        return stake, odds
+
+    def could_match(self, prepared: _Prepared, pending: TicketCreate) -> bool:
+        """
+        Mohl by find() vrátit tiket se stejnými týmy a hodnotami pending (tiket čekající na zápis
+        v BulkTicketWriter)? Stejná pravidla jako find() pro jednoho kandidáta.
+        """
+        stake, odds = self._amounts(prepared)
+        if (stake is not None and pending.stake != stake) or (odds is not None and pending.odds != odds):
+            return False
+        event_date = _naive_utc(prepared.data.event_date)
+        if event_date and (
+            pending.event_date is None or abs(_naive_utc(pending.event_date) - event_date) > _MATCH_WINDOW
+        ):
+            return self.plugin.match_without_date
+        return True
+
+    def find(self, prepared: _Prepared) -> Optional[Existing]:
+        """
+        Najde existující tiket – primárně podle otisku (klíč sázkovky, jinak obsah tiketu),
+        sekundárně podle kombinace týmy + stake + odds (+ časové okno) pro tikety bez otisku
+        (ruční, OCR, starší importy) a změněný klíč nebo čas zápasu.
+        """
+        data = prepared.data
+        owner = self.fingerprint_owner(prepared.fingerprint)
+        if owner is not None:
+            return self._tickets[owner]
+
+        stake, odds = self._amounts(prepared)
+        teams = (data.home_team, data.away_team)
+        candidates = [
+            ticket
+            for ticket in (self._tickets[i] for i in self._by_teams.get(teams, ()))
+            if (ticket.home_team, ticket.away_team) == teams
+            and (stake is None or ticket.stake == stake)
+            and (odds is None or ticket.odds == odds)
+        ]
+        event_date = _naive_utc(data.event_date)
+        if event_date:
+            for ticket in candidates:
+                if ticket.event_date is not None and abs(_naive_utc(ticket.event_date) - event_date) <= _MATCH_WINDOW:
+                    return ticket
+            if not self.plugin.match_without_date:
+                return None
+        return candidates[0] if candidates else None
+
+    def find_aku_by_legs(self, legs: List[ParsedLeg]) -> Optional[Existing]:
+        """
+        AKU tiket s nohami: existující AKU rodič, jehož děti mají odpovídající dvojice
+        (domácí, hosté) – přesná shoda množiny noh, jinak rodič, který má všechny předané
+        nohy (z karty tiketu známe třeba jen první zápas). Viz aku_leg_index.find_parent.
+        """
+        if not legs:
+            return None
+        parent_id = aku_leg_index.find_parent(
+            self.db, self.bookmaker_id, [(leg.home_team, leg.away_team) for leg in legs],
+        )
+        if parent_id is None:
+            return None
+        return self.get(parent_id)
+
+    def match(self, prepared: _Prepared) -> Optional[Existing]:
+        duplicate = self.find(prepared)
+        if duplicate is None and prepared.data.ticket_type == "aku":
+            duplicate = self.find_aku_by_legs(prepared.parsed.legs)
+        return duplicate
+
+
+# ─── Diff ─────────────────────────────────────────────────
+
+def sync_payload(plugin: BookmakerPlugin, duplicate: Existing, data: TicketCreate, overlay_sync: bool = False) -> dict:
+    """
+    Sloupce existujícího tiketu, které se liší od aktuálních dat ze sázkovky (sázkovka má vždy pravdu).
+    overlay_sync=True: při syncu pro overlay neměnit status (zachovat open).
+    """
+    fields = plugin.sync_fields
+    payload: dict = {}
+
+    if "status" in fields and not overlay_sync:
+        if str(getattr(duplicate.status, "value", duplicate.status)) != data.status:
+            payload["status"] = data.status
+
+    if "sport_id" in fields and duplicate.sport_id != data.sport_id:
+        payload["sport_id"] = data.sport_id
+
+    if "is_live" in fields and duplicate.is_live != data.is_live:
+        payload["is_live"] = data.is_live
+
+    # payout/odds: opravovat, pokud se liší nebo chybí
+    for name in ("payout", "odds"):
+        new = getattr(data, name)
+        old = getattr(duplicate, name)
+        if name in fields and new is not None and (old is None or Decimal(old) != Decimal(new)):
+            payload[name] = new
+
+    if "event_date" in fields and data.event_date is not None:
+        if (
+            duplicate.event_date is None
+            or abs(_naive_utc(data.event_date) - _naive_utc(duplicate.event_date)) > plugin.event_date_tolerance
+        ):
+            payload["event_date"] = data.event_date
+
+    # odkaz na tiket u sázkovky (pro overlay)
+    if "bookmaker_ticket_url" in fields and data.bookmaker_ticket_url:
+        if duplicate.bookmaker_ticket_url != data.bookmaker_ticket_url:
+            payload["bookmaker_ticket_url"] = data.bookmaker_ticket_url
+
+    # uložit klíč sázkovky pro budoucí stabilní dedupe
+    if data.ocr_image_path and duplicate.ocr_image_path != data.ocr_image_path:
+        payload["ocr_image_path"] = data.ocr_image_path
+
+    return payload
+
+
+class DuplicateSync:
+    """
+    Synchronizace nalezených duplicit se sázkovkou po dávkách. Duplicita, jejíž stav
+    u sázkovky je stejný jako při posledním importu (import_digest), se přeskočí úplně –
+    opakovaný sync celé historie tak nic nezapisuje. Změněné se zapíšou jedním hromadným
+    UPDATE podle id: payout/profit jako update_ticket, rollup a equity dávkově.
+    """
+
+    def __init__(self, duplicates: DuplicateIndex, overlay_sync: bool = False, batch_size: int = 500):
+        self.db = duplicates.db
+        self.plugin = duplicates.plugin
+        self.duplicates = duplicates
+        self.overlay_sync = overlay_sync
+        self.batch_size = batch_size
+        # (id, hodnoty k zápisu, příspěvek do rollupu před/po, výsledek importu)
+        self.pending: list = []
+
+    @property
+    def full(self) -> bool:
+        return len(self.pending) >= self.batch_size
+
+    def add(
+        self,
+        duplicate: Existing,
+        data: TicketCreate,
+        digest: str,
+        fingerprint: Optional[str] = None,
+        result: Any = None,
+    ) -> bool:
+        """
+        Zařadí změny duplicity k zápisu. Vrací True, pokud se mění data tiketu;
+        False = beze změny (zapíše se nanejvýš digest a otisk).
+        fingerprint: otisk z aktuálních dat – uloží se, aby příště tiket našla přesná shoda.
+        """
+        if duplicate.import_digest == digest:
+            return False
+        changes = sync_payload(self.plugin, duplicate, data, overlay_sync=self.overlay_sync)
+        values: dict = {}
+        # overlay_sync nemění status – digest jen pokud tiket odpovídá sázkovce celý
+        if not self.overlay_sync or "status" not in sync_payload(self.plugin, duplicate, data):
+            values["import_digest"] = digest
+        if fingerprint and duplicate.import_fingerprint != fingerprint:
+            values["import_fingerprint"] = fingerprint
+        before = after = None
+        if changes:
+            # pořadí a označení z importu
+            values.update(changes)
+            if data.import_batch_id is not None:
+                values["import_batch_id"] = data.import_batch_id
+            if data.import_batch_index is not None:
+                values["import_batch_index"] = data.import_batch_index
+            values["is_newly_imported"] = True
+            state = {**duplicate._asdict(), **values}
+            values["payout"], values["profit"] = updated_amounts(
+                state["status"], state["stake"], state["odds"], state["payout"], state["profit"],
+            )
+            before = rollup_service.entry_from_values(duplicate._asdict())
+            after = rollup_service.entry_from_values({**duplicate._asdict(), **values})
+        if not values:
+            return False
+        self.pending.append((duplicate.id, values, before, after, result))
+        self.duplicates.remember_values({**duplicate._asdict(), **values})
+        return bool(changes)
+
+    def flush(self, commit: bool = True) -> None:
+        """Zapíše dávku; při chybě DB ji vrátí a výsledky importu přepíše na error."""
+        batch, self.pending = self.pending, []
+        if not batch:
+            return
+        try:
+            # ORM bulk UPDATE podle primárního klíče (executemany)
+            self.db.execute(update(Ticket), [{"id": ticket_id, **values} for ticket_id, values, *_ in batch])
+            rollup_service.apply_ticket_changes(
+                self.db, [(before, after) for _, _, before, after, _ in batch if before is not None],
+            )
+            if commit:
+                self.db.commit()
+        except SQLAlchemyError as exc:
+            self.db.rollback()
+            for *_, result in batch:
+                if result is not None:
+                    result.status = "error"
+                    result.message = str(exc)
+            self.duplicates.reload([ticket_id for ticket_id, *_ in batch])
+
+
+# ─── Náhled a import ──────────────────────────────────────
+
+def _preview_ticket(db: Session, plugin: BookmakerPlugin, prepared: _Prepared) -> ScrapePreviewTicket:
+    data, parsed = prepared.data, prepared.parsed
+    legs = [
+        ScrapePreviewLeg(
+            home_team=leg.home_team,
+            away_team=leg.away_team,
+            market_label=leg.market_label,
+            selection=leg.selection,
+            odds=leg.odds if leg.odds is not None else Decimal("1.0"),
+        )
+        for leg in parsed.legs
+    ]
+    return ScrapePreviewTicket(
+        home_team=data.home_team,
+        away_team=data.away_team,
+        sport_id=data.sport_id,
+        sport_name=lookup_cache.get(db).sport_names.get(data.sport_id) or "Neznámý",
+        market_label=data.market_label,
+        selection=data.selection,
+        odds=data.odds,
+        stake=data.stake,
+        payout=data.payout,
+        status=data.status,
+        bookmaker_id=data.bookmaker_id,
+        ticket_type=data.ticket_type,
+        event_date=data.event_date.isoformat() if data.event_date else None,
+        is_live=data.is_live,
+        legs=legs or None,
+        **plugin.preview_fields(parsed),
+    )
+
+
+def run_preview(db: Session, plugin: BookmakerPlugin, items: list) -> dict:
+    """
+    Náhled importu: namapuje a vyfiltruje duplicity, nové tikety nic neukládá (uloží je
+    preview store pro frontend). Vrací pole pro *ScrapePreviewResponse.
+    """
+    bookmaker_id = lookup_cache.get_or_create_bookmaker_id(db, plugin.bookmaker_name)
+    prepared = _prepare(db, plugin, bookmaker_id, items)
+    duplicates = DuplicateIndex(db, plugin, bookmaker_id, prepared)
+    syncer = DuplicateSync(duplicates) if plugin.sync_duplicates_in_preview else None
+    new_tickets: List[ScrapePreviewTicket] = []
+    skipped_count = 0
+
+    for p in prepared:
+        if isinstance(p, Exception):
+            continue
+        try:
+            duplicate = duplicates.match(p)
+            if duplicate:
+                if syncer is not None:
+                    # Chyba zápisu dávky nesmí shodit náhled importu (DuplicateSync.flush ji vrátí)
+                    syncer.add(duplicate, p.data, p.digest, duplicates.free_fingerprint(p, duplicate))
+                    if syncer.full:
+                        syncer.flush()
+                skipped_count += 1
+                continue
+            new_tickets.append(_preview_ticket(db, plugin, p))
+        except (SQLAlchemyError, ValueError):
+            continue
+    if syncer is not None:
+        syncer.flush()
+
+    preview_id = create_preview_id()
+    set_preview(preview_id, [t.model_dump(mode="json") for t in new_tickets])
+    return {"preview_id": preview_id, "new_tickets": new_tickets, "skipped_count": skipped_count}
+
+
+def _flush(writer: BulkTicketWriter, syncer: DuplicateSync) -> None:
+    """
+    Zapíše čekající nové tikety (a přidá je do indexu duplicit) a změny duplicit. Tiket, který
+    mezitím se stejným otiskem založil jiný import (konflikt při INSERT), se synchronizuje jako duplicita.
+    """
+    duplicates = syncer.duplicates
+    for pending in flush_into_results(writer):
+        if pending.conflict:
+            parent_result, _ = pending.context
+            changed = syncer.add(duplicates.get(pending.id), pending.data, pending.digest, result=parent_result)
+            parent_result.status = "updated" if changed else "skipped"
+            continue
+        duplicates.remember_values(pending.values)
+        for values in pending.child_values:
+            duplicates.remember_values(values)
+    syncer.flush()
+
+
+def _with_legs(results: list, leg_results_of: dict) -> list:
+    """Nohy AKU hned za svým rodičem (u nezapsané dávky se nevypisují)."""
+    return [r for parent in results for r in (parent, *leg_results_of.get(id(parent), ()))]
+
+
+def _counts(results: list) -> dict:
+    counts = Counter(r.status for r in results)
+    return {
+        "created": counts["created"],
+        "updated": counts["updated"],
+        "skipped": counts["skipped"],
+        "errors": counts["error"],
+    }
+
+
+def run_import(
+    db: Session,
+    plugin: BookmakerPlugin,
+    items: list,
+    overlay_sync: bool = False,
+    progress: Optional[Callable[[int, dict], None]] = None,
+) -> dict:
+    """
+    Import tiketů: duplicity se synchronizují se sázkovkou (beze změny = "skipped"), nové tikety
+    (a nohy AKU) se zapíšou hromadně. overlay_sync=True: při update neměnit status.
+    Vrací pole pro *ScrapeResponse.
+    progress(zpracováno, počty) se volá každých _PROGRESS_EVERY tiketů a na konci.
+    """
+    result_model = plugin.result_model
+    bookmaker_id = lookup_cache.get_or_create_bookmaker_id(db, plugin.bookmaker_name)
+    import_batch_id = datetime.utcnow().strftime("%Y%m%d%H%M%S")
+    prepared = _prepare(db, plugin, bookmaker_id, items)
+    duplicates = DuplicateIndex(db, plugin, bookmaker_id, prepared)
+
+    # Nové tikety se zapisují hromadně po dávkách (bulk_import_service), ticket_id výsledků doplní zápis
+    writer = BulkTicketWriter(db)
+    syncer = DuplicateSync(duplicates, overlay_sync=overlay_sync)
+
+    results: list = []
+    leg_results_of: dict[int, list] = {}
+
+    for idx, p in enumerate(prepared):
+        try:
+            if isinstance(p, Exception):
+                raise p
+            data = p.data.model_copy(update={
+                "import_batch_id": import_batch_id,
+                "import_batch_index": idx,
+                "is_newly_imported": True,
+            })
+            p = p._replace(data=data)
+
+            # Duplicita může být i mezi tikety, které ještě čekají na zápis
+            if writer.has_pending(
+                p.fingerprint, data.home_team, data.away_team,
+                matches=lambda pending: duplicates.could_match(p, pending),
+            ) or (
+                data.ticket_type == "aku"
+                and writer.has_pending_aku((leg.home_team, leg.away_team) for leg in p.parsed.legs)
+            ):
+                _flush(writer, syncer)
+
+            duplicate = duplicates.match(p)
+            if duplicate:
+                # Upsert: synchronizovat stav se sázkovkou + pořadí a označení z importu; beze změny přeskočit
+                result = result_model(index=idx, status="updated", ticket_id=duplicate.id, message=None)
+                if not syncer.add(duplicate, data, p.digest, duplicates.free_fingerprint(p, duplicate), result=result):
+                    result.status = "skipped"
+                results.append(result)
+                if syncer.full:
+                    syncer.flush()
+                continue
+
+            # AKU s nohami: vytvořit i děti (jednotlivé sázky) pod tímto rodičem
+            children = _leg_ticket_creates(data, p.parsed)
+            result = result_model(index=idx, status="created", ticket_id=None, message=None)
+            leg_results = [
+                result_model(index=idx, status="created", ticket_id=None, message="Noha AKU")
+                for _ in children
+            ]
+            results.append(result)
+            leg_results_of[id(result)] = leg_results
+            writer.add(data, children, context=(result, leg_results), fingerprint=p.fingerprint, digest=p.digest)
+            if writer.full:
+                _flush(writer, syncer)
+        except (SQLAlchemyError, ValueError) as exc:
+            db.rollback()
+            results.append(result_model(index=idx, status="error", ticket_id=None, message=str(exc)))
+        if progress is not None and (idx + 1) % _PROGRESS_EVERY == 0:
+            progress(idx + 1, _counts(_with_legs(results, leg_results_of)))
+    _flush(writer, syncer)
+
+    results = _with_legs(results, leg_results_of)
+    counts = _counts(results)
+    if progress is not None:
+        progress(len(prepared), counts)
+    return {**counts, "results": results}
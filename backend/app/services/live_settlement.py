@@ -0,0 +1,264 @@
+"""
+Vyhodnocení live tiketu pravidly – bez LLM, pro běžné trhy.
+
+POST /api/live/state dostává od extension celý text stránky zápasu (innerText). Z něj se
+vytáhne jednoznačné skóre mezi názvy týmů (případně "Skóre: 3-1"; časy "45:00" se ignorují)
+a příznak konce zápasu (jen výslovné "konec zápasu" apod.); trh se převede
+na kanonický tvar (market_label_to_canonical + normalize_market_label) a pro:
+
+  - výsledek / vítěz zápasu (1, X, 2, 10, 02, 12, název týmu),
+  - počet gólů / bodů (více / méně než X.5),
+  - handicap (tým ±X.5),
+  - oba týmy vstřelí (ano / ne)
+
+se won/lost rozhodne přímo ze skóre. Over/BTTS ano může vyjít (a under/BTTS ne prohrát) už
+během zápasu, ostatní až po konci. Trhy, kterým pravidla nerozumí, a nečitelné skóre vrací
+None – pak rozhoduje LLM (llm.client.evaluate_live_ticket_state). Když se skóre od minulého
+vyhodnocení nezměnilo, použije se minulý výsledek a LLM se znovu nevolá.
+"""
+import re
+from typing import NamedTuple, Optional
+
+from app.utils.market_type_mapping import market_label_to_canonical
+from app.utils.market_type_normalization import _strip_diacritics, normalize_market_label
+
+# Kanonické trhy (normalize_market_label), které umí pravidla
+_RESULT_MARKETS = frozenset({"vysledek", "vitez", "vitezne znameni", "1x2"})
+# Vítěz zápasu počítá i prodloužení / nájezdy, ostatní trhy jen základní hrací dobu
+_OVERTIME_MARKETS = frozenset({"vitez", "vitezne znameni"})
+_TOTAL_MARKETS = frozenset({"pocet golu", "pocet bodu", "pocet branek"})
+_HANDICAP_MARKETS = frozenset({"handicap"})
+_BTTS_MARKETS = frozenset({"oba tymy vstreli"})
+
+# Skóre: "2:1", "2 - 1", "2–1" (na stránce mezi názvy týmů); data a časy vyřadí _is_clock
+_SCORE_RE = re.compile(r"(?<![\d.:\-–])(\d{1,3})\s*([:\-–])\s*(\d{1,3})(?![\d.:\-–])")
+_LABELED_SCORE_RE = re.compile(r"\b(?:skore|stav|vysledek)\s*:?\s*(\d{1,3})\s*([:\-–])\s*(\d{1,3})\b")
+# Skóre po částech v závorce: "2:1 (1:0, 1:1)"
+_PERIODS_RE = re.compile(r"\(([^()]*)\)")
+# Konec zápasu – jen výslovné fráze; "konec 1. poločasu" ani "sázení ukončeno" konec zápasu nejsou
+_ENDED_RE = re.compile(r"\b(?:konec zapasu|zapas skoncil|zapas ukoncen|konecny (?:stav|vysledek)|full time)\b")
+_OVERTIME_RE = re.compile(r"prodlouzeni|najezd|overtime|\bpp\b|\bsn\b")
+# Jak daleko od názvu domácích hledat skóre a za ním stav zápasu (znaky)
+_SCORE_WINDOW = 80
+_STATE_WINDOW = 300
+
+_TOTAL_SELECTION_RE = re.compile(r"^(vice nez|mene nez|over|under|nad|pod)\s+(\d+(?:\.\d+)?)$")
+_HANDICAP_SELECTION_RE = re.compile(r"^(.*?)\s*([+-]\s*\d+(?:[.,]\d+)?)\s*$")
+
+
+def _is_clock(match: re.Match) -> bool:
+    """Čas místo skóre: "45:00", "05:30" (číslo s nulou na začátku) nebo "mm:ss" ("12:34")."""
+    home, separator, away = match.group(1), match.group(2), match.group(3)
+    if (len(home) > 1 and home[0] == "0") or (len(away) > 1 and away[0] == "0"):
+        return True
+    return separator == ":" and len(home) >= 2 and len(away) == 2
+
+
+def _scores(pattern: re.Pattern, text: str, pos: int = 0, endpos: Optional[int] = None) -> list:
+    """Výskyty skóre bez časů (_is_clock)."""
+    matches = pattern.finditer(text, pos) if endpos is None else pattern.finditer(text, pos, endpos)
+    return [m for m in matches if not _is_clock(m)]
+
+
+def _score_value(match: re.Match) -> tuple:
+    return int(match.group(1)), int(match.group(3))
+
+
+def _other_score_after(text: str, match: re.Match, endpos: int) -> bool:
+    """
+    Je za skóre (do endpos) jiné skóre – "2:2 … po prodloužení 3:2", skóre jiného zápasu?
+    Opakování stejného skóre a skóre po částech v závorce, která dávají součtem skóre
+    zápasu ("2:1 (1:0, 1:1)"), nevadí.
+    """
+    value = _score_value(match)
+    periods = []
+    for group in _PERIODS_RE.finditer(text, match.end(), endpos):
+        parts = [_score_value(m) for m in _scores(_SCORE_RE, group.group(1))]
+        if parts and (sum(p[0] for p in parts), sum(p[1] for p in parts)) == value:
+            periods.append(group.span())
+    return any(
+        _score_value(m) != value and not any(start <= m.start() < end for start, end in periods)
+        for m in _scores(_SCORE_RE, text, match.end(), endpos)
+    )
+
+
+class LiveScore(NamedTuple):
+    home: int
+    away: int
+    ended: bool
+    overtime: bool
+
+    @property
+    def text(self) -> str:
+        return f"{self.home}:{self.away}"
+
+
+def _fold(text: str) -> str:
+    """Malá písmena bez diakritiky, jednotné mezery (pro porovnání s textem stránky)."""
+    return re.sub(r"\s+", " ", _strip_diacritics((text or "").casefold())).strip()
+
+
+def parse_live_score(scraped_text: str, home_team: str, away_team: str) -> Optional[LiveScore]:
+    """
+    Skóre zápasu z textu stránky: "X:Y" mezi názvy týmů, jinak "Skóre/Stav: X-Y".
+    Nejednoznačný údaj (víc skóre, další skóre za ním, jen čas) nebo chybějící vrací None –
+    podle výsledku pravidel se tiket vypořádá v DB, proto jen jednoznačné skóre.
+    """
+    text = _fold(scraped_text)
+    home, away = _fold(home_team), _fold(away_team)
+    if not text or not home or not away:
+        return None
+
+    match = None
+    start = text.find(home)
+    if start >= 0:
+        between_start = start + len(home)
+        between_end = text.find(away, between_start)
+        if 0 <= between_end - between_start <= _SCORE_WINDOW:
+            # Další skóre mezi týmy (jiné než po částech) vyřadí _other_score_after
+            scores = _scores(_SCORE_RE, text, between_start, between_end)
+            if scores:
+                match = scores[0]
+    if match is None:
+        labeled = _scores(_LABELED_SCORE_RE, text)
+        if len({(m.group(1), m.group(3)) for m in labeled}) != 1:
+            return None
+        match = labeled[0]
+        start = match.start()
+
+    state_end = match.end() + _STATE_WINDOW
+    if _other_score_after(text, match, state_end):
+        return None
+    state = text[start:state_end]
+    return LiveScore(
+        home=int(match.group(1)),
+        away=int(match.group(3)),
+        ended=bool(_ENDED_RE.search(state)),
+        overtime=bool(_OVERTIME_RE.search(state)),
+    )
+
+
+def _side(selection: str, home_team: str, away_team: str) -> Optional[str]:
+    """Tým z výběru: "home" / "away" / None."""
+    sel = _fold(selection)
+    if sel in ("1", "domaci") or sel == _fold(home_team):
+        return "home"
+    if sel in ("2", "hoste") or sel == _fold(away_team):
+        return "away"
+    return None
+
+
+def _result_outcome(selection: str, home_team: str, away_team: str, score: LiveScore) -> Optional[bool]:
+    if not score.ended:
+        return None
+    sel = _fold(selection).replace(" ", "")
+    diff = score.home - score.away
+    outcomes = {
+        "1": diff > 0, "x": diff == 0, "0": diff == 0, "remiza": diff == 0, "2": diff < 0,
+        "1x": diff >= 0, "10": diff >= 0, "x2": diff <= 0, "02": diff <= 0, "12": diff != 0,
+    }
+    if sel in outcomes:
+        return outcomes[sel]
+    side = _side(selection, home_team, away_team)
+    if side is None:
+        return None
+    return diff > 0 if side == "home" else diff < 0
+
+
+def _total_outcome(selection: str, score: LiveScore) -> Optional[bool]:
+    m = _TOTAL_SELECTION_RE.match(normalize_market_label(selection))
+    if not m:
+        return None
+    line = float(m.group(2))
+    if line.is_integer():
+        return None  # celá čísla mohou skončit vrácením sázky
+    total = score.home + score.away
+    if m.group(1) in ("vice nez", "over", "nad"):
+        if total > line:
+            return True
+        return False if score.ended else None
+    if total > line:
+        return False
+    return True if score.ended else None
+
+
+def _handicap_outcome(selection: str, home_team: str, away_team: str, score: LiveScore) -> Optional[bool]:
+    if not score.ended:
+        return None
+    m = _HANDICAP_SELECTION_RE.match((selection or "").strip())
+    if not m:
+        return None
+    line = float(m.group(2).replace(" ", "").replace(",", "."))
+    if line.is_integer():
+        return None
+    side = _side(m.group(1), home_team, away_team)
+    if side is None:
+        return None
+    diff = score.home - score.away if side == "home" else score.away - score.home
+    return diff + line > 0
+
+
+def _btts_outcome(selection: str, score: LiveScore) -> Optional[bool]:
+    sel = _fold(selection)
+    both = score.home > 0 and score.away > 0
+    if sel in ("ano", "yes"):
+        return True if both else (False if score.ended else None)
+    if sel in ("ne", "no"):
+        return False if both else (True if score.ended else None)
+    return None
+
+
+def _message(score: LiveScore, won: bool) -> str:
+    if score.ended:
+        return f"Zápas skončil {score.text}, sázka {'vyšla' if won else 'nevyšla'}."
+    return f"Stav {score.text}, sázka už {'vyšla' if won else 'nevyšla'}."
+
+
+def evaluate(
+    score: LiveScore,
+    market_label: str,
+    selection: str,
+    home_team: str,
+    away_team: str,
+    previous: Optional[dict] = None,
+) -> Optional[dict]:
+    """
+    Vyhodnocení live stavu pravidly nad skóre z parse_live_score. Vrací stejný tvar jako
+    evaluate_live_ticket_state (match_ended, result, message) + source ("rules" / "unchanged"),
+    nebo None, když je potřeba LLM. previous = minulý ticket.last_live_snapshot.
+    """
+    market = normalize_market_label(market_label_to_canonical(market_label) or market_label)
+    known = True
+    if score.overtime and market not in _OVERTIME_MARKETS:
+        # Stav po základní hrací době ze skóre po prodloužení nepoznáme
+        outcome, known = None, False
+    elif market in _RESULT_MARKETS:
+        outcome = _result_outcome(selection, home_team, away_team, score)
+    elif market in _TOTAL_MARKETS:
+        outcome = _total_outcome(selection, score)
+    elif market in _HANDICAP_MARKETS:
+        outcome = _handicap_outcome(selection, home_team, away_team, score)
+    elif market in _BTTS_MARKETS:
+        outcome = _btts_outcome(selection, score)
+    else:
+        outcome, known = None, False
+
+    # Po konci zápasu musí být známý trh rozhodnutý – jinak (push, nečitelný výběr) rozhodne LLM
+    if known and (outcome is not None or not score.ended):
+        return {
+            "match_ended": score.ended,
+            "result": None if outcome is None else ("won" if outcome else "lost"),
+            "message": "" if outcome is None else _message(score, outcome),
+            "source": "rules",
+        }
+
+    # Exotický trh: beze změny skóre platí minulé vyhodnocení
+    prev = previous or {}
+    if prev.get("score") == score.text and prev.get("score_ended") == score.ended and "result" in prev:
+        return {
+            "match_ended": prev.get("match_ended"),
+            "result": prev.get("result"),
+            "message": prev.get("message") or "",
+            "source": "unchanged",
+        }
+    return None
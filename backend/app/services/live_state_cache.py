@@ -0,0 +1,123 @@
+"""
+Cache stavu live tiketů pro POST /api/live/state (extension posílá stav stránky pořád dokola).
+
+Pro každý požadavek (ticket_id / tipsport_match_id / live_match_url) si pamatuje tiket, hash
+posledního scraped textu, poslední odpověď a kontext tiketu pro vyhodnocení:
+
+  - stejný text jako minule → vrátí se minulá odpověď, bez DB a bez LLM,
+  - jiný text, ale stejné vyhodnocení (běží čas, skóre se nezměnilo) → snapshot se jen
+    podrží v cache a do DB se zapíše nejvýš jednou za live_state_write_interval_seconds,
+  - změna vyhodnocení, vypořádání tiketu nebo zápis po intervalu → plné zpracování s commitem.
+
+Kontext tiketu (trh, výběr, týmy) v cache se při každém zápisu porovná s tiketem načteným
+z DB – při rozdílu se vyhodnocuje znovu z DB. Úprava nebo smazání tiketu (PUT/DELETE
+/api/tickets) jeho záznamy zahodí (discard_ticket), takže se upravený trh neprojeví až zápisem.
+
+Cache je v paměti procesu (jeden worker uvicornu = vlastní cache). Čte ji async endpoint,
+discard_ticket volají synchronní endpointy z threadpoolu – proto zámek. Nezapsaný snapshot se
+při výpadku ztratí; jde jen o text stránky a čas, vyhodnocení se v něm nezměnilo.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from app.config import get_settings
+
+# Počet sledovaných live tiketů (běžně jednotky)
+_MAX_ENTRIES = 256
+# Záznam bez zápisu do DB po tuto dobu se zahodí (extension přestala posílat)
+_ENTRY_TTL_SECONDS = 600
+
+
+@dataclass
+class LiveTicketEntry:
+    """Poslední stav jednoho live tiketu."""
+    ticket_id: int
+    market_label: str
+    selection: str
+    home_team: str
+    away_team: str
+    text_hash: str
+    snapshot: dict          # poslední snapshot (zapsaný nebo čekající na zápis)
+    response: dict          # poslední odpověď endpointu
+    written_at: float       # time.monotonic() posledního commitu (a načtení kontextu tiketu z DB)
+
+    @property
+    def context(self) -> tuple:
+        """Údaje tiketu, ze kterých se vyhodnocuje (porovnání s tiketem z DB)."""
+        return (self.market_label, self.selection, self.home_team, self.away_team)
+
+    def write_due(self, now: float) -> bool:
+        return now - self.written_at >= get_settings().live_state_write_interval_seconds
+
+    def expired(self, now: float) -> bool:
+        return now - self.written_at >= _ENTRY_TTL_SECONDS
+
+
+_lock = threading.Lock()
+_entries: "OrderedDict[tuple, LiveTicketEntry]" = OrderedDict()
+_keys_by_ticket: dict = {}  # ticket_id -> {klíč požadavku}
+
+
+def enabled() -> bool:
+    return get_settings().live_state_write_interval_seconds > 0
+
+
+def request_key(ticket_id: Optional[int], tipsport_match_id: Optional[str], live_match_url: Optional[str]) -> tuple:
+    """Klíč požadavku – stejné identifikátory najdou stejný tiket a URL už je uložená."""
+    return (ticket_id, tipsport_match_id or None, live_match_url or None)
+
+
+def text_hash(scraped_text: str) -> str:
+    return hashlib.sha1(scraped_text.encode("utf-8")).hexdigest()
+
+
+def get(key: tuple) -> Optional[LiveTicketEntry]:
+    """Platný záznam pro požadavek, nebo None."""
+    if not enabled():
+        return None
+    with _lock:
+        entry = _entries.get(key)
+        if entry is None:
+            return None
+        if entry.expired(time.monotonic()):
+            _remove(key)
+            return None
+        _entries.move_to_end(key)
+        return entry
+
+
+def put(key: tuple, entry: LiveTicketEntry) -> None:
+    if not enabled():
+        return
+    with _lock:
+        previous = _entries.get(key)
+        if previous is not None and previous.ticket_id != entry.ticket_id:
+            _remove(key)
+        _entries[key] = entry
+        _entries.move_to_end(key)
+        _keys_by_ticket.setdefault(entry.ticket_id, set()).add(key)
+        while len(_entries) > _MAX_ENTRIES:
+            _remove(next(iter(_entries)))
+
+
+def discard_ticket(ticket_id: int) -> None:
+    """Zahodí záznamy tiketu (po úpravě nebo smazání tiketu)."""
+    with _lock:
+        for key in list(_keys_by_ticket.get(ticket_id, ())):
+            _remove(key)
+
+
+def _remove(key: tuple) -> None:
+    """Odebere záznam i z indexu podle tiketu (volat se zámkem)."""
+    entry = _entries.pop(key, None)
+    if entry is None:
+        return
+    keys = _keys_by_ticket.get(entry.ticket_id)
+    if keys is not None:
+        keys.discard(key)
+        if not keys:
+            del _keys_by_ticket[entry.ticket_id]
@@ -0,0 +1,192 @@
+"""
+Cache číselníků pro importy: sporty, sázkovky a typy sázek (název → id).
+
+Importy převádějí názvy od sázkovek na id – dřív dotazem (ilike) na každý tiket.
+Číselníky jsou malé a mění se zřídka, proto se načtou najednou do paměti procesu
+a znovu až po commitu, který změnil Sport, Bookmaker nebo MarketType – verze se
+hlídá přes události Session jako ve stats_cache. Změny z jiných workerů uvicornu
+se projeví nejpozději po lookup_cache_ttl_seconds.
+
+V cache jsou jen id a názvy, ne ORM objekty (ty patří jedné Session). Záznam
+vytvořený v ještě nekomitnuté transakci v cache není – kdo ho potřebuje najít,
+dohledá ho při neúspěchu v DB (viz market_types.get_or_create_canonical_market_type).
+"""
+import threading
+import time
+from itertools import chain
+from typing import NamedTuple, Optional
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.models import Bookmaker, MarketType, Sport
+from app.utils.market_type_normalization import normalize_market_label
+from app.utils.sport_mapping import normalize_sport_label_for_db
+
+_LOOKUP_MODELS = (Sport, Bookmaker, MarketType)
+_DIRTY_KEY = "lookup_cache_dirty"
+
+# Varianty názvů sportů od sázkovek (Tipsport, Betano, Fortuna) → název sportu v DB
+SPORT_ALIASES = {
+    "fotbal": "Fotbal",
+    "football": "Fotbal",
+    "soccer": "Fotbal",
+    "hokej": "Hokej",
+    "tenis": "Tenis",
+    "basketbal": "Basketbal",
+    "basketball": "Basketbal",
+    "esport": "Esport",
+    "házená": "Handball",
+    "hazena": "Handball",
+    "volejbal": "Volejbal",
+    "ragby": "Rugby",
+    "rugby": "Rugby",
+}
+
+FALLBACK_SPORT = ("Ostatní", "🏆")
+
+
+class Lookups(NamedTuple):
+    """Jeden načtený stav číselníků."""
+    version: int
+    expires_at: float
+    sport_ids: dict        # název sportu malými písmeny → id (při shodě nejnižší id)
+    sport_names: dict      # id sportu → název
+    bookmaker_ids: dict    # název sázkovky → id
+    market_type_ids: dict  # normalizovaný název aktivního typu sázky → id
+
+    def sport_id_for_label(self, label: Optional[str]) -> Optional[int]:
+        """Název sportu od sázkovky → sport_id: přesný název (bez ohledu na velikost písmen), pak alias."""
+        name = normalize_sport_label_for_db(label)
+        if not name:
+            return None
+        normalized = name.lower()
+        sport_id = self.sport_ids.get(normalized)
+        if sport_id is None and normalized in SPORT_ALIASES:
+            sport_id = self.sport_ids.get(SPORT_ALIASES[normalized].lower())
+        return sport_id
+
+
+_lock = threading.Lock()
+_version = 0
+_current: Optional[Lookups] = None
+
+
+def invalidate() -> None:
+    """Zahodí načtené číselníky (volá se automaticky po commitu změny sportů/sázkovek/typů sázek)."""
+    global _version, _current
+    with _lock:
+        _version += 1
+        _current = None
+
+
+def _load(db: Session, version: int) -> Lookups:
+    sport_ids, sport_names = {}, {}
+    for sport_id, name in db.execute(select(Sport.id, Sport.name).order_by(Sport.id)):
+        sport_ids.setdefault(name.lower(), sport_id)
+        sport_names[sport_id] = name
+
+    bookmaker_ids = {}
+    for bookmaker_id, name in db.execute(select(Bookmaker.id, Bookmaker.name).order_by(Bookmaker.id)):
+        bookmaker_ids.setdefault(name, bookmaker_id)
+
+    # Přednost má uložený normalized_name, pak starší záznamy podle normalizovaného name
+    market_types = db.execute(
+        select(MarketType.id, MarketType.name, MarketType.normalized_name)
+        .where(MarketType.is_active == True)
+        .order_by(MarketType.id)
+    ).all()
+    market_type_ids = {}
+    for mt_id, _, normalized_name in market_types:
+        if normalized_name:
+            market_type_ids.setdefault(normalized_name, mt_id)
+    for mt_id, name, _ in market_types:
+        market_type_ids.setdefault(normalize_market_label(name or ""), mt_id)
+
+    ttl = get_settings().lookup_cache_ttl_seconds
+    return Lookups(
+        version=version,
+        expires_at=time.monotonic() + max(ttl, 0),
+        sport_ids=sport_ids,
+        sport_names=sport_names,
+        bookmaker_ids=bookmaker_ids,
+        market_type_ids=market_type_ids,
+    )
+
+
+def get(db: Session) -> Lookups:
+    """Aktuální číselníky; při změně verze nebo po TTL se znovu načtou (tři dotazy)."""
+    global _current
+    current = _current
+    if current is not None and current.version == _version and current.expires_at > time.monotonic():
+        return current
+
+    # Verzi číst před načtením: zápis během načítání uloží výsledek pod už neplatnou verzí.
+    # Session s nekomitnutou změnou číselníků by do sdílené cache vnesla i své řádky.
+    version = _version
+    loaded = _load(db, version)
+    with _lock:
+        if version == _version and not db.info.get(_DIRTY_KEY):
+            _current = loaded
+    return loaded
+
+
+def get_or_create_bookmaker_id(db: Session, name: str, currency: str = "CZK") -> int:
+    """ID sázkovky podle názvu; pokud chybí (neproběhl seed), vytvoří ji."""
+    bookmaker_id = get(db).bookmaker_ids.get(name)
+    if bookmaker_id is not None:
+        return bookmaker_id
+    bookmaker = db.query(Bookmaker).filter(Bookmaker.name == name).first()
+    if not bookmaker:
+        bookmaker = Bookmaker(name=name, currency=currency)
+        db.add(bookmaker)
+        db.commit()
+        db.refresh(bookmaker)
+    return bookmaker.id
+
+
+def sport_id_for_label(db: Session, label: Optional[str]) -> int:
+    """Název sportu od sázkovky → sport_id; neznámý sport → „Ostatní“ (vytvoří se, pokud chybí)."""
+    lookups = get(db)
+    sport_id = lookups.sport_id_for_label(label)
+    if sport_id is None:
+        sport_id = lookups.sport_ids.get(FALLBACK_SPORT[0].lower())
+    if sport_id is None:
+        sport = db.query(Sport).filter(Sport.name == FALLBACK_SPORT[0]).first()
+        if not sport:
+            sport = Sport(name=FALLBACK_SPORT[0], icon=FALLBACK_SPORT[1])
+            db.add(sport)
+            db.commit()
+            db.refresh(sport)
+        sport_id = sport.id
+    return sport_id
+
+
+# ─── Zneplatnění po zápisu ────────────────────────────────
+
+@event.listens_for(Session, "after_flush")
+def _mark_dirty_on_flush(session, flush_context):
+    if any(isinstance(obj, _LOOKUP_MODELS) for obj in chain(session.new, session.dirty, session.deleted)):
+        session.info[_DIRTY_KEY] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_dirty_on_bulk(orm_execute_state):
+    state = orm_execute_state
+    if not (state.is_insert or state.is_update or state.is_delete):
+        return
+    mapper = state.bind_mapper
+    if mapper is not None and issubclass(mapper.class_, _LOOKUP_MODELS):
+        state.session.info[_DIRTY_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session):
+    if session.info.pop(_DIRTY_KEY, False):
+        invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _reset_on_rollback(session):
+    session.info.pop(_DIRTY_KEY, None)
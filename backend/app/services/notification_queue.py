@@ -0,0 +1,212 @@
+"""
+Fronta odchozích notifikací (webhook, Telegram) – endpointy jen zařadí událost a hned vrací.
+
+POST /api/live/state dřív čekal na odpověď webhooku (a pokaždé četl AppSettings z DB), takže
+pomalý cíl zdržel odpověď extension. Teď:
+
+  - enqueue(event) jen vloží událost do asyncio.Queue (plná fronta → nejstarší se zahodí),
+  - worker (task v event loopu, spouští/zastavuje lifespan app.main) počká na první událost,
+    do _BATCH_WINDOW_SECONDS přibere další (nejvýš _BATCH_MAX) a odešle je jedním požadavkem
+    na každý cíl: webhook dostane jednu událost beze změny tvaru, více událostí jako
+    {"event": "batch", "events": [...]}; Telegram jednu zprávu s řádkem na událost,
+  - chyba spojení, 429 a 5xx se opakují s exponenciálním čekáním (_RETRY_DELAYS), ostatní 4xx ne,
+  - cíle (webhook_url, telegram_bot_token/chat_id) se čtou z AppSettings jednou a drží v paměti;
+    uložení nastavení je zahodí (invalidate_targets), změny z jiných workerů uvicornu se projeví
+    nejpozději po lookup_cache_ttl_seconds.
+
+Fronta je v paměti procesu – nedoručené notifikace se při restartu ztratí (při zastavení
+aplikace se worker ještě pokusí frontu doručit, nejvýš _DRAIN_TIMEOUT_SECONDS).
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import httpx
+
+from app import http_clients
+from app.config import get_settings
+from app.database import SessionLocal
+from app.models import AppSettings
+
+logger = logging.getLogger(__name__)
+
+_QUEUE_SIZE = 1000
+_BATCH_MAX = 20
+_BATCH_WINDOW_SECONDS = 0.5
+# Čekání před 2., 3. a 4. pokusem
+_RETRY_DELAYS = (1.0, 2.0, 4.0)
+_REQUEST_TIMEOUT = 5.0
+_DRAIN_TIMEOUT_SECONDS = 10.0
+
+_TELEGRAM_URL = "https://api.telegram.org/bot{token}/sendMessage"
+_TELEGRAM_MAX_CHARS = 4000  # limit zprávy je 4096 znaků
+
+
+@dataclass(frozen=True)
+class NotificationTargets:
+    """Kam notifikace posílat (snímek AppSettings)."""
+    webhook_url: str
+    telegram_bot_token: str
+    telegram_chat_id: str
+    expires_at: float
+
+    @property
+    def telegram(self) -> bool:
+        return bool(self.telegram_bot_token and self.telegram_chat_id)
+
+    @property
+    def any(self) -> bool:
+        return bool(self.webhook_url) or self.telegram
+
+
+_queue: Optional[asyncio.Queue] = None
+_worker: Optional[asyncio.Task] = None
+_targets: Optional[NotificationTargets] = None
+
+
+def _load_targets() -> NotificationTargets:
+    db = SessionLocal()
+    try:
+        s = db.query(AppSettings).first()
+    finally:
+        db.close()
+    return NotificationTargets(
+        webhook_url=((s.webhook_url if s else None) or "").strip(),
+        telegram_bot_token=((s.telegram_bot_token if s else None) or "").strip(),
+        telegram_chat_id=((s.telegram_chat_id if s else None) or "").strip(),
+        expires_at=time.monotonic() + get_settings().lookup_cache_ttl_seconds,
+    )
+
+
+async def _get_targets() -> NotificationTargets:
+    global _targets
+    targets = _targets
+    if targets is None or time.monotonic() >= targets.expires_at:
+        # Synchronní DB dotaz mimo event loop
+        targets = await asyncio.to_thread(_load_targets)
+        _targets = targets
+    return targets
+
+
+def invalidate_targets() -> None:
+    """Zahodí snímek cílů (volá se po uložení nastavení aplikace)."""
+    global _targets
+    _targets = None
+
+
+def enqueue(event: dict) -> None:
+    """Zařadí notifikaci k odeslání; nečeká na doručení. Volat z event loopu (async endpoint)."""
+    queue = _ensure_worker()
+    if queue.full():
+        dropped = queue.get_nowait()
+        queue.task_done()
+        logger.warning("Notifikace: fronta je plná, zahazuji nejstarší událost %s", dropped.get("event"))
+    queue.put_nowait(event)
+
+
+def _ensure_worker() -> asyncio.Queue:
+    """Fronta a worker – vytvoří je lifespan, mimo něj (skripty) se spustí při prvním enqueue."""
+    global _queue, _worker
+    if _queue is None:
+        _queue = asyncio.Queue(maxsize=_QUEUE_SIZE)
+    if _worker is None or _worker.done():
+        _worker = asyncio.get_running_loop().create_task(_run(_queue), name="notification-queue")
+    return _queue
+
+
+def start() -> None:
+    """Spustí worker (lifespan – startup)."""
+    _ensure_worker()
+
+
+async def stop() -> None:
+    """Doručí zbytek fronty (nejvýš _DRAIN_TIMEOUT_SECONDS) a zastaví worker (lifespan – shutdown)."""
+    global _queue, _worker
+    if _worker is None:
+        return
+    if _queue is not None and not _worker.done():
+        try:
+            await asyncio.wait_for(_queue.join(), timeout=_DRAIN_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            logger.warning("Notifikace: %s událostí nedoručeno při ukončení", _queue.qsize())
+    _worker.cancel()
+    try:
+        await _worker
+    except asyncio.CancelledError:
+        pass
+    _queue = _worker = None
+
+
+async def _next_batch(queue: asyncio.Queue) -> list:
+    """Počká na první událost a do _BATCH_WINDOW_SECONDS přibere další."""
+    batch = [await queue.get()]
+    deadline = asyncio.get_running_loop().time() + _BATCH_WINDOW_SECONDS
+    while len(batch) < _BATCH_MAX:
+        remaining = deadline - asyncio.get_running_loop().time()
+        if remaining <= 0:
+            break
+        try:
+            batch.append(await asyncio.wait_for(queue.get(), timeout=remaining))
+        except asyncio.TimeoutError:
+            break
+    return batch
+
+
+async def _run(queue: asyncio.Queue) -> None:
+    while True:
+        batch = await _next_batch(queue)
+        try:
+            await _deliver(batch)
+        except Exception:
+            logger.exception("Notifikace: doručení %s událostí selhalo", len(batch))
+        finally:
+            for _ in batch:
+                queue.task_done()
+
+
+async def _deliver(batch: list) -> None:
+    targets = await _get_targets()
+    if not targets.any:
+        return
+    sends = []
+    if targets.webhook_url:
+        payload = batch[0] if len(batch) == 1 else {"event": "batch", "events": batch}
+        sends.append(_post_with_retry("Webhook", targets.webhook_url, payload))
+    if targets.telegram:
+        url = _TELEGRAM_URL.format(token=targets.telegram_bot_token)
+        payload = {"chat_id": targets.telegram_chat_id, "text": _telegram_text(batch)}
+        sends.append(_post_with_retry("Telegram", url, payload))
+    await asyncio.gather(*sends)
+
+
+def _telegram_text(batch: list) -> str:
+    lines = []
+    for event in batch:
+        head = f"#{event.get('ticket_id')} {event.get('bookmaker') or ''}".strip()
+        result = {"won": "✅", "lost": "❌"}.get(event.get("result") or "", "")
+        lines.append(" ".join(part for part in (result, head, event.get("message") or event.get("event") or "") if part))
+    return "\n".join(lines)[:_TELEGRAM_MAX_CHARS]
+
+
+def _retryable(response: httpx.Response) -> bool:
+    return response.status_code == 429 or response.status_code >= 500
+
+
+async def _post_with_retry(target: str, url: str, payload: dict) -> bool:
+    """POST s opakováním; vrací True při úspěchu. Chyby jen loguje (URL kvůli tokenu ne)."""
+    for attempt in range(len(_RETRY_DELAYS) + 1):
+        if attempt:
+            await asyncio.sleep(_RETRY_DELAYS[attempt - 1])
+        try:
+            r = await http_clients.webhook().post(url, json=payload, timeout=_REQUEST_TIMEOUT)
+        except httpx.HTTPError as e:
+            logger.warning("%s POST selhal (pokus %s): %s", target, attempt + 1, e)
+            continue
+        if r.status_code < 400:
+            return True
+        logger.warning("%s POST vrátil %s (pokus %s): %s", target, r.status_code, attempt + 1, r.text[:200])
+        if not _retryable(r):
+            return False
+    return False
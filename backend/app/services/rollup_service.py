@@ -0,0 +1,274 @@
+"""
+Denní rollup statistik tiketů (tabulka ticket_daily_rollup).
+
+Každý zápis tiketu (vytvoření, úprava, smazání, vyhodnocení z LIVE) volá
+apply_ticket_change(db, before, after) ve stejné transakci: odečte starý
+příspěvek tiketu a přičte nový (a posune průběh equity, viz equity_service). rebuild_rollup() přepočítá tabulku od nuly
+(skript scripts/rebuild_ticket_rollup.py, migrace add_ticket_daily_rollup).
+"""
+from datetime import date, datetime
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Mapping, NamedTuple, Optional
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.models import Ticket, TicketDailyRollup, TicketStatus, TicketType
+from app.services import equity_service
+from app.services.stats_service import odds_bucket_label
+
+NO_DAY = TicketDailyRollup.NO_DAY
+
+_CENT = Decimal("0.01")
+
+
+class RollupKey(NamedTuple):
+    day: date
+    sport_id: int
+    bookmaker_id: int
+    league_id: int
+    market_type_id: int
+    odds_bucket: str
+    is_live: bool
+    status: str
+    is_aku_parent: bool
+    event_weekday: int
+
+
+class RollupEntry(NamedTuple):
+    """Příspěvek jednoho tiketu do rollupu (klíč + hodnoty)."""
+    key: RollupKey
+    stake: Decimal
+    profit: Decimal
+    payout: Decimal
+    odds: Decimal
+    # Pozice v pořadí tiketů – pro průběh equity (equity_service), do rollupu se nezapisuje
+    ticket_id: Optional[int] = None
+    created_at: Optional[datetime] = None
+
+
+def _money(value) -> Decimal:
+    """Zaokrouhlí na 2 desetinná místa jako Numeric(…, 2) v DB – jinak by se rollup rozjel."""
+    if value is None:
+        return Decimal("0")
+    return Decimal(str(value)).quantize(_CENT, rounding=ROUND_HALF_UP)
+
+
+def rollup_entry(
+    *,
+    created_at,
+    event_date,
+    sport_id,
+    bookmaker_id,
+    league_id,
+    market_type_id,
+    odds,
+    stake,
+    profit,
+    payout,
+    is_live,
+    status,
+    ticket_type,
+    parent_id,
+    id=None,
+) -> RollupEntry:
+    """Sestaví příspěvek tiketu z hodnot sloupců (sdílí ORM snapshot i přepočet)."""
+    status_value = TicketStatus(getattr(status, "value", status) or TicketStatus.open.value).value
+    type_value = getattr(ticket_type, "value", ticket_type) or TicketType.solo.value
+    odds_value = _money(odds)
+    # Den v týdnu pro Analytics: event_date, fallback created_at (data před rokem 2000 ignorovat)
+    dt = event_date or created_at
+    weekday = dt.weekday() if dt is not None and dt.year >= 2000 else -1
+    key = RollupKey(
+        day=created_at.date() if created_at is not None else NO_DAY,
+        sport_id=sport_id or 0,
+        bookmaker_id=bookmaker_id or 0,
+        league_id=league_id or 0,
+        market_type_id=market_type_id or 0,
+        odds_bucket=odds_bucket_label(odds_value) or "",
+        is_live=bool(is_live),
+        status=status_value,
+        is_aku_parent=(type_value == TicketType.aku.value and parent_id is None),
+        event_weekday=weekday,
+    )
+    return RollupEntry(
+        key=key,
+        stake=_money(stake),
+        profit=_money(profit),
+        payout=_money(payout),
+        odds=odds_value,
+        ticket_id=id,
+        created_at=created_at,
+    )
+
+
+# Sloupce tiketu, ze kterých se skládá příspěvek (argumenty rollup_entry)
+ENTRY_COLUMNS = (
+    "created_at", "event_date", "sport_id", "bookmaker_id", "league_id", "market_type_id",
+    "odds", "stake", "profit", "payout", "is_live", "status", "ticket_type", "parent_id", "id",
+)
+
+
+def entry_from_values(values: Mapping) -> RollupEntry:
+    """Příspěvek tiketu z hodnot sloupců (dict řádku, _asdict() snapshotu)."""
+    return rollup_entry(**{col: values[col] for col in ENTRY_COLUMNS})
+
+
+def snapshot(ticket: Optional[Ticket]) -> Optional[RollupEntry]:
+    """Aktuální příspěvek ORM tiketu do rollupu (None pro neexistující tiket)."""
+    if ticket is None:
+        return None
+    return rollup_entry(
+        created_at=ticket.created_at,
+        event_date=ticket.event_date,
+        sport_id=ticket.sport_id,
+        bookmaker_id=ticket.bookmaker_id,
+        league_id=ticket.league_id,
+        market_type_id=ticket.market_type_id,
+        odds=ticket.odds,
+        stake=ticket.stake,
+        profit=ticket.profit,
+        payout=ticket.payout,
+        is_live=ticket.is_live,
+        status=ticket.status,
+        ticket_type=ticket.ticket_type,
+        parent_id=ticket.parent_id,
+        id=ticket.id,
+    )
+
+
+def _add(db: Session, entry: RollupEntry, sign: int) -> None:
+    """Přičte (sign=1) nebo odečte (sign=-1) příspěvek tiketu v jednom řádku rollupu."""
+    _add_totals(
+        db, entry.key, sign,
+        sign * entry.stake, sign * entry.profit, sign * entry.payout, sign * entry.odds,
+    )
+
+
+def _add_totals(db: Session, key: RollupKey, bets: int, stake, profit, payout, odds) -> None:
+    """Přičte součty (záporné = odečte) v jednom řádku rollupu."""
+    key = key._asdict()
+    key_conds = [getattr(TicketDailyRollup, col) == value for col, value in key.items()]
+    result = db.execute(
+        update(TicketDailyRollup)
+        .where(*key_conds)
+        .values(
+            bets_count=TicketDailyRollup.bets_count + bets,
+            stake_total=TicketDailyRollup.stake_total + stake,
+            profit_total=TicketDailyRollup.profit_total + profit,
+            payout_total=TicketDailyRollup.payout_total + payout,
+            odds_total=TicketDailyRollup.odds_total + odds,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount and bets < 0:
+        # Prázdné řádky nenechávat (např. tiket přesunutý na jiný den nebo do jiného stavu)
+        db.execute(
+            delete(TicketDailyRollup)
+            .where(*key_conds, TicketDailyRollup.bets_count == 0)
+            .execution_options(synchronize_session=False)
+        )
+    elif result.rowcount == 0:
+        db.execute(
+            insert(TicketDailyRollup).values(
+                **key,
+                bets_count=bets,
+                stake_total=stake,
+                profit_total=profit,
+                payout_total=payout,
+                odds_total=odds,
+            )
+        )
+
+
+def _sum_by_key(entries) -> dict:
+    """Součty příspěvků po klíčích rollupu: {key: [počet, stake, profit, payout, odds]}."""
+    totals: dict[RollupKey, list] = {}
+    for entry in entries:
+        acc = totals.get(entry.key)
+        if acc is None:
+            acc = totals[entry.key] = [0, Decimal("0"), Decimal("0"), Decimal("0"), Decimal("0")]
+        acc[0] += 1
+        acc[1] += entry.stake
+        acc[2] += entry.profit
+        acc[3] += entry.payout
+        acc[4] += entry.odds
+    return totals
+
+
+def apply_ticket_change(
+    db: Session,
+    before: Optional[RollupEntry],
+    after: Optional[RollupEntry],
+) -> None:
+    """
+    Promítne změnu tiketu do rollupu a průběhu equity (volat před db.commit(),
+    ve stejné transakci; smazaný tiket už musí být flushnutý).
+    before=None → nový tiket, after=None → smazaný tiket.
+    """
+    if before == after:
+        return
+    if before is not None:
+        _add(db, before, -1)
+    if after is not None:
+        _add(db, after, 1)
+    equity_service.apply_ticket_change(db, before, after)
+
+
+def apply_ticket_changes(db: Session, changes: list) -> None:
+    """
+    Promítne dávku změn existujících tiketů [(before, after), …] – jeden UPDATE na klíč
+    rollupu (rozdíly se sečtou), equity najednou (viz equity_service.apply_ticket_changes).
+    """
+    changes = [(before, after) for before, after in changes if before != after]
+    if not changes:
+        return
+    removed = _sum_by_key(before for before, _ in changes)
+    added = _sum_by_key(after for _, after in changes)
+    for key in removed.keys() | added.keys():
+        old = removed.get(key, [0, 0, 0, 0, 0])
+        new = added.get(key, [0, 0, 0, 0, 0])
+        delta = [n - o for n, o in zip(new, old)]
+        if any(delta):
+            _add_totals(db, key, *delta)
+    equity_service.apply_ticket_changes(db, changes)
+
+
+def apply_new_tickets(db: Session, entries: list) -> None:
+    """
+    Promítne dávku nově vložených tiketů (RollupEntry s ticket_id a created_at):
+    jeden UPDATE/INSERT na klíč rollupu místo na tiket, equity najednou.
+    """
+    for key, (bets, stake, profit, payout, odds) in _sum_by_key(entries).items():
+        _add_totals(db, key, bets, stake, profit, payout, odds)
+    equity_service.apply_new_tickets(db, entries)
+
+
+def rebuild_rollup(db: Session) -> int:
+    """Smaže a znovu napočítá celý rollup z tabulky tickets. Vrací počet řádků rollupu."""
+    stmt = select(
+        Ticket.created_at, Ticket.event_date, Ticket.sport_id, Ticket.bookmaker_id,
+        Ticket.league_id, Ticket.market_type_id, Ticket.odds, Ticket.stake,
+        Ticket.profit, Ticket.payout, Ticket.is_live, Ticket.status,
+        Ticket.ticket_type, Ticket.parent_id,
+    ).execution_options(yield_per=5000)
+
+    totals = _sum_by_key(rollup_entry(**row._asdict()) for row in db.execute(stmt))
+
+    db.execute(delete(TicketDailyRollup))
+    if totals:
+        db.execute(
+            insert(TicketDailyRollup),
+            [
+                {
+                    **key._asdict(),
+                    "bets_count": bets,
+                    "stake_total": stake,
+                    "profit_total": profit,
+                    "payout_total": payout,
+                    "odds_total": odds,
+                }
+                for key, (bets, stake, profit, payout, odds) in totals.items()
+            ],
+        )
+    return len(totals)
@@ -0,0 +1,107 @@
+"""
+Cache spočítaných statistik (StatsOverview, AnalyticsSummary) podle filtrů.
+
+Klíč = (druh výsledku, verze dat, normalizované filtry). Verze dat se zvýší po
+každém commitu, který změnil tikety nebo číselníky ve statistikách (sporty,
+sázkovky, ligy, typy sázek) – ORM zápisy i hromadné insert/update/delete přes
+Session. Starší záznamy tím přestanou být dosažitelné a vypadnou přes LRU/TTL.
+
+Verze je v paměti procesu: při více workerech uvicornu vidí ostatní workery
+změnu nejpozději po vypršení TTL.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from itertools import chain
+from typing import Any, Callable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.models import Ticket, TicketDailyRollup, Sport, Bookmaker, League, MarketType
+
+# Modely, jejichž změna mění výsledky statistik
+_STATS_MODELS = (Ticket, TicketDailyRollup, Sport, Bookmaker, League, MarketType)
+_DIRTY_KEY = "stats_cache_dirty"
+
+_lock = threading.Lock()
+_data_version = 0
+_entries: "OrderedDict[tuple, tuple[float, Any]]" = OrderedDict()
+
+
+def data_version() -> int:
+    return _data_version
+
+
+def bump_data_version() -> None:
+    """Zneplatní všechny uložené výsledky (volá se automaticky po commitu zápisu tiketů)."""
+    global _data_version
+    with _lock:
+        _data_version += 1
+        _entries.clear()
+
+
+def _filters_key(filters: Optional[dict]) -> str:
+    """Normalizované filtry: bez None hodnot, seřazené klíče, datumy/enumy jako text."""
+    clean = {k: v for k, v in (filters or {}).items() if v is not None}
+    return json.dumps(clean, sort_keys=True, default=lambda v: getattr(v, "value", None) or str(v))
+
+
+def get_or_compute(kind: str, filters: Optional[dict], compute: Callable[[], Any]) -> Any:
+    """Vrátí výsledek z cache, nebo ho spočítá přes compute() a uloží."""
+    settings = get_settings()
+    if settings.stats_cache_ttl_seconds <= 0:
+        return compute()
+
+    # Verzi číst před výpočtem: zápis během výpočtu uloží výsledek pod už neplatnou verzí
+    key = (kind, _data_version, _filters_key(filters))
+    now = time.monotonic()
+    with _lock:
+        hit = _entries.get(key)
+        if hit is not None:
+            if hit[0] > now:
+                _entries.move_to_end(key)
+                return hit[1]
+            del _entries[key]
+
+    value = compute()
+
+    with _lock:
+        if key[1] == _data_version:
+            _entries[key] = (now + settings.stats_cache_ttl_seconds, value)
+            _entries.move_to_end(key)
+            while len(_entries) > settings.stats_cache_size:
+                _entries.popitem(last=False)
+    return value
+
+
+# ─── Zneplatnění po zápisu ────────────────────────────────
+
+@event.listens_for(Session, "after_flush")
+def _mark_dirty_on_flush(session, flush_context):
+    if any(isinstance(obj, _STATS_MODELS) for obj in chain(session.new, session.dirty, session.deleted)):
+        session.info[_DIRTY_KEY] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_dirty_on_bulk(orm_execute_state):
+    """Hromadné insert/update/delete (query.update, insert().values(...)) neprochází flush."""
+    state = orm_execute_state
+    if not (state.is_insert or state.is_update or state.is_delete):
+        return
+    mapper = state.bind_mapper
+    if mapper is not None and issubclass(mapper.class_, _STATS_MODELS):
+        state.session.info[_DIRTY_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_on_commit(session):
+    if session.info.pop(_DIRTY_KEY, False):
+        bump_data_version()
+
+
+@event.listens_for(Session, "after_rollback")
+def _reset_on_rollback(session):
+    session.info.pop(_DIRTY_KEY, None)
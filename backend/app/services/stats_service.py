@@ -1,12 +1,17 @@
 from decimal import Decimal
 from typing import Optional, List
-from datetime import datetime, timedelta
-from sqlalchemy import func, case, and_, or_
+from datetime import datetime, timedelta, time
+from sqlalchemy import func, case, select, extract, and_, or_
 from sqlalchemy.orm import Session
 
-from app.models import Ticket, TicketStatus, TicketType, Sport, MarketType
+from app.config import get_settings
+from app.models import (
+    Ticket, TicketStatus, TicketType, Sport, MarketType, Bookmaker, League, TicketDailyRollup,
+    TicketEquityPoint,
+)
+from app.services import stats_cache
 from app.schemas import (
-    OverallStats, GroupedStat, TimeseriesPoint, StatsOverview
+    OverallStats, GroupedStat, TimeseriesPoint, StatsOverview, WeeklyStats
 )
 
 SETTLED_STATUSES = [
@@ -16,193 +21,387 @@ SETTLED_STATUSES = [
 
 WEEKDAY_NAMES = ["Pondělí", "Úterý", "Středa", "Čtvrtek", "Pátek", "Sobota", "Neděle"]
 
+# Kurzová pásma pro by_odds_bucket (hranice včetně)
+ODDS_BUCKETS = [
+    ("1.01–1.50", Decimal("1.01"), Decimal("1.50")),
+    ("1.51–2.00", Decimal("1.51"), Decimal("2.00")),
+    ("2.01–3.00", Decimal("2.01"), Decimal("3.00")),
+    ("3.01–5.00", Decimal("3.01"), Decimal("5.00")),
+    ("5.01+", Decimal("5.01"), Decimal("999")),
+]
 
-def _build_filters(db: Session, query, filters: dict):
-    """Aplikuje filtry na dotaz."""
+
+def odds_bucket_label(odds) -> Optional[str]:
+    """Název kurzového pásma pro hodnotu kurzu (mimo pásma None)."""
+    if odds is None:
+        odds = Decimal("0")
+    for name, lo, hi in ODDS_BUCKETS:
+        if lo <= odds <= hi:
+            return name
+    return None
+
+
+def _filter_conditions(filters: dict) -> list:
+    """Převede slovník filtrů na seznam SQL podmínek nad Ticket."""
+    conds = []
     if filters.get("sport_id"):
-        query = query.filter(Ticket.sport_id == filters["sport_id"])
+        conds.append(Ticket.sport_id == filters["sport_id"])
     if filters.get("league_id"):
-        query = query.filter(Ticket.league_id == filters["league_id"])
+        conds.append(Ticket.league_id == filters["league_id"])
     if filters.get("bookmaker_id"):
-        query = query.filter(Ticket.bookmaker_id == filters["bookmaker_id"])
+        conds.append(Ticket.bookmaker_id == filters["bookmaker_id"])
     if filters.get("market_type_id"):
-        query = query.filter(Ticket.market_type_id == filters["market_type_id"])
-    # Podpora filtrování podle jména market typu (pokud přijde z API jako string)
+        conds.append(Ticket.market_type_id == filters["market_type_id"])
+    # Podpora filtrování podle jména market typu (pokud přijde z API jako string).
+    # Subquery místo joinu, aby šlo kombinovat s GROUP BY přes MarketType.
     if filters.get("market_type"):
-        query = query.join(MarketType).filter(MarketType.name == filters["market_type"])
+        conds.append(
+            Ticket.market_type_id.in_(
+                select(MarketType.id).where(MarketType.name == filters["market_type"])
+            )
+        )
     if filters.get("is_live") is not None:
-        query = query.filter(Ticket.is_live == filters["is_live"])
+        conds.append(Ticket.is_live == filters["is_live"])
     if filters.get("status"):
-        query = query.filter(Ticket.status == filters["status"])
+        conds.append(Ticket.status == filters["status"])
     if filters.get("date_from"):
-        query = query.filter(Ticket.created_at >= filters["date_from"])
+        conds.append(Ticket.created_at >= filters["date_from"])
     if filters.get("date_to"):
-        query = query.filter(Ticket.created_at <= filters["date_to"])
+        conds.append(Ticket.created_at <= filters["date_to"])
     if filters.get("odds_min"):
-        query = query.filter(Ticket.odds >= Decimal(str(filters["odds_min"])))
+        conds.append(Ticket.odds >= Decimal(str(filters["odds_min"])))
     if filters.get("odds_max"):
-        query = query.filter(Ticket.odds <= Decimal(str(filters["odds_max"])))
-    return query
+        conds.append(Ticket.odds <= Decimal(str(filters["odds_max"])))
+    return conds
+
+
+def _build_filters(db: Session, query, filters: dict):
+    """Aplikuje filtry na dotaz."""
+    conds = _filter_conditions(filters)
+    return query.filter(*conds) if conds else query
+
+
+def _not_aku_parent():
+    """Podmínka: sólové tikety a děti AKU (rodiče AKU se do statistik nepočítají)."""
+    return or_(Ticket.parent_id.isnot(None), Ticket.ticket_type != TicketType.aku)
 
 
 def _exclude_aku_parents(query):
     """Vyloučí rodiče AKU ze statistik – počítáme jen sólové tikety a děti (jednotlivé sázky)."""
-    return query.filter(or_(Ticket.parent_id.isnot(None), Ticket.ticket_type != TicketType.aku))
-
-
-def _get_filtered_tickets(db: Session, filters: dict):
-    """Vrátí all + settled tikety s aplikovanými filtry (bez rodičů AKU)."""
-    query = db.query(Ticket)
-    query = _exclude_aku_parents(query)
-    query = _build_filters(db, query, filters or {})
-    all_bets = query.all()
-
-    settled_bets = [t for t in all_bets if t.status in SETTLED_STATUSES]
-    return all_bets, settled_bets
-
-
-def _compute_streaks(settled_bets: list) -> tuple[int, int, int]:
-    """Vypočítá aktuální, nejdelší winning a nejdelší losing streak."""
-    if not settled_bets:
-        return 0, 0, 0
-
-    sorted_bets = sorted(settled_bets, key=lambda t: t.created_at or datetime.min)
-    best_streak = worst_streak = current_streak = 0
-    current_win = current_loss = 0
-
-    for t in sorted_bets:
-        if t.status == TicketStatus.won:
-            current_win += 1
-            current_loss = 0
-            best_streak = max(best_streak, current_win)
-            current_streak = current_win
-        elif t.status == TicketStatus.lost:
-            current_loss += 1
-            current_win = 0
-            worst_streak = max(worst_streak, current_loss)
-            current_streak = -current_loss
-        else:
-            current_win = 0
-            current_loss = 0
-            current_streak = 0
+    return query.filter(_not_aku_parent())
 
-    return current_streak, best_streak, worst_streak
 
+def _stats_conditions(filters: dict) -> list:
+    """Společné WHERE pro všechny statistické dotazy (bez rodičů AKU + filtry)."""
+    return [_not_aku_parent(), *_filter_conditions(filters or {})]
 
-def _compute_drawdown(settled_bets: list) -> tuple[Decimal, float]:
-    """Vypočítá maximální drawdown (absolutní + procentuální)."""
-    if not settled_bets:
-        return Decimal("0"), 0.0
 
-    sorted_bets = sorted(settled_bets, key=lambda t: t.created_at or datetime.min)
-    cumulative = Decimal("0")
-    peak = Decimal("0")
-    max_dd = Decimal("0")
+def _measure_columns() -> list:
+    """Agregační sloupce sdílené všemi GROUP BY dotazy (FILTER (WHERE ...) místo smyček v Pythonu)."""
+    settled = Ticket.status.in_(SETTLED_STATUSES)
+    return [
+        func.count(Ticket.id).label("bets"),
+        func.sum(Ticket.stake).label("stake"),
+        func.sum(Ticket.stake).filter(settled).label("settled_stake"),
+        func.sum(Ticket.profit).filter(settled).label("profit"),
+        func.sum(Ticket.payout).filter(settled).label("payout"),
+        func.sum(Ticket.odds).label("odds_sum"),
+        func.count(Ticket.id).filter(settled).label("settled_count"),
+        func.count(Ticket.id).filter(Ticket.status == TicketStatus.won).label("won_only"),
+        func.count(Ticket.id).filter(
+            Ticket.status.in_([TicketStatus.won, TicketStatus.half_win])
+        ).label("wins"),
+        func.count(Ticket.id).filter(
+            Ticket.status.in_([TicketStatus.lost, TicketStatus.half_loss])
+        ).label("losses"),
+        func.count(Ticket.id).filter(Ticket.status == TicketStatus.void).label("voids"),
+    ]
 
-    for t in sorted_bets:
-        cumulative += t.profit or 0
-        if cumulative > peak:
-            peak = cumulative
-        dd = peak - cumulative
-        if dd > max_dd:
-            max_dd = dd
 
-    stake_total = sum(t.stake or 0 for t in settled_bets)
-    dd_percent = float(max_dd) / float(stake_total) * 100 if stake_total else 0.0
+def _rollup_conditions(filters: dict) -> list:
+    """Stejné WHERE jako _stats_conditions, ale nad ticket_daily_rollup (viz _rollup_answers)."""
+    R = TicketDailyRollup
+    filters = filters or {}
+    conds = [R.is_aku_parent.is_(False)]
+    for key in ("sport_id", "league_id", "bookmaker_id", "market_type_id"):
+        if filters.get(key):
+            conds.append(getattr(R, key) == filters[key])
+    if filters.get("market_type"):
+        conds.append(
+            R.market_type_id.in_(select(MarketType.id).where(MarketType.name == filters["market_type"]))
+        )
+    if filters.get("is_live") is not None:
+        conds.append(R.is_live == filters["is_live"])
+    if filters.get("status"):
+        conds.append(R.status == getattr(filters["status"], "value", filters["status"]))
+    if filters.get("date_from") or filters.get("date_to"):
+        # Tikety bez created_at datumovému filtru nevyhoví (jako NULL v SQL)
+        conds.append(R.day != R.NO_DAY)
+    if filters.get("date_from"):
+        conds.append(R.day >= filters["date_from"].date())
+    if filters.get("date_to"):
+        conds.append(R.day <= filters["date_to"].date())
+    return conds
 
-    return max_dd, round(dd_percent, 2)
 
+def _rollup_measure_columns() -> list:
+    """Agregace nad rollupem – stejné labely jako _measure_columns()."""
+    R = TicketDailyRollup
+    settled = R.status.in_([s.value for s in SETTLED_STATUSES])
 
-def get_overall_stats(db: Session, filters: dict = None) -> OverallStats:
-    """Celkové agregované statistiky včetně streak a drawdown."""
-    all_bets, settled_bets = _get_filtered_tickets(db, filters)
+    def count(*conds):
+        col = func.sum(R.bets_count)
+        return func.coalesce(col.filter(*conds) if conds else col, 0)
 
-    if not all_bets:
+    return [
+        count().label("bets"),
+        func.sum(R.stake_total).label("stake"),
+        func.sum(R.stake_total).filter(settled).label("settled_stake"),
+        func.sum(R.profit_total).filter(settled).label("profit"),
+        func.sum(R.payout_total).filter(settled).label("payout"),
+        func.sum(R.odds_total).label("odds_sum"),
+        count(settled).label("settled_count"),
+        count(R.status == TicketStatus.won.value).label("won_only"),
+        count(R.status.in_([TicketStatus.won.value, TicketStatus.half_win.value])).label("wins"),
+        count(R.status.in_([TicketStatus.lost.value, TicketStatus.half_loss.value])).label("losses"),
+        count(R.status == TicketStatus.void.value).label("voids"),
+    ]
+
+
+def _rollup_answers(filters: dict) -> bool:
+    """
+    Lze dotaz zodpovědět z denního rollupu? Rollup zná jen celé dny a kurzová pásma,
+    takže date_from musí být půlnoc, date_to konec dne a nesmí se filtrovat přesný kurz.
+    """
+    if not get_settings().stats_use_rollup:
+        return False
+    filters = filters or {}
+    if filters.get("odds_min") or filters.get("odds_max"):
+        return False
+    date_from = filters.get("date_from")
+    if date_from and date_from.time() != time(0):
+        return False
+    date_to = filters.get("date_to")
+    if date_to and date_to.time() < time(23, 59, 59):
+        return False
+    return True
+
+
+class _Source:
+    """Z čeho se počítají GROUP BY statistiky: tabulka tickets, nebo ticket_daily_rollup."""
+
+    def __init__(self, table, conditions, measures, odds_bucket, day):
+        self.table = table
+        self.conditions = conditions
+        self.measures = measures
+        self.odds_bucket = odds_bucket
+        self.day = day
+        self.sport_id = table.sport_id
+        self.bookmaker_id = table.bookmaker_id
+        self.league_id = table.league_id
+        self.market_type_id = table.market_type_id
+
+
+def _dec(value) -> Decimal:
+    """SUM() vrací NULL pro prázdnou skupinu – převést na Decimal."""
+    return Decimal(str(value)) if value is not None else Decimal("0")
+
+
+def _grouped_stat(label: str, row) -> GroupedStat:
+    """Sestaví GroupedStat z jednoho řádku agregace (_measure_columns)."""
+    settled_stake = _dec(row.settled_stake)
+    profit = _dec(row.profit)
+    return GroupedStat(
+        label=label,
+        bets_count=row.bets,
+        wins_count=row.wins,
+        losses_count=row.losses,
+        voids_count=row.voids,
+        stake_total=_dec(row.stake),
+        profit_total=profit,
+        # ROI jen z vypořádaných tiketů
+        roi_percent=round(float(profit / settled_stake * 100), 2) if settled_stake else 0,
+        avg_odds=round(float(_dec(row.odds_sum)) / row.bets, 2) if row.bets > 0 else 0,
+    )
+
+
+def _settled_sequence(db: Session, filters: dict) -> list:
+    """Vypořádané tikety jako (status, profit) seřazené podle created_at – pro streaky a drawdown."""
+    stmt = (
+        select(Ticket.status, Ticket.profit)
+        .where(*_stats_conditions(filters), Ticket.status.in_(SETTLED_STATUSES))
+        .order_by(Ticket.created_at.asc().nullsfirst(), Ticket.id.asc())
+    )
+    return db.execute(stmt).all()
+
+
+def last_equity_point(db: Session) -> Optional[TicketEquityPoint]:
+    """Poslední bod průběhu equity = aktuální globální stav (řazení _settled_sequence, opačně)."""
+    P = TicketEquityPoint
+    return db.execute(
+        select(P).order_by(P.created_at.desc().nullslast(), P.ticket_id.desc()).limit(1)
+    ).scalar_one_or_none()
+
+
+class SequenceState:
+    """Průběžné streaky a drawdown nad vypořádanými tikety v pořadí podle created_at."""
+
+    __slots__ = (
+        "current_win", "current_loss", "current_streak", "best_streak", "worst_streak",
+        "cumulative", "peak", "max_dd",
+    )
+
+    def __init__(self):
+        self.current_win = self.current_loss = 0
+        self.current_streak = self.best_streak = self.worst_streak = 0
+        self.cumulative = Decimal("0")
+        self.peak = Decimal("0")
+        self.max_dd = Decimal("0")
+
+    @classmethod
+    def from_point(cls, point) -> "SequenceState":
+        """Obnoví stav z uloženého bodu equity (TicketEquityPoint)."""
+        state = cls()
+        if point is None:
+            return state
+        state.current_streak = point.streak
+        state.current_win = max(point.streak, 0)
+        state.current_loss = max(-point.streak, 0)
+        state.best_streak = point.best_streak
+        state.worst_streak = point.worst_streak
+        state.cumulative = _dec(point.cumulative)
+        state.peak = _dec(point.peak)
+        state.max_dd = _dec(point.max_drawdown)
+        return state
+
+    def push(self, status, profit) -> None:
+        """Zapracuje další vypořádaný tiket (streak + equity křivka)."""
+        if status == TicketStatus.won:
+            self.current_win += 1
+            self.current_loss = 0
+            self.best_streak = max(self.best_streak, self.current_win)
+            self.current_streak = self.current_win
+        elif status == TicketStatus.lost:
+            self.current_loss += 1
+            self.current_win = 0
+            self.worst_streak = max(self.worst_streak, self.current_loss)
+            self.current_streak = -self.current_loss
+        else:
+            self.current_win = 0
+            self.current_loss = 0
+            self.current_streak = 0
+
+        self.cumulative += profit or 0
+        if self.cumulative > self.peak:
+            self.peak = self.cumulative
+        dd = self.peak - self.cumulative
+        if dd > self.max_dd:
+            self.max_dd = dd
+
+
+class _Measures:
+    """Součty jedné skupiny – stejné atributy jako řádek z _measure_columns()."""
+
+    __slots__ = (
+        "bets", "stake", "settled_stake", "profit", "payout", "odds_sum",
+        "settled_count", "won_only", "wins", "losses", "voids",
+    )
+
+    def __init__(self):
+        self.bets = self.settled_count = self.won_only = 0
+        self.wins = self.losses = self.voids = 0
+        self.stake = Decimal("0")
+        self.settled_stake = Decimal("0")
+        self.profit = Decimal("0")
+        self.payout = Decimal("0")
+        self.odds_sum = Decimal("0")
+
+    def add_ticket(self, status, stake, profit, payout, odds) -> None:
+        """Přičte jeden tiket (single-pass fold)."""
+        self.bets += 1
+        self.stake += stake or 0
+        self.odds_sum += odds or 0
+        if status == TicketStatus.won or status == TicketStatus.half_win:
+            self.wins += 1
+        elif status == TicketStatus.lost or status == TicketStatus.half_loss:
+            self.losses += 1
+        elif status == TicketStatus.void:
+            self.voids += 1
+        if status in SETTLED_STATUSES:
+            self.settled_count += 1
+            self.settled_stake += stake or 0
+            self.profit += profit or 0
+            self.payout += payout or 0
+            if status == TicketStatus.won:
+                self.won_only += 1
+
+    def add_row(self, row) -> None:
+        """Přičte agregovaný řádek (pro slučování skupin z SQL)."""
+        self.bets += row.bets
+        self.stake += _dec(row.stake)
+        self.settled_stake += _dec(row.settled_stake)
+        self.profit += _dec(row.profit)
+        self.payout += _dec(row.payout)
+        self.odds_sum += _dec(row.odds_sum)
+        self.settled_count += row.settled_count
+        self.won_only += row.won_only
+        self.wins += row.wins
+        self.losses += row.losses
+        self.voids += row.voids
+
+
+def _overall_from(row, seq: SequenceState) -> OverallStats:
+    """Sestaví OverallStats z agregací (řádek SQL nebo _Measures) a stavu sekvence."""
+    if not row.bets:
         return OverallStats()
 
-    bets_count = len(all_bets)
+    bets_count = row.bets
     # Celkový vklad všech tiketů (pro KPI "Celkový vklad")
-    stake_total = sum(t.stake or 0 for t in all_bets)
+    stake_total = _dec(row.stake)
     # Vklad a profit jen z vypořádaných tiketů – pro ROI a ostatní výkonnostní metriky
-    settled_stake_total = sum(t.stake or 0 for t in settled_bets)
-    profit_total = sum(t.profit or 0 for t in settled_bets)
-    payout_total = sum(t.payout or 0 for t in settled_bets)
-    avg_odds = sum(float(t.odds or 0) for t in all_bets) / bets_count if bets_count else 0
-
-    won_count = sum(1 for t in settled_bets if t.status == TicketStatus.won)
-    settled_count = len(settled_bets)
-    hit_rate = (won_count / settled_count * 100) if settled_count else 0
+    settled_stake_total = _dec(row.settled_stake)
+    profit_total = _dec(row.profit)
+    payout_total = _dec(row.payout)
+    avg_odds = float(_dec(row.odds_sum)) / bets_count
+
+    settled_count = row.settled_count
+    hit_rate = (row.won_only / settled_count * 100) if settled_count else 0
     # ROI počítáme jen z vypořádaných tiketů
     roi = (float(profit_total) / float(settled_stake_total) * 100) if settled_stake_total else 0
-
-    current_streak, best_streak, worst_streak = _compute_streaks(settled_bets)
-    max_dd, max_dd_pct = _compute_drawdown(settled_bets)
+    dd_percent = float(seq.max_dd) / float(settled_stake_total) * 100 if settled_stake_total else 0.0
 
     return OverallStats(
         bets_count=bets_count,
-        stake_total=Decimal(str(stake_total)),
-        profit_total=Decimal(str(profit_total)),
-        payout_total=Decimal(str(payout_total)),
+        stake_total=stake_total,
+        profit_total=profit_total,
+        payout_total=payout_total,
         roi_percent=round(roi, 2),
         hit_rate_percent=round(hit_rate, 2),
         avg_odds=round(avg_odds, 2),
-        current_streak=current_streak,
-        best_streak=best_streak,
-        worst_streak=worst_streak,
-        max_drawdown=max_dd,
-        max_drawdown_percent=max_dd_pct,
+        current_streak=seq.current_streak,
+        best_streak=seq.best_streak,
+        worst_streak=seq.worst_streak,
+        max_drawdown=seq.max_dd,
+        max_drawdown_percent=round(dd_percent, 2),
     )
 
 
-def _group_tickets(tickets: list, key_fn) -> List[GroupedStat]:
-    """Generický helper pro seskupení tiketů podle libovolného klíče."""
-    groups = {}
-    for t in tickets:
-        key = key_fn(t)
-        if key not in groups:
-            groups[key] = {
-                "bets": 0,
-                "stake": Decimal("0"),
-                "settled_stake": Decimal("0"),
-                "profit": Decimal("0"),
-                "wins": 0,
-                "losses": 0,
-                "voids": 0,
-                "odds_sum": 0.0
-            }
-        groups[key]["bets"] += 1
-        groups[key]["stake"] += Decimal(str(t.stake or 0))
-        groups[key]["odds_sum"] += float(t.odds or 0)
-
-        if t.status == TicketStatus.won or t.status == TicketStatus.half_win:
-            groups[key]["wins"] += 1
-        elif t.status == TicketStatus.lost or t.status == TicketStatus.half_loss:
-            groups[key]["losses"] += 1
-        elif t.status == TicketStatus.void:
-            groups[key]["voids"] += 1
-
-        if t.status in SETTLED_STATUSES:
-            groups[key]["settled_stake"] += Decimal(str(t.stake or 0))
-            groups[key]["profit"] += Decimal(str(t.profit or 0))
-
-    return [
-        GroupedStat(
-            label=name,
-            bets_count=data["bets"],
-            wins_count=data["wins"],
-            losses_count=data["losses"],
-            voids_count=data["voids"],
-            stake_total=data["stake"],
-            profit_total=data["profit"],
-            # ROI jen z vypořádaných tiketů
-            roi_percent=round(
-                float(data["profit"] / data["settled_stake"] * 100), 2
-            ) if data["settled_stake"] else 0,
-            avg_odds=round(float(data["odds_sum"] / data["bets"]), 2) if data["bets"] > 0 else 0
-        )
-        for name, data in groups.items()
-        if data["bets"] > 0
-    ]
+def get_overall_stats(db: Session, filters: dict = None, source=None) -> OverallStats:
+    """Celkové agregované statistiky včetně streak a drawdown."""
+    source = source or _TICKETS
+    row = db.execute(
+        select(*source.measures()).select_from(source.table).where(*source.conditions(filters))
+    ).one()
+
+    seq = SequenceState()
+    if row.settled_count:
+        if not filters and get_settings().stats_use_rollup:
+            # Bez filtrů = globální sekvence, její stav je uložený v ticket_equity_points
+            seq = SequenceState.from_point(last_equity_point(db))
+        else:
+            for status, profit in _settled_sequence(db, filters or {}):
+                seq.push(status, profit)
+    return _overall_from(row, seq)
 
 
 def _get_week_ranges() -> tuple[tuple[datetime, datetime], tuple[datetime, datetime]]:
@@ -221,197 +420,132 @@ def _get_week_ranges() -> tuple[tuple[datetime, datetime], tuple[datetime, datet
     return (curr_start, curr_end), (last_start, last_end)
 
 
-from app.models import Ticket, TicketStatus, Sport, MarketType, Bookmaker, League
+def _grouped_rows(db: Session, filters: dict, label_cols: list, joins: list = (), source=None):
+    """Jeden GROUP BY dotaz: label_cols + agregace, volitelně s (outer)joiny na číselníky."""
+    source = source or _TICKETS
+    stmt = select(*label_cols, *source.measures()).select_from(source.table)
+    for target, onclause, is_outer in joins:
+        stmt = stmt.join(target, onclause, isouter=is_outer)
+    stmt = stmt.where(*source.conditions(filters)).group_by(*label_cols)
+    return db.execute(stmt).all()
+
 
-def get_stats_by_sport(db: Session, filters: dict = None) -> List[GroupedStat]:
+def get_stats_by_sport(db: Session, filters: dict = None, source=None) -> List[GroupedStat]:
     """ROI a profit podle sportu."""
-    query = db.query(Ticket).join(Sport)
-    query = _exclude_aku_parents(query)
-    query = _build_filters(db, query, filters or {})
-    tickets = query.all()
-    return _group_tickets(tickets, lambda t: t.sport.name if t.sport else "Neznámý")
-
-def get_stats_by_bookmaker(db: Session, filters: dict = None) -> List[GroupedStat]:
-    """ROI a profit podle sázkové kanceláře."""
-    all_books = db.query(Bookmaker).all()
-    groups = {
-        b.name: {
-            "bets": 0,
-            "stake": Decimal("0"),
-            "settled_stake": Decimal("0"),
-            "profit": Decimal("0"),
-            "wins": 0,
-            "losses": 0,
-            "voids": 0,
-            "odds_sum": 0.0,
-        }
-        for b in all_books
-    }
+    source = source or _TICKETS
+    rows = _grouped_rows(
+        db, filters, [Sport.name.label("label")],
+        joins=[(Sport, source.sport_id == Sport.id, False)], source=source,
+    )
+    return [_grouped_stat(r.label or "Neznámý", r) for r in rows if r.bets > 0]
 
-    query = db.query(Ticket).outerjoin(Bookmaker, Ticket.bookmaker_id == Bookmaker.id)
-    query = _exclude_aku_parents(query)
-    query = _build_filters(db, query, filters or {})
-    tickets = query.all()
-
-    for t in tickets:
-        name = t.bookmaker.name if hasattr(t, 'bookmaker') and t.bookmaker else "Neznámý"
-        if name not in groups:
-            groups[name] = {
-                "bets": 0,
-                "stake": Decimal("0"),
-                "settled_stake": Decimal("0"),
-                "profit": Decimal("0"),
-                "wins": 0,
-                "losses": 0,
-                "voids": 0,
-                "odds_sum": 0.0,
-            }
-        
-        groups[name]["bets"] += 1
-        groups[name]["stake"] += Decimal(str(t.stake or 0))
-        groups[name]["odds_sum"] += float(t.odds or 0)
-
-        if t.status == TicketStatus.won or t.status == TicketStatus.half_win:
-            groups[name]["wins"] += 1
-        elif t.status == TicketStatus.lost or t.status == TicketStatus.half_loss:
-            groups[name]["losses"] += 1
-        elif t.status == TicketStatus.void:
-            groups[name]["voids"] += 1
-
-        if t.status in SETTLED_STATUSES:
-            groups[name]["settled_stake"] += Decimal(str(t.stake or 0))
-            groups[name]["profit"] += Decimal(str(t.profit or 0))
 
-    return [
-        GroupedStat(
-            label=name,
-            bets_count=data["bets"],
-            wins_count=data["wins"],
-            losses_count=data["losses"],
-            voids_count=data["voids"],
-            stake_total=data["stake"],
-            profit_total=data["profit"],
-            roi_percent=round(
-                float(data["profit"] / data["settled_stake"]) * 100, 2
-            ) if data["settled_stake"] else 0,
-            avg_odds=round(float(data["odds_sum"] / data["bets"]), 2) if data["bets"] > 0 else 0
-        )
-        for name, data in groups.items()
-    ]
+def get_stats_by_bookmaker(db: Session, filters: dict = None, source=None) -> List[GroupedStat]:
+    """ROI a profit podle sázkové kanceláře (včetně kanceláří bez tiketů)."""
+    source = source or _TICKETS
+    rows = _grouped_rows(
+        db, filters, [source.bookmaker_id.label("bookmaker_id")], source=source,
+    )
+    by_id = {r.bookmaker_id: r for r in rows}
 
-def get_stats_by_league(db: Session, filters: dict = None) -> List[GroupedStat]:
+    result = []
+    for bookmaker_id, name in db.execute(
+        select(Bookmaker.id, Bookmaker.name).order_by(Bookmaker.id)
+    ).all():
+        row = by_id.pop(bookmaker_id, None)
+        result.append(_grouped_stat(name, row) if row is not None else GroupedStat(label=name))
+    # Tikety bez sázkovky (nebo s neexistujícím bookmaker_id)
+    unknown = [r for r in by_id.values() if r.bets > 0]
+    if unknown:
+        merged = _Measures()
+        for r in unknown:
+            merged.add_row(r)
+        result.append(_grouped_stat("Neznámý", merged))
+    return result
+
+
+def get_stats_by_league(db: Session, filters: dict = None, source=None) -> List[GroupedStat]:
     """ROI a profit podle ligy."""
-    query = db.query(Ticket).outerjoin(League, Ticket.league_id == League.id)
-    query = _exclude_aku_parents(query)
-    query = _build_filters(db, query, filters or {})
-    tickets = query.all()
-    return _group_tickets(tickets, lambda t: t.league.name if hasattr(t, 'league') and t.league else "Ostatní")
+    source = source or _TICKETS
+    label = func.coalesce(League.name, "Ostatní").label("label")
+    rows = _grouped_rows(
+        db, filters, [label],
+        joins=[(League, source.league_id == League.id, True)], source=source,
+    )
+    return [_grouped_stat(r.label, r) for r in rows if r.bets > 0]
 
 
-def get_stats_by_market(db: Session, filters: dict = None) -> List[GroupedStat]:
+def get_stats_by_market(db: Session, filters: dict = None, source=None) -> List[GroupedStat]:
     """ROI a profit podle typu sázky (z tabulky MarketType)."""
-    query = db.query(Ticket).join(MarketType)
-    query = _exclude_aku_parents(query)
-    query = _build_filters(db, query, filters or {})
-    tickets = query.all()
-    
-    return _group_tickets(
-        tickets, 
-        lambda t: t.market_type_rel.name if t.market_type_rel else "Neznámý"
+    source = source or _TICKETS
+    rows = _grouped_rows(
+        db, filters, [MarketType.name.label("label")],
+        joins=[(MarketType, source.market_type_id == MarketType.id, False)], source=source,
     )
+    return [_grouped_stat(r.label or "Neznámý", r) for r in rows if r.bets > 0]
 
 
-def get_stats_by_odds_bucket(db: Session, filters: dict = None) -> List[GroupedStat]:
-    """ROI podle kurzového pásma."""
-    filters = filters or {}
-    query = db.query(Ticket)
-    query = _exclude_aku_parents(query)
-    query = _build_filters(db, query, filters)
-    tickets = query.all()
-
-    buckets = [
-        ("1.01–1.50", Decimal("1.01"), Decimal("1.50")),
-        ("1.51–2.00", Decimal("1.51"), Decimal("2.00")),
-        ("2.01–3.00", Decimal("2.01"), Decimal("3.00")),
-        ("3.01–5.00", Decimal("3.01"), Decimal("5.00")),
-        ("5.01+", Decimal("5.01"), Decimal("999")),
-    ]
+def _odds_bucket_expr():
+    """CASE výraz: kurz → název pásma (mimo pásma NULL)."""
+    return case(
+        *[(Ticket.odds.between(lo, hi), name) for name, lo, hi in ODDS_BUCKETS],
+        else_=None,
+    )
 
-    groups = {
-        name: {
-            "bets": 0,
-            "stake": Decimal("0"),
-            "settled_stake": Decimal("0"),
-            "profit": Decimal("0"),
-            "wins": 0,
-            "losses": 0,
-            "voids": 0,
-            "odds_sum": 0.0,
-        }
-        for name, _, _ in buckets
-    }
 
-    for t in tickets:
-        for name, lo, hi in buckets:
-            if lo <= Decimal(str(t.odds or 0)) <= hi:
-                groups[name]["bets"] += 1
-                groups[name]["stake"] += Decimal(str(t.stake or 0))
-                groups[name]["odds_sum"] += float(t.odds or 0)
-
-                if t.status == TicketStatus.won or t.status == TicketStatus.half_win:
-                    groups[name]["wins"] += 1
-                elif t.status == TicketStatus.lost or t.status == TicketStatus.half_loss:
-                    groups[name]["losses"] += 1
-                elif t.status == TicketStatus.void:
-                    groups[name]["voids"] += 1
-
-                if t.status in SETTLED_STATUSES:
-                    groups[name]["settled_stake"] += Decimal(str(t.stake or 0))
-                    groups[name]["profit"] += Decimal(str(t.profit or 0))
-                break
+def _rollup_day():
+    """Den z rollupu; řádky bez created_at (NO_DAY) jako NULL – stejně jako u tiketů."""
+    return case((TicketDailyRollup.day == TicketDailyRollup.NO_DAY, None), else_=TicketDailyRollup.day)
+
+
+_TICKETS = _Source(Ticket, _stats_conditions, _measure_columns, _odds_bucket_expr,
+                   lambda: Ticket.created_at)
+_ROLLUP = _Source(TicketDailyRollup, _rollup_conditions, _rollup_measure_columns,
+                  lambda: func.nullif(TicketDailyRollup.odds_bucket, ""), _rollup_day)
+
 
+def get_stats_by_odds_bucket(db: Session, filters: dict = None, source=None) -> List[GroupedStat]:
+    """ROI podle kurzového pásma."""
+    source = source or _TICKETS
+    rows = _grouped_rows(db, filters, [source.odds_bucket().label("label")], source=source)
+    by_label = {r.label: r for r in rows if r.label is not None}
     return [
-        GroupedStat(
-            label=name,
-            bets_count=groups[name]["bets"],
-            wins_count=groups[name]["wins"],
-            losses_count=groups[name]["losses"],
-            voids_count=groups[name]["voids"],
-            stake_total=groups[name]["stake"],
-            profit_total=groups[name]["profit"],
-            roi_percent=round(
-                float(groups[name]["profit"]) / float(groups[name]["settled_stake"]) * 100, 2
-            ) if groups[name]["settled_stake"] else 0,
-            avg_odds=round(groups[name]["odds_sum"] / groups[name]["bets"], 2) if groups[name]["bets"] > 0 else 0
-        )
-        for name, _, _ in buckets
-        if groups[name]["bets"] > 0
+        _grouped_stat(name, by_label[name])
+        for name, _, _ in ODDS_BUCKETS
+        if name in by_label and by_label[name].bets > 0
     ]
 
 
-def get_stats_by_month(db: Session, filters: dict = None) -> List[GroupedStat]:
+def get_stats_by_month(db: Session, filters: dict = None, source=None) -> List[GroupedStat]:
     """ROI a profit po měsících (02 - 2026)."""
-    query = db.query(Ticket)
-    query = _exclude_aku_parents(query)
-    query = _build_filters(db, query, filters or {})
-    tickets = query.all()
-
-    def month_label(t):
-        if t.created_at:
-            return t.created_at.strftime("%m - %Y")
-        return "Neznámý"
-
-    stats = _group_tickets(tickets, month_label)
-    # Seřadíme od nejnovějšího
-    try:
-        stats.sort(key=lambda s: datetime.strptime(s.label, "%m - %Y") if s.label != "Neznámý" else datetime.min, reverse=True)
-    except:
-        pass
+    source = source or _TICKETS
+    day = source.day()
+    year = extract("year", day).label("year")
+    month = extract("month", day).label("month")
+    rows = _grouped_rows(db, filters, [year, month], source=source)
+
+    dated = sorted(
+        (r for r in rows if r.year is not None and r.bets > 0),
+        key=lambda r: (int(r.year), int(r.month)),
+        reverse=True,
+    )
+    # Seřazeno od nejnovějšího, tikety bez data na konec
+    stats = [_grouped_stat(f"{int(r.month):02d} - {int(r.year)}", r) for r in dated]
+    undated = [r for r in rows if r.year is None and r.bets > 0]
+    if undated:
+        merged = _Measures()
+        for r in undated:
+            merged.add_row(r)
+        stats.append(_grouped_stat("Neznámý", merged))
     return stats
 
 
-def get_overview(db: Session, filters: dict = None) -> StatsOverview:
-    """Kompletní přehled statistik."""
+def _get_overview_sql(db: Session, filters: dict = None) -> StatsOverview:
+    """
+    Kompletní přehled statistik – každá dimenze jako jeden GROUP BY dotaz.
+    Když to filtry dovolí, jdou agregace z ticket_daily_rollup; týdny (14 dní)
+    a streaky/drawdown se počítají vždy z tiketů.
+    """
     (curr_start, curr_end), (last_start, last_end) = _get_week_ranges()
 
     base_filters = filters or {}
@@ -432,42 +566,187 @@ def get_overview(db: Session, filters: dict = None) -> StatsOverview:
     curr_week_stats = get_overall_stats(db, curr_week_filters)
     last_week_stats = get_overall_stats(db, last_week_filters)
 
-    from app.schemas.schemas import WeeklyStats
     weekly = WeeklyStats(current_week=curr_week_stats, last_week=last_week_stats)
 
+    source = _ROLLUP if _rollup_answers(filters) else _TICKETS
     return StatsOverview(
-        overall=get_overall_stats(db, filters),
+        overall=get_overall_stats(db, filters, source=source),
         weekly=weekly,
-        by_sport=get_stats_by_sport(db, filters),
-        by_bookmaker=get_stats_by_bookmaker(db, filters),
-        by_league=get_stats_by_league(db, filters),
-        by_market_type=get_stats_by_market(db, filters),
-        by_odds_bucket=get_stats_by_odds_bucket(db, filters),
-        by_month=get_stats_by_month(db, filters),
+        by_sport=get_stats_by_sport(db, filters, source=source),
+        by_bookmaker=get_stats_by_bookmaker(db, filters, source=source),
+        by_league=get_stats_by_league(db, filters, source=source),
+        by_market_type=get_stats_by_market(db, filters, source=source),
+        by_odds_bucket=get_stats_by_odds_bucket(db, filters, source=source),
+        by_month=get_stats_by_month(db, filters, source=source),
+    )
+
+
+def _in_range(created_at, date_from, date_to) -> bool:
+    """Stejná sémantika jako filtry date_from/date_to v SQL (NULL nevyhovuje)."""
+    if date_from is None and date_to is None:
+        return True
+    if created_at is None:
+        return False
+    if date_from is not None and created_at < date_from:
+        return False
+    if date_to is not None and created_at > date_to:
+        return False
+    return True
+
+
+def _get_overview_single_pass(db: Session, filters: dict = None) -> StatsOverview:
+    """
+    Kompletní přehled statistik jedním průchodem (čistě Python, bez SQL agregací).
+
+    Filtrované tikety se načtou jednou jako n-tice sloupců (ne ORM entity), seřazené
+    podle created_at. V jedné smyčce se plní overall, oba týdny, streaky, drawdown
+    i všechny skupiny (sport, sázkovka, liga, trh, kurzové pásmo, měsíc).
+    """
+    (curr_start, curr_end), (last_start, last_end) = _get_week_ranges()
+    base_filters = filters or {}
+    date_from = base_filters.get("date_from") or None
+    date_to = base_filters.get("date_to") or None
+
+    # Týdny mají vlastní datumové rozsahy – z DB bereme sjednocení hlavního rozsahu a obou týdnů
+    non_date_filters = {k: v for k, v in base_filters.items() if k not in ("date_from", "date_to")}
+    conds = [_not_aku_parent(), *_filter_conditions(non_date_filters)]
+    if date_from or date_to:
+        main_range = [
+            c for c in (
+                Ticket.created_at >= date_from if date_from else None,
+                Ticket.created_at <= date_to if date_to else None,
+            ) if c is not None
+        ]
+        conds.append(or_(and_(*main_range), Ticket.created_at.between(last_start, curr_end)))
+
+    stmt = (
+        select(
+            Ticket.status, Ticket.stake, Ticket.profit, Ticket.payout, Ticket.odds,
+            Ticket.created_at, Ticket.bookmaker_id,
+            Sport.name, League.name, MarketType.name,
+        )
+        .select_from(Ticket)
+        .join(Sport, Ticket.sport_id == Sport.id, isouter=True)
+        .join(League, Ticket.league_id == League.id, isouter=True)
+        .join(MarketType, Ticket.market_type_id == MarketType.id, isouter=True)
+        .where(*conds)
+        .order_by(Ticket.created_at.asc().nullsfirst(), Ticket.id.asc())
+        .execution_options(yield_per=2000)
     )
 
+    bookmaker_names = dict(db.execute(select(Bookmaker.id, Bookmaker.name).order_by(Bookmaker.id)).all())
+
+    overall, curr_week, last_week = _Measures(), _Measures(), _Measures()
+    overall_seq, curr_seq, last_seq = SequenceState(), SequenceState(), SequenceState()
+    by_sport: dict = {}
+    by_bookmaker: dict = {name: _Measures() for name in bookmaker_names.values()}
+    by_league: dict = {}
+    by_market: dict = {}
+    by_bucket: dict = {}
+    by_month: dict = {}
+
+    for (status, stake, profit, payout, odds, created_at, bookmaker_id,
+         sport_name, league_name, market_name) in db.execute(stmt):
+        settled = status in SETTLED_STATUSES
+
+        if _in_range(created_at, curr_start, curr_end):
+            curr_week.add_ticket(status, stake, profit, payout, odds)
+            if settled:
+                curr_seq.push(status, profit)
+        if _in_range(created_at, last_start, last_end):
+            last_week.add_ticket(status, stake, profit, payout, odds)
+            if settled:
+                last_seq.push(status, profit)
+        if not _in_range(created_at, date_from, date_to):
+            continue
+
+        overall.add_ticket(status, stake, profit, payout, odds)
+        if settled:
+            overall_seq.push(status, profit)
+
+        keys = [
+            (by_bookmaker, bookmaker_names.get(bookmaker_id, "Neznámý")),
+            (by_league, league_name or "Ostatní"),
+            (by_month, (created_at.year, created_at.month) if created_at else None),
+        ]
+        # Sport a typ sázky: jen tikety s existujícím záznamem (jako INNER JOIN v SQL variantě)
+        if sport_name is not None:
+            keys.append((by_sport, sport_name))
+        if market_name is not None:
+            keys.append((by_market, market_name))
+        bucket = odds_bucket_label(odds)
+        if bucket is not None:
+            keys.append((by_bucket, bucket))
+        for groups, key in keys:
+            measures = groups.get(key)
+            if measures is None:
+                measures = groups[key] = _Measures()
+            measures.add_ticket(status, stake, profit, payout, odds)
+
+    months = sorted((k for k in by_month if k is not None), reverse=True)
+    by_month_stats = [_grouped_stat(f"{m:02d} - {y}", by_month[(y, m)]) for y, m in months]
+    if None in by_month:
+        by_month_stats.append(_grouped_stat("Neznámý", by_month[None]))
+
+    return StatsOverview(
+        overall=_overall_from(overall, overall_seq),
+        weekly=WeeklyStats(
+            current_week=_overall_from(curr_week, curr_seq),
+            last_week=_overall_from(last_week, last_seq),
+        ),
+        by_sport=[_grouped_stat(k, m) for k, m in by_sport.items()],
+        by_bookmaker=[
+            _grouped_stat(k, m) if m.bets else GroupedStat(label=k)
+            for k, m in by_bookmaker.items()
+        ],
+        by_league=[_grouped_stat(k, m) for k, m in by_league.items()],
+        by_market_type=[_grouped_stat(k, m) for k, m in by_market.items()],
+        by_odds_bucket=[
+            _grouped_stat(name, by_bucket[name]) for name, _, _ in ODDS_BUCKETS if name in by_bucket
+        ],
+        by_month=by_month_stats,
+    )
+
+
+def _compute_overview(db: Session, filters: dict = None) -> StatsOverview:
+    if get_settings().stats_engine == "python":
+        return _get_overview_single_pass(db, filters)
+    return _get_overview_sql(db, filters)
+
+
+def get_overview(db: Session, filters: dict = None) -> StatsOverview:
+    """
+    Kompletní přehled statistik (engine podle nastavení stats_engine: "sql" | "python").
+    Výsledek se cachuje podle filtrů až do dalšího zápisu tiketů (stats_cache).
+    """
+    return stats_cache.get_or_compute("overview", filters, lambda: _compute_overview(db, filters))
+
 
 def get_timeseries(db: Session, filters: dict = None, grouping: str = "daily") -> List[TimeseriesPoint]:
     """Profit v čase (denní/týdenní)."""
     filters = filters or {}
-    query = db.query(Ticket).filter(
-        Ticket.status.in_([
-            TicketStatus.won, TicketStatus.lost,
-            TicketStatus.half_win, TicketStatus.half_loss
-        ])
-    )
-    query = _exclude_aku_parents(query)
-    query = _build_filters(db, query, filters)
-    query = query.order_by(Ticket.created_at)
-    tickets = query.all()
+    decided = [TicketStatus.won, TicketStatus.lost, TicketStatus.half_win, TicketStatus.half_loss]
+    if _rollup_answers(filters):
+        R = TicketDailyRollup
+        day = _rollup_day().label("day")
+        stmt = (
+            select(day, func.sum(R.profit_total).label("profit"), func.sum(R.bets_count).label("count"))
+            .where(R.status.in_([s.value for s in decided]), *_rollup_conditions(filters))
+            .group_by(day)
+        )
+    else:
+        day = func.date(Ticket.created_at).label("day")
+        stmt = (
+            select(day, func.sum(Ticket.profit).label("profit"), func.count(Ticket.id).label("count"))
+            .where(Ticket.status.in_(decided), *_stats_conditions(filters))
+            .group_by(day)
+        )
 
     daily = {}
-    for t in tickets:
-        day = t.created_at.strftime("%Y-%m-%d") if t.created_at else "Neznámé"
-        if day not in daily:
-            daily[day] = {"profit": Decimal("0"), "count": 0}
-        daily[day]["profit"] += t.profit or 0
-        daily[day]["count"] += 1
+    for row in db.execute(stmt).all():
+        # PostgreSQL vrací date, SQLite řetězec – sjednotit na "YYYY-MM-DD"
+        date_str = str(row.day) if row.day is not None else "Neznámé"
+        daily[date_str] = {"profit": _dec(row.profit), "count": row.count}
 
     result = []
     cumulative = Decimal("0")
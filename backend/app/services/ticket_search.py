@@ -0,0 +1,80 @@
+"""
+Hledání v tiketech (parametr search v GET /api/tickets a exportu).
+
+PostgreSQL: ILIKE nad jedním textem z týmů, trhu a výběru – ten má GIN trigram index
+(migrace add_ticket_search_trgm), řazení podle word_similarity (pg_trgm).
+Ostatní DB (SQLite při vývoji): původních pět ILIKE a jednoduché řazení
+(shoda na začátku názvu týmu první).
+"""
+from sqlalchemy import Numeric, case, cast, func, literal_column, or_, select
+from sqlalchemy.orm import Session
+
+from app.models import League, Ticket
+
+# Počet desetinných míst relevance (float4 má ~7 platných číslic)
+_RANK_DIGITS = 6
+
+
+def _is_postgres(db: Session) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def search_document():
+    """
+    Prohledávaný text tiketu. Výraz musí přesně odpovídat indexu ix_tickets_search_trgm,
+    jinak ho PostgreSQL nepoužije (proto literály místo bind parametrů).
+    """
+    sep = literal_column("' '")
+    empty = literal_column("''")
+    return (
+        func.coalesce(Ticket.home_team, empty) + sep
+        + func.coalesce(Ticket.away_team, empty) + sep
+        + func.coalesce(Ticket.market_label, empty) + sep
+        + func.coalesce(Ticket.selection, empty)
+    )
+
+
+def search_condition(db: Session, search: str):
+    """WHERE podmínka pro hledaný text (týmy, liga, trh, výběr)."""
+    pattern = f"%{search}%"
+    # Lig je málo – jejich id dohledat předem, ať jde OR složit z indexů (BitmapOr)
+    # místo subquery, kvůli které by PostgreSQL skenoval celou tabulku tickets
+    league_ids = db.scalars(select(League.id).where(League.name.ilike(pattern))).all()
+    if _is_postgres(db):
+        conds = [search_document().ilike(pattern)]
+    else:
+        conds = [
+            Ticket.home_team.ilike(pattern),
+            Ticket.away_team.ilike(pattern),
+            Ticket.market_label.ilike(pattern),
+            Ticket.selection.ilike(pattern),
+        ]
+    if league_ids:
+        conds.append(Ticket.league_id.in_(league_ids))
+    return or_(*conds)
+
+
+def search_rank(db: Session, search: str):
+    """
+    Výraz pro řazení podle relevance (vyšší = lepší). Hodnota jde do keyset cursoru, proto
+    musí po návratu jako bind parametr přesně odpovídat: word_similarity je real (float4)
+    a PostgreSQL by ho při porovnání s float8 z cursoru převedl (0.33333334 ≠ 0.3333333432…),
+    takže se zaokrouhluje na numeric (v cursoru Decimal).
+    """
+    if _is_postgres(db):
+        league_rank = (
+            select(func.word_similarity(search, League.name))
+            .where(League.id == Ticket.league_id)
+            .scalar_subquery()
+        )
+        rank = func.greatest(
+            func.word_similarity(search, search_document()),
+            func.coalesce(league_rank, 0),
+        )
+        return cast(func.round(cast(rank, Numeric), _RANK_DIGITS), Numeric)
+    prefix = f"{search}%"
+    return case(
+        (or_(Ticket.home_team.ilike(prefix), Ticket.away_team.ilike(prefix)), 2),
+        (or_(Ticket.market_label.ilike(prefix), Ticket.selection.ilike(prefix)), 1),
+        else_=0,
+    )
@@ -0,0 +1,120 @@
+"""
+Export výsledků dotazu do sloupcových formátů (Parquet, Arrow IPC stream) po record batchích.
+
+Typy sloupců se odvodí z SQLAlchemy typů (Numeric → decimal128, DateTime → timestamp, …),
+takže se v notebooku načtou bez parsování. pyarrow je volitelná závislost – importuje se
+až při exportu (require_pyarrow).
+"""
+import enum
+from typing import Iterable, Iterator, Sequence
+
+from sqlalchemy import types as sqltypes
+
+FORMATS = {
+    # formát: (media type, přípona souboru)
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+}
+
+
+class ColumnarUnavailable(RuntimeError):
+    pass
+
+
+def require_pyarrow():
+    """Vrátí modul pyarrow, nebo vyhodí ColumnarUnavailable, pokud není nainstalovaný."""
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ColumnarUnavailable("Export Parquet/Arrow vyžaduje balíček pyarrow (pip install pyarrow)") from e
+    return pyarrow
+
+
+def _arrow_type(pa, sql_type):
+    if isinstance(sql_type, sqltypes.Boolean):
+        return pa.bool_()
+    if isinstance(sql_type, sqltypes.Integer):
+        return pa.int64()
+    if isinstance(sql_type, sqltypes.Numeric) and sql_type.asdecimal and sql_type.precision is not None:
+        return pa.decimal128(sql_type.precision, sql_type.scale or 0)
+    if isinstance(sql_type, sqltypes.Float):
+        return pa.float64()
+    if isinstance(sql_type, sqltypes.DateTime):
+        return pa.timestamp("us")
+    if isinstance(sql_type, sqltypes.Date):
+        return pa.date32()
+    return pa.string()
+
+
+def arrow_schema(names: Sequence[str], sql_types: Sequence):
+    pa = require_pyarrow()
+    return pa.schema([pa.field(name, _arrow_type(pa, t)) for name, t in zip(names, sql_types)])
+
+
+def _plain(value):
+    return value.value if isinstance(value, enum.Enum) else value
+
+
+class _StreamSink:
+    """Zapisovatelný „soubor“ pro pyarrow: zapsaná data se průběžně odebírají přes take(), pozice roste dál."""
+
+    closed = False
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_columnar(rows: Iterable[Sequence], names: Sequence[str], sql_types: Sequence, fmt: str,
+                  batch_rows: int = 10000) -> Iterator[bytes]:
+    """
+    Zapíše řádky (tuple ve stejném pořadí jako names) jako Parquet nebo Arrow IPC stream.
+    Každých batch_rows řádků = jeden record batch (u Parquetu row group), vrací se hned jako bytes.
+    """
+    pa = require_pyarrow()
+    schema = arrow_schema(names, sql_types)
+    sink = _StreamSink()
+    out = pa.PythonFile(sink, mode="w")
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        writer = pq.ParquetWriter(out, schema, compression="zstd")
+    elif fmt == "arrow":
+        writer = pa.ipc.new_stream(out, schema, options=pa.ipc.IpcWriteOptions(compression="zstd"))
+    else:
+        raise ValueError(f"Neznámý formát exportu: {fmt}")
+
+    def write(batch: list):
+        columns = [pa.array([_plain(v) for v in col], type=field.type) for col, field in zip(zip(*batch), schema)]
+        writer.write_batch(pa.RecordBatch.from_arrays(columns, schema=schema))
+
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_rows:
+            write(batch)
+            batch = []
+            yield sink.take()
+    if batch:
+        write(batch)
+    writer.close()
+    yield sink.take()
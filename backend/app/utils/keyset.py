@@ -0,0 +1,96 @@
+"""
+Keyset (cursor) stránkování: místo OFFSET se další stránka hledá podmínkou
+"řádek je v pořadí za posledním řádkem předchozí stránky".
+
+Pořadí popisuje seznam SortPart (výraz, směr, může být NULL). NULL hodnoty jsou
+vždy na konci (NULLS LAST) – ORDER BY i podmínka se skládají ze stejného seznamu.
+Cursor je neprůhledný řetězec (base64 JSON s hodnotami řadicích výrazů a podpisem
+řazení, aby nešel použít s jiným řazením).
+"""
+import base64
+import enum
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, NamedTuple, Optional, Sequence
+
+from sqlalchemy import and_, or_
+
+
+class SortPart(NamedTuple):
+    expr: Any
+    desc: bool
+    nullable: bool = False
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def order_by_clauses(spec: Sequence[SortPart]) -> list:
+    clauses = []
+    for part in spec:
+        clause = part.expr.desc() if part.desc else part.expr.asc()
+        clauses.append(clause.nullslast() if part.nullable else clause)
+    return clauses
+
+
+def after_condition(spec: Sequence[SortPart], values: Sequence[Any]):
+    """WHERE: řádky, které jsou v pořadí spec až za řádkem s hodnotami values."""
+    alternatives = []
+    equal_so_far = []
+    for part, value in zip(spec, values):
+        if value is not None:
+            step = part.expr < value if part.desc else part.expr > value
+            if part.nullable:
+                step = or_(step, part.expr.is_(None))
+            alternatives.append(and_(*equal_so_far, step))
+            equal_so_far.append(part.expr == value)
+        else:
+            # Za NULL (NULLS LAST) už v tomto sloupci nic není – rozhodují další sloupce
+            equal_so_far.append(part.expr.is_(None))
+    return or_(*alternatives)
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"dec": str(value)}
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+        if "dec" in value:
+            return Decimal(value["dec"])
+        raise InvalidCursor("Neznámý typ hodnoty v cursoru")
+    return value
+
+
+def encode_cursor(signature: str, values: Sequence[Any]) -> str:
+    payload = json.dumps({"s": signature, "v": [_encode_value(v) for v in values]}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, signature: str, size: int) -> Optional[list]:
+    """Vrátí hodnoty z cursoru; InvalidCursor, pokud je poškozený nebo patří k jinému řazení."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        values = [_decode_value(v) for v in payload["v"]]
+    except InvalidCursor:
+        raise
+    except Exception as e:
+        raise InvalidCursor("Neplatný cursor") from e
+    if payload.get("s") != signature or len(values) != size:
+        raise InvalidCursor("Cursor patří k jinému řazení")
+    return values
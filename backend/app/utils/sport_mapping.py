@@ -8,10 +8,19 @@ sportu v systému → _map_sport_label_to_id(db, label) najde nebo vytvoří Spo
 Kontrolní přehled (Ticket_Mapping):
   Fortuna: 0i=Basketbal, 00=Fotbal, 0w=Hokej, 0m=Volejbal, 07=Ragby→Rugby, 0y=Házená→Handball, 0x=Tenis
   Betano:  BASK, ICEH, FOOT, HAND, TENN, ESPS → Basketbal, Hokej, Fotbal, Házená, Tenis, Esport
+  Tipsport: CSS class ikony sportu (kVnpal=Tenis, jnbgNp=Fotbal, …), SVG icon id zatím nemapované
+
+Tabulky jsou neměnné (MappingProxyType) a sestavené jednou při importu modulu;
+převody volané pro každý scrapený tiket jsou memoizované.
 """
+import re
+from functools import lru_cache
+from types import MappingProxyType
+
+_CACHE_SIZE = 512
 
 # ─── Fortuna (ifortuna.cz) – kód ikony z URL ufo-sprt-XX.png (Ticket_Mapping cca ř. 56–62) ─
-FORTUNA_ICON_TO_LABEL = {
+_FORTUNA_ICON_TO_LABEL = {
     "0i": "Basketbal",
     "00": "Fotbal",
     "0w": "Hokej",
@@ -21,7 +30,7 @@ FORTUNA_ICON_TO_LABEL = {
     "0x": "Tenis",
 }
 # Staré číselné kódy (pro zpětnou kompatibilitu)
-FORTUNA_ICON_TO_LABEL.update({
+_FORTUNA_ICON_TO_LABEL.update({
     "01": "Fotbal",
     "02": "Hokej",
     "03": "Basketbal",
@@ -31,29 +40,59 @@ FORTUNA_ICON_TO_LABEL.update({
     "08": "Darts",
     "09": "Ostatní",
 })
+FORTUNA_ICON_TO_LABEL = MappingProxyType(_FORTUNA_ICON_TO_LABEL)
 
 # ─── Betano – prefix z názvu ikony /myaccount/web/img/XXX...svg (viz Ticket_Mapping) ─
-BETANO_ICON_TO_LABEL = {
+BETANO_ICON_TO_LABEL = MappingProxyType({
     "bask": "Basketbal",
     "iceh": "Hokej",
     "foot": "Fotbal",
     "hand": "Házená",
     "tenn": "Tenis",
     "esps": "Esport",
-}
+})
+# Jeden průchod cestou ikony místo testu každého prefixu zvlášť
+_BETANO_ICON_RE = re.compile("|".join(re.escape(prefix) for prefix in BETANO_ICON_TO_LABEL))
+
+# ─── Tipsport – CSS class ikony sportu (viz Sports_div) ────────────────────────
+TIPSPORT_SPORT_CLASS_TO_LABEL = MappingProxyType({
+    "kVnpal": "Tenis",
+    "jllVcZ": "Basketbal",
+    "jnbgNp": "Fotbal",
+    "gKUVDg": "Darts",
+    "zxSYL": "Esport",
+    "dmDmCn": "Hokej",
+    "dmOtSE": "Rugby",
+    "jsqJWx": "Lacros",
+    "fZIZDk": "Handball",
+})
+
+# Tipsport SVG icon id (z <use xlink:href>) – hodnoty se mohou časem měnit
+TIPSPORT_ICON_TO_LABEL = MappingProxyType({
+    # TODO: doplnit podle reálných ikon z Tipsportu (přes DevTools).
+    # Příklady:
+    # "#i173": "Esport",
+    # "#iXXX": "Fotbal",
+    # "#iYYY": "Basketbal",
+})
 
 # ─── Aliasy: název od sázkovky → název v DB (seed má Rugby, Handball; Fortuna používá Ragby, Házená) ─
-SPORT_LABEL_ALIASES = {
+SPORT_LABEL_ALIASES = MappingProxyType({
     "ragby": "Rugby",
     "házená": "Handball",
     "hazena": "Handball",
-}
+})
 
 
 def normalize_sport_label_for_db(label: str | None) -> str | None:
     """Převede název sportu od sázkovky na název používaný v našem systému (seed)."""
     if not label or not isinstance(label, str):
         return None
+    return _normalize_sport_label(label)
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def _normalize_sport_label(label: str) -> str | None:
     s = label.strip()
     if not s:
         return None
@@ -78,8 +117,25 @@ def betano_icon_to_label(icon_id: str | None) -> str | None:
     """Vrátí název sportu pro Betano ikonu (např. 'ICEH.GPAXOrbS' nebo cesta s 'foot')."""
     if not icon_id:
         return None
-    src = str(icon_id).lower()
-    for prefix, name in BETANO_ICON_TO_LABEL.items():
-        if prefix in src:
-            return name
-    return None
+    return _betano_icon_to_label(str(icon_id))
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def _betano_icon_to_label(icon_id: str) -> str | None:
+    # První (nejlevější) prefix v cestě ikony
+    match = _BETANO_ICON_RE.search(icon_id.lower())
+    return BETANO_ICON_TO_LABEL[match.group()] if match else None
+
+
+def tipsport_class_to_label(sport_class: str | None) -> str | None:
+    """Vrátí název sportu pro CSS class ikony sportu z Tipsportu; neznámé vrací None."""
+    if not sport_class:
+        return None
+    return TIPSPORT_SPORT_CLASS_TO_LABEL.get(sport_class.strip())
+
+
+def tipsport_icon_to_label(icon_id: str | None) -> str | None:
+    """Vrátí název sportu pro Tipsport SVG icon id; neznámé vrací None."""
+    if not icon_id:
+        return None
+    return TIPSPORT_ICON_TO_LABEL.get(icon_id.strip())
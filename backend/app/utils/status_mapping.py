@@ -0,0 +1,100 @@
+"""
+Klasifikace surového stavu tiketu ze scraperů (status_raw) na TicketStatus.
+
+Tabulky klíčových slov jsou modulové a neměnné, každá kategorie má jeden předkompilovaný
+regex (alternace klíčových slov) a kategorie se zkoušejí v pořadí priority – stejně jako
+dřívější řetězy `any(x in val for x in …)` v importních routerech. Výsledek závisí jen na
+textu, proto je klasifikace memoizovaná (scraper posílá pořád dokola pár stejných hodnot);
+fallback podle payout řeší až routery, payout se do cache nedostane.
+
+Použití: _map_status v tipsport_import / betano_import / fortuna_import.
+"""
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from types import MappingProxyType
+
+from app.models import TicketStatus
+
+# Počet různých status_raw v cache (reálně jich jsou jednotky až desítky)
+_CACHE_SIZE = 512
+
+
+def _keywords(*words: str) -> re.Pattern:
+    """Jeden regex pro „obsahuje některé ze slov“ (nejdelší slova první)."""
+    return re.compile("|".join(re.escape(w) for w in sorted(words, key=len, reverse=True)))
+
+
+# ─── Tipsport – ikona stavu (Sports_div), pak text ─────────────────────────────
+TIPSPORT_STATUS_RULES: tuple[tuple[re.Pattern, TicketStatus], ...] = (
+    # "#i170" i holé "i170"
+    (_keywords("i170"), TicketStatus.won),
+    (_keywords("i243"), TicketStatus.void),
+    (_keywords("i173"), TicketStatus.lost),
+    (_keywords("i172"), TicketStatus.open),
+    (_keywords("void", "vrácen", "vraceno", "vráceno", "zrušen", "zrusen", "refund", "ignored", "dropped"), TicketStatus.void),
+    (_keywords("open", "čeká", "ceka", "pending", "nezúčt", "nevyhod"), TicketStatus.open),
+    (_keywords("won", "výhra", "vyhr", "✔", "✅"), TicketStatus.won),
+    (_keywords("lost", "prohra", "✗", "❌"), TicketStatus.lost),
+)
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def tipsport_raw_status(raw: str) -> TicketStatus | None:
+    """Stav podle textu/ikony z Tipsportu; None = nerozpoznáno (rozhodne payout)."""
+    val = raw.strip().lower()
+    for pattern, status in TIPSPORT_STATUS_RULES:
+        if pattern.search(val):
+            return status
+    return None
+
+
+# ─── Betano – text výsledku tiketu ─────────────────────────────────────────────
+BETANO_OPEN_VALUES = frozenset({
+    "open", "čeká", "ceka", "nevyhodnoceno", "pending", "waiting", "otevřená", "otevrena", "",
+})
+BETANO_STATUS_RULES: tuple[tuple[re.Pattern, str], ...] = (
+    (_keywords("čeká", "nevyhodnoceno", "pending", "waiting"), "open"),
+    (_keywords("výhry", "vyhry", "win"), "won"),
+    (_keywords("prohry", "prohra", "lost"), "lost"),
+    (_keywords("cash out"), "cash_out"),
+)
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def betano_raw_status(raw: str) -> str | None:
+    """
+    Kategorie textu z Betana: "open", "won", "lost", "cash_out" nebo None (nerozpoznáno).
+    "open" má přednost před payout, ostatní kategorie až po něm (viz betano_import._map_status).
+    """
+    val = raw.strip().lower()
+    if val in BETANO_OPEN_VALUES:
+        return "open"
+    for pattern, category in BETANO_STATUS_RULES:
+        if pattern.search(val):
+            return category
+    return None
+
+
+# ─── Fortuna – třída cic_ticket-* převedená extension na won/lost/void/waiting ─
+FORTUNA_STATUS = MappingProxyType({
+    "waiting": TicketStatus.open,
+    "open": TicketStatus.open,
+    "čeká": TicketStatus.open,
+    "nevyhodnoceno": TicketStatus.open,
+    "pending": TicketStatus.open,
+    "": TicketStatus.open,
+    "won": TicketStatus.won,
+    "win": TicketStatus.won,
+    "výhra": TicketStatus.won,
+    "lost": TicketStatus.lost,
+    "prohra": TicketStatus.lost,
+    "void": TicketStatus.void,
+    "vráceno": TicketStatus.void,
+})
+
+
+def fortuna_raw_status(raw: str | None) -> TicketStatus | None:
+    """Stav z Fortuny (přesná shoda); None = nerozpoznáno (rozhodne payout)."""
+    return FORTUNA_STATUS.get((raw or "").strip().lower())
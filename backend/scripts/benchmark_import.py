@@ -0,0 +1,247 @@
+"""
+Benchmark importů ze scraperu: přehraje nahrané payloady Tipsport/Betano/Fortuna
+(tělo POST /api/import/<sázkovka>/scrape) synteticky zvětšené na --tickets tiketů
+a změří náhled i import přes import_pipeline (stejný kód jako endpointy /scrape a /scrape/preview).
+
+Fáze pro každou sázkovku (všechny nad jednou DB, sázkovky se navzájem neovlivní):
+  preview            – náhled nad prázdnou DB (všechny tikety nové)
+  import             – první import (všechno se zakládá)
+  reimport           – stejný payload znovu (všechny tikety jsou duplicity beze změny)
+  preview (dupl.)    – náhled po importu (všechno duplicity)
+
+Pro každou fázi: tikety/s, počet SQL příkazů na tiket a špička paměti (tracemalloc –
+zpomaluje Python kód, pro čisté časy --no-memory).
+
+Výchozí payloady jsou v scripts/benchmark_payloads (záznamy podle Ticket_Mapping);
+vlastní nahraný payload: v DevTools extension Network → scrape → Copy request payload.
+
+Použití (z adresáře backend):
+  python -m scripts.benchmark_import                                  # dočasná SQLite, 10 000 tiketů na sázkovku
+  python -m scripts.benchmark_import --bookmaker tipsport --payload moje_tikety.json
+  python -m scripts.benchmark_import --database-url postgresql://…/bettracker_bench
+  python -m scripts.benchmark_import --json vysledek.json             # uložit výsledky
+  python -m scripts.benchmark_import --compare vysledek.json          # regrese proti uloženému běhu → exit 1
+
+--database-url musí ukazovat na prázdnou DB jen pro benchmark (tabulky se vytvoří, data v ní zůstanou).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Cesta k backendu (parent of scripts/) kvůli importu app
+_backend = Path(__file__).resolve().parent.parent
+if str(_backend) not in sys.path:
+    sys.path.insert(0, str(_backend))
+
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import Ticket
+from app.routers import betano_import, fortuna_import, tipsport_import
+from app.schemas import BetanoScrapeTicketIn, FortunaScrapeTicketIn, TipsportScrapeTicketIn
+from app.services import import_pipeline
+
+_PAYLOAD_DIR = Path(__file__).resolve().parent / "benchmark_payloads"
+
+# sázkovka → (plugin, model tiketu, pole s klíčem sázkovky)
+_BOOKMAKERS = {
+    "tipsport": (tipsport_import._PLUGIN, TipsportScrapeTicketIn, "tipsport_key"),
+    "betano": (betano_import._PLUGIN, BetanoScrapeTicketIn, "betano_key"),
+    "fortuna": (fortuna_import._PLUGIN, FortunaScrapeTicketIn, "fortuna_key"),
+}
+
+_PHASES = ("preview", "import", "reimport", "preview (dupl.)")
+
+# Povolené zhoršení proti --compare (podíl)
+_DEFAULT_TOLERANCE = 0.25
+
+
+def _load_payload(path: Path) -> list[dict]:
+    data = json.loads(path.read_text(encoding="utf-8"))
+    return data.get("tickets", []) if isinstance(data, dict) else data
+
+
+def _scale(tickets: list[dict], size: int, key_field: str) -> list[dict]:
+    """
+    Zvětší nahraný payload na size tiketů: kopie č. n má vlastní klíč, týmy s číslem kopie
+    a čas posunutý o n dní, takže v DB jde o různé tikety (dedupe je nespáruje ani podle
+    týmů a času – AKU rodiče mají u Tipsportu všichni stejné "týmy").
+    """
+    out = []
+    for n in range(size):
+        src = tickets[n % len(tickets)]
+        copy_no = n // len(tickets)
+        ticket = dict(src)
+        if copy_no:
+            suffix = f" {copy_no}"
+            ticket["home_team"] = src["home_team"] + suffix
+            ticket["away_team"] = src["away_team"] + suffix
+            if src.get(key_field):
+                ticket[key_field] = f"{src[key_field]}-{copy_no}"
+            for field in ("placed_at", "event_start_at"):
+                if src.get(field):
+                    ticket[field] = (datetime.fromisoformat(src[field]) + timedelta(days=copy_no)).isoformat()
+            if src.get("legs"):
+                ticket["legs"] = [
+                    {**leg, "home_team": leg["home_team"] + suffix, "away_team": leg["away_team"] + suffix}
+                    for leg in src["legs"]
+                ]
+        out.append(ticket)
+    return out
+
+
+class _QueryCounter:
+    """Počet SQL příkazů odeslaných enginem (executemany = jeden)."""
+
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args) -> None:
+        self.count += 1
+
+
+def _measure(name: str, fn, n_tickets: int, counter: _QueryCounter, memory: bool) -> dict:
+    if memory:
+        tracemalloc.start()
+    counter.count = 0
+    started = time.perf_counter()
+    summary = fn()
+    elapsed = time.perf_counter() - started
+    peak = None
+    if memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    result = {
+        "tickets": n_tickets,
+        "seconds": round(elapsed, 3),
+        "tickets_per_sec": round(n_tickets / elapsed, 1) if elapsed else None,
+        "queries": counter.count,
+        "queries_per_ticket": round(counter.count / n_tickets, 3) if n_tickets else None,
+        "peak_mib": round(peak / 2**20, 1) if peak is not None else None,
+        "summary": summary,
+    }
+    memory_text = f"{result['peak_mib']:8.1f} MiB" if memory else ""
+    print(
+        f"  {name:<16} {elapsed:8.2f} s  {result['tickets_per_sec']:9.1f} tiketů/s  "
+        f"{result['queries_per_ticket']:7.3f} dotazů/tiket  {memory_text}  {summary}"
+    )
+    return result
+
+
+def _bench_bookmaker(Session, counter, bookmaker: str, raw: list[dict], size: int, memory: bool) -> dict:
+    plugin, model, key_field = _BOOKMAKERS[bookmaker]
+    payload = _scale(raw, size, key_field)
+    print(f"\n===== {bookmaker}: {len(payload)} tiketů (nahraných {len(raw)}) =====")
+
+    def phase(run):
+        # Stejně jako endpoint: validace payloadu + import nad novou Session
+        def call():
+            items = [model.model_validate(t) for t in payload]
+            with Session() as db:
+                return run(db, items)
+        return call
+
+    def preview(db, items):
+        response = import_pipeline.run_preview(db, plugin, items)
+        return {"new": len(response["new_tickets"]), "skipped": response["skipped_count"]}
+
+    def import_(db, items):
+        response = import_pipeline.run_import(db, plugin, items)
+        response.pop("results")
+        return response
+
+    runs = {"preview": preview, "import": import_, "reimport": import_, "preview (dupl.)": preview}
+    return {name: _measure(name, phase(runs[name]), len(payload), counter, memory) for name in _PHASES}
+
+
+def _compare(results: dict, baseline_path: str, tolerance: float) -> int:
+    """Vypíše regrese proti uloženému běhu; vrací jejich počet."""
+    baseline = json.loads(Path(baseline_path).read_text(encoding="utf-8"))
+    regressions = 0
+    print(f"\n===== Srovnání s {baseline_path} (tolerance {tolerance:.0%}) =====")
+    for bookmaker, phases in results.items():
+        for name, now in phases.items():
+            before = baseline.get(bookmaker, {}).get(name)
+            if not before:
+                continue
+            checks = [
+                ("tiketů/s", before["tickets_per_sec"], now["tickets_per_sec"], True),
+                ("dotazů/tiket", before["queries_per_ticket"], now["queries_per_ticket"], False),
+                ("MiB", before.get("peak_mib"), now.get("peak_mib"), False),
+            ]
+            for label, old, new, higher_is_better in checks:
+                if not old or new is None:
+                    continue
+                change = (new - old) / old
+                worse = -change if higher_is_better else change
+                if worse > tolerance:
+                    regressions += 1
+                    print(f"  REGRESE {bookmaker} / {name}: {label} {old} → {new} ({change:+.0%})")
+    if not regressions:
+        print("  bez regresí")
+    return regressions
+
+
+def run(args) -> int:
+    bookmakers = [args.bookmaker] if args.bookmaker else list(_BOOKMAKERS)
+    tmp_dir = None
+    database_url = args.database_url
+    if database_url is None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        database_url = f"sqlite:///{tmp_dir.name}/benchmark.db"
+    engine = create_engine(database_url)
+    results = {}
+    try:
+        Base.metadata.create_all(engine)
+        with engine.connect() as conn:
+            if conn.execute(select(func.count()).select_from(Ticket)).scalar():
+                print("Databáze není prázdná – benchmark potřebuje DB jen pro sebe (--database-url).")
+                return 2
+        Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        counter = _QueryCounter(engine)
+        print(f"DB: {engine.url.render_as_string(hide_password=True)}")
+        for bookmaker in bookmakers:
+            path = Path(args.payload) if args.payload else _PAYLOAD_DIR / f"{bookmaker}.json"
+            results[bookmaker] = _bench_bookmaker(
+                Session, counter, bookmaker, _load_payload(path), args.tickets, not args.no_memory,
+            )
+    finally:
+        engine.dispose()
+        if tmp_dir is not None:
+            tmp_dir.cleanup()
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"\nVýsledky uloženy do {args.json}")
+    if args.compare:
+        return 1 if _compare(results, args.compare, args.tolerance) else 0
+    return 0
+
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark náhledu a importu tiketů ze scraperu.")
+    p.add_argument("--bookmaker", choices=list(_BOOKMAKERS), help="Jen jedna sázkovka (bez něj všechny)")
+    p.add_argument("--payload", help="Nahraný payload /scrape ({\"tickets\": [...]}); vyžaduje --bookmaker")
+    p.add_argument("--tickets", type=int, default=10000, help="Počet tiketů po zvětšení payloadu")
+    p.add_argument("--database-url", help="Prázdná DB pro benchmark (PostgreSQL); bez něj dočasná SQLite")
+    p.add_argument("--no-memory", action="store_true", help="Neměřit paměť (tracemalloc zkresluje časy)")
+    p.add_argument("--json", help="Uložit výsledky do JSON (pro pozdější --compare)")
+    p.add_argument("--compare", help="JSON z dřívějšího běhu; při regresi skončí s kódem 1")
+    p.add_argument("--tolerance", type=float, default=_DEFAULT_TOLERANCE, help="Povolené zhoršení (0.25 = 25 %%)")
+    args = p.parse_args()
+    if args.payload and not args.bookmaker:
+        p.error("--payload vyžaduje --bookmaker")
+    sys.exit(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""
+Mikro-benchmark: klasifikace stavu a sportu scrapených tiketů (_map_status, mapování ikon
+sportu) – předkompilované tabulky z app.utils.status_mapping / sport_mapping proti
+původním řetězům `any(x in val …)` a slovníkům skládaným při každém volání.
+
+Payload je tělo požadavku POST /api/import/<sázkovka>/scrape, jak ho posílá extension
+(v DevTools: Network → scrape → Copy request payload, uložit do souboru). Bez --payload
+se použije vestavěný vzorek s hodnotami, které content.js reálně posílá.
+
+Obě implementace musí pro každý tiket vrátit totéž – rozdíl skript vypíše a skončí chybou.
+
+Použití (z adresáře backend):
+  python -m scripts.benchmark_import_classification
+  python -m scripts.benchmark_import_classification --payload tipsport.json --bookmaker tipsport
+  python -m scripts.benchmark_import_classification --repeat 200
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from decimal import Decimal
+from pathlib import Path
+
+# Cesta k backendu (parent of scripts/) kvůli importu app
+_backend = Path(__file__).resolve().parent.parent
+if str(_backend) not in sys.path:
+    sys.path.insert(0, str(_backend))
+
+from app.models import TicketStatus
+from app.routers import betano_import, fortuna_import, tipsport_import
+from app.utils import sport_mapping, status_mapping
+
+# Vzorek hodnot ze scraperů (content.js): status_raw, sport, payout
+_SAMPLE = {
+    "tipsport": [
+        {"status_raw": "won", "sport_class": "jnbgNp", "payout": "103"},
+        {"status_raw": "lost", "sport_class": "kVnpal", "payout": "0"},
+        {"status_raw": "open", "sport_class": "dmDmCn", "payout": None},
+        {"status_raw": "unresolved", "sport_class": "jllVcZ", "payout": None},
+        {"status_raw": "ignored", "sport_class": "sc-unknown", "payout": None},
+        {"status_raw": "void", "sport_class": "zxSYL", "payout": "50"},
+        {"status_raw": None, "sport_class": None, "payout": "210"},
+    ],
+    "betano": [
+        {"status_raw": "open", "sport_icon_id": "/myaccount/web/img/FOOT.a1b2c3.svg", "payout": None},
+        {"status_raw": "výhry", "sport_icon_id": "/myaccount/web/img/ICEH.GPAXOrbS.svg", "payout": "180"},
+        {"status_raw": "prohry", "sport_icon_id": "/myaccount/web/img/TENN.x9y8.svg", "payout": "0"},
+        {"status_raw": "cash out", "sport_icon_id": "/myaccount/web/img/BASK.q1w2.svg", "payout": "35"},
+        {"status_raw": "čeká na vyhodnocení", "sport_icon_id": "/myaccount/web/img/ESPS.e3r4.svg", "payout": None},
+    ],
+    "fortuna": [
+        {"status_raw": "won", "sport_icon_id": "00", "payout": "150"},
+        {"status_raw": "lost", "sport_icon_id": "0w", "payout": "0"},
+        {"status_raw": "waiting", "sport_icon_id": "0x", "payout": None},
+        {"status_raw": "void", "sport_icon_id": "07", "payout": "100"},
+        {"status_raw": "open", "sport_icon_id": "0y", "payout": None},
+    ],
+}
+
+
+# ─── Původní implementace (pro srovnání) ──────────────────────────────────────
+def _baseline_tipsport_status(raw, payout):
+    if raw:
+        val = raw.strip().lower()
+        if "#i170" in val or "i170" in val:
+            return TicketStatus.won
+        if "#i243" in val or "i243" in val:
+            return TicketStatus.void
+        if "#i173" in val or "i173" in val:
+            return TicketStatus.lost
+        if "#i172" in val or "i172" in val:
+            return TicketStatus.open
+        if any(x in val for x in ("void", "vrácen", "vraceno", "vráceno", "zrušen", "zrusen", "refund", "ignored", "dropped")):
+            return TicketStatus.void
+        if any(x in val for x in ("open", "čeká", "ceka", "pending", "nezúčt", "nevyhod")):
+            return TicketStatus.open
+        if any(x in val for x in ("won", "výhra", "vyhr", "✔", "✅")):
+            return TicketStatus.won
+        if any(x in val for x in ("lost", "prohra", "✗", "❌")):
+            return TicketStatus.lost
+    if payout is not None:
+        if Decimal(payout) > 0:
+            return TicketStatus.won
+        if Decimal(payout) == 0:
+            return TicketStatus.lost
+    return TicketStatus.open
+
+
+def _baseline_tipsport_sport(sport_class):
+    if not sport_class:
+        return None
+    mapping = {
+        "kVnpal": "Tenis", "jllVcZ": "Basketbal", "jnbgNp": "Fotbal", "gKUVDg": "Darts", "zxSYL": "Esport",
+        "dmDmCn": "Hokej", "dmOtSE": "Rugby", "jsqJWx": "Lacros", "fZIZDk": "Handball",
+    }
+    return mapping.get(sport_class.strip())
+
+
+def _baseline_betano_status(raw, payout):
+    val = (raw or "").strip().lower()
+    if val in ("open", "čeká", "ceka", "nevyhodnoceno", "pending", "waiting", "otevřená", "otevrena", ""):
+        return TicketStatus.open
+    if "čeká" in val or "nevyhodnoceno" in val or "pending" in val or "waiting" in val:
+        return TicketStatus.open
+    if payout is not None and Decimal(payout) > 0:
+        return TicketStatus.won
+    if val:
+        if "výhry" in val or "vyhry" in val or "win" in val:
+            return TicketStatus.won
+        if "prohry" in val or "prohra" in val or "lost" in val:
+            return TicketStatus.lost
+        if "cash out" in val:
+            return TicketStatus.won if payout and payout > 0 else TicketStatus.void
+    return TicketStatus.open
+
+
+def _baseline_betano_sport(icon_id):
+    if not icon_id:
+        return None
+    src = str(icon_id).lower()
+    for prefix, name in sport_mapping.BETANO_ICON_TO_LABEL.items():
+        if prefix in src:
+            return name
+    return None
+
+
+def _baseline_fortuna_status(raw, payout):
+    val = (raw or "").strip().lower()
+    if val in ("waiting", "open", "čeká", "nevyhodnoceno", "pending", ""):
+        return TicketStatus.open
+    if val:
+        if val in ("won", "win", "výhra"):
+            return TicketStatus.won
+        if val in ("lost", "prohra"):
+            return TicketStatus.lost
+        if val in ("void", "vráceno"):
+            return TicketStatus.void
+    if payout is not None and Decimal(payout) > 0:
+        return TicketStatus.won
+    return TicketStatus.open
+
+
+# (sázkovka) → (pole se sportem, původní stav, původní sport, nový stav, nový sport)
+_IMPLEMENTATIONS = {
+    "tipsport": (
+        "sport_class",
+        _baseline_tipsport_status, _baseline_tipsport_sport,
+        tipsport_import._map_status, tipsport_import._map_sport_class_to_label,
+    ),
+    "betano": (
+        "sport_icon_id",
+        _baseline_betano_status, _baseline_betano_sport,
+        betano_import._map_status, betano_import._map_sport_icon_to_label,
+    ),
+    "fortuna": (
+        "sport_icon_id",
+        _baseline_fortuna_status, sport_mapping.fortuna_icon_to_label,
+        fortuna_import._map_status, fortuna_import._map_fortuna_sport_icon_to_label,
+    ),
+}
+
+
+def _load_items(path: str | None, bookmaker: str, size: int) -> list[tuple]:
+    """(status_raw, payout, sport) pro každý tiket payloadu."""
+    if path:
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        tickets = data.get("tickets", []) if isinstance(data, dict) else data
+    else:
+        sample = _SAMPLE[bookmaker]
+        tickets = [sample[i % len(sample)] for i in range(size)]
+    sport_field = _IMPLEMENTATIONS[bookmaker][0]
+    return [
+        (
+            t.get("status_raw"),
+            Decimal(str(t["payout"])) if t.get("payout") is not None else None,
+            t.get(sport_field),
+        )
+        for t in tickets
+    ]
+
+
+def _clear_caches() -> None:
+    status_mapping.tipsport_raw_status.cache_clear()
+    status_mapping.betano_raw_status.cache_clear()
+    sport_mapping._betano_icon_to_label.cache_clear()
+    sport_mapping._normalize_sport_label.cache_clear()
+
+
+def _classify(items, map_status, map_sport) -> list[tuple]:
+    return [(map_status(raw, payout), map_sport(sport)) for raw, payout, sport in items]
+
+
+def _timing_us(items, map_status, map_sport, repeat: int, cold: bool = False) -> float:
+    """Medián času na jeden tiket (µs); cold = před každým během vyprázdnit memoizaci."""
+    times = []
+    for _ in range(repeat):
+        if cold:
+            _clear_caches()
+        started = time.perf_counter()
+        _classify(items, map_status, map_sport)
+        times.append((time.perf_counter() - started) * 1e6 / max(len(items), 1))
+    return statistics.median(times)
+
+
+def run(bookmaker: str, payload: str | None, size: int, repeat: int) -> int:
+    _, old_status, old_sport, new_status, new_sport = _IMPLEMENTATIONS[bookmaker]
+    items = _load_items(payload, bookmaker, size)
+    print(f"{bookmaker}: {len(items)} tiketů, {len({i[0] for i in items})} různých status_raw, medián z {repeat} běhů")
+
+    old = _classify(items, old_status, old_sport)
+    new = _classify(items, new_status, new_sport)
+    mismatches = [(item, a, b) for item, a, b in zip(items, old, new) if a != b]
+    for item, a, b in mismatches[:20]:
+        print(f"  ROZDÍL {item!r}: původní {a!r}, nové {b!r}")
+    if mismatches:
+        print(f"{len(mismatches)} rozdílů – klasifikace se neshoduje")
+        return 1
+
+    before = _timing_us(items, old_status, old_sport, repeat)
+    cold = _timing_us(items, new_status, new_sport, repeat, cold=True)
+    warm = _timing_us(items, new_status, new_sport, repeat)
+    print(f"  původní (any/dict v těle):  {before:7.3f} µs/tiket")
+    print(f"  nové, prázdná cache:        {cold:7.3f} µs/tiket  ({before / cold:4.1f}x)")
+    print(f"  nové, zahřátá cache:        {warm:7.3f} µs/tiket  ({before / warm:4.1f}x)")
+    return 0
+
+
+def main():
+    p = argparse.ArgumentParser(description="Mikro-benchmark klasifikace stavu a sportu scrapených tiketů.")
+    p.add_argument("--bookmaker", choices=sorted(_IMPLEMENTATIONS), help="Sázkovka payloadu (bez --payload všechny)")
+    p.add_argument("--payload", help="JSON s tělem požadavku /scrape ({\"tickets\": [...]})")
+    p.add_argument("--size", type=int, default=5000, help="Počet tiketů vestavěného vzorku")
+    p.add_argument("--repeat", type=int, default=50, help="Počet běhů pro medián")
+    args = p.parse_args()
+    if args.payload and not args.bookmaker:
+        p.error("--payload vyžaduje --bookmaker")
+    bookmakers = [args.bookmaker] if args.bookmaker else sorted(_IMPLEMENTATIONS)
+    failed = 0
+    for bookmaker in bookmakers:
+        failed |= run(bookmaker, args.payload, args.size, args.repeat)
+    sys.exit(failed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+Benchmark: plány a časy typických dotazů na tabulku tickets bez indexů a s nimi.
+
+Dotazy se skládají z kódu aplikace (stats_service, _tickets_query, dedupe importu,
+LIVE), takže plán odpovídá tomu, co skutečně běží. Pro "před" se dropnou všechny
+ne-primární indexy tabulky tickets, pro "po" se vytvoří podle modelu (stejné jako
+migrace add_ticket_filter_indexes).
+
+Použití (z adresáře backend):
+  python -m scripts.benchmark_ticket_indexes                    # dočasná SQLite DB, 50 000 tiketů
+  python -m scripts.benchmark_ticket_indexes --tickets 200000
+  python -m scripts.benchmark_ticket_indexes --database-url postgresql://…   # existující PostgreSQL
+
+U PostgreSQL běží vše v jedné transakci, která se na konci vrátí (ROLLBACK) –
+indexy v databázi zůstanou, jak byly. Během běhu je ale tabulka tickets zamčená.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+# Cesta k backendu (parent of scripts/) kvůli importu app
+_backend = Path(__file__).resolve().parent.parent
+if str(_backend) not in sys.path:
+    sys.path.insert(0, str(_backend))
+
+from sqlalchemy import create_engine, insert, select, text
+from sqlalchemy.orm import Session
+
+from app.database import Base
+from app.models import Bookmaker, Sport, Ticket, TicketStatus, TicketType
+from app.routers.tickets import _tickets_query
+from app.services.stats_service import _measure_columns, _stats_conditions, SETTLED_STATUSES
+
+_TIPSPORT_REF = "tipsport:"
+
+
+def _fill_synthetic(engine, n_tickets: int, seed: int = 42) -> None:
+    """Naplní prázdnou DB číselníky a n_tickets náhodnými tikety (cca 10 % AKU s dětmi)."""
+    Base.metadata.create_all(engine)
+    rnd = random.Random(seed)
+    with Session(engine) as db:
+        db.execute(insert(Sport), [{"id": i, "name": f"Sport {i}"} for i in range(1, 11)])
+        db.execute(insert(Bookmaker), [{"id": i, "name": f"Sázkovka {i}"} for i in range(1, 4)])
+        now = datetime.utcnow()
+        statuses = list(TicketStatus)
+        rows = []
+        for i in range(1, n_tickets + 1):
+            status = rnd.choice(statuses)
+            stake = Decimal(rnd.choice(["50", "100", "250"]))
+            is_aku = rnd.random() < 0.1
+            rows.append({
+                "id": i,
+                "bookmaker_id": rnd.randint(1, 3),
+                "sport_id": rnd.randint(1, 10),
+                "home_team": f"Home {rnd.randint(1, 500)}",
+                "away_team": f"Away {rnd.randint(1, 500)}",
+                "odds": Decimal(str(round(rnd.uniform(1.1, 6.0), 2))),
+                "stake": stake,
+                "profit": -stake if status == TicketStatus.lost else Decimal("0"),
+                "status": status,
+                "ticket_type": TicketType.aku if is_aku else TicketType.solo,
+                "parent_id": None,
+                "ocr_image_path": f"{_TIPSPORT_REF}{1000000 + i}",
+                "tipsport_match_id": str(5000000 + i),
+                "created_at": now - timedelta(minutes=rnd.randint(0, 3 * 365 * 24 * 60)),
+                "is_live": False,
+                "is_newly_imported": False,
+            })
+        db.execute(insert(Ticket), rows)
+        # Děti AKU (po 2 na rodiče)
+        children = []
+        next_id = n_tickets + 1
+        for parent in rows:
+            if parent["ticket_type"] != TicketType.aku:
+                continue
+            for _ in range(2):
+                children.append({**parent, "id": next_id, "parent_id": parent["id"], "ocr_image_path": None,
+                                 "tipsport_match_id": None})
+                next_id += 1
+        if children:
+            db.execute(insert(Ticket), children)
+        db.commit()
+
+
+def _queries(db: Session) -> list[tuple[str, object]]:
+    """(název, SELECT) – dotazy, které aplikace posílá nejčastěji."""
+    month_ago = datetime.utcnow() - timedelta(days=30)
+    week_ago = datetime.utcnow() - timedelta(days=7)
+
+    def stats(filters: dict):
+        return select(*_measure_columns()).where(*_stats_conditions(filters))
+
+    return [
+        ("overview: status + období", stats({"status": TicketStatus.won, "date_from": month_ago})),
+        ("overview: sázkovka + období", stats({"bookmaker_id": 2, "date_from": month_ago})),
+        ("overview: sport + období", stats({"sport_id": 3, "date_from": month_ago})),
+        ("overview: týden (bez filtrů)", stats({"date_from": week_ago})),
+        (
+            "streaky: vypořádané podle created_at",
+            select(Ticket.status, Ticket.profit)
+            .where(*_stats_conditions({"date_from": month_ago}), Ticket.status.in_(SETTLED_STATUSES))
+            .order_by(Ticket.created_at.asc().nullsfirst(), Ticket.id.asc()),
+        ),
+        ("seznam: sázkovka + období", _tickets_query(db, bookmaker_id=2, date_from=month_ago).limit(100).statement),
+        ("seznam: děti AKU", select(Ticket.id).where(Ticket.parent_id == 10)),
+        # Dedupe a LIVE typicky hledají klíč, který ještě v DB není (nový tiket) → bez indexu celý scan
+        (
+            "dedupe: tipsport klíč",
+            select(Ticket.id).where(Ticket.bookmaker_id == 1, Ticket.ocr_image_path == f"{_TIPSPORT_REF}999999999").limit(1),
+        ),
+        (
+            "dedupe: týmy",
+            select(Ticket.id).where(
+                Ticket.bookmaker_id == 1, Ticket.home_team == "Home 12", Ticket.away_team == "Away 34",
+            ),
+        ),
+        ("live: tipsport_match_id", select(Ticket.id).where(Ticket.tipsport_match_id == "999999999").limit(1)),
+    ]
+
+
+def _plan(conn, stmt) -> list[str]:
+    sql = str(stmt.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+    if conn.dialect.name == "postgresql":
+        rows = conn.execute(text("EXPLAIN (ANALYZE, BUFFERS) " + sql)).all()
+        return [r[0] for r in rows]
+    rows = conn.execute(text("EXPLAIN QUERY PLAN " + sql)).all()
+    return [r[-1] for r in rows]
+
+
+def _timing_ms(conn, stmt, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        conn.execute(stmt).all()
+        times.append((time.perf_counter() - started) * 1000)
+    return statistics.median(times)
+
+
+def _measure(conn, db: Session, label: str, repeat: int) -> dict:
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("ANALYZE tickets"))
+    else:
+        conn.execute(text("ANALYZE"))
+    print(f"\n===== {label} =====")
+    result = {}
+    for name, stmt in _queries(db):
+        ms = _timing_ms(conn, stmt, repeat)
+        result[name] = ms
+        print(f"\n-- {name}: {ms:.2f} ms (medián z {repeat})")
+        for line in _plan(conn, stmt):
+            print(f"   {line}")
+    return result
+
+
+def run(database_url: str | None, n_tickets: int, repeat: int) -> None:
+    tmp_dir = None
+    if database_url is None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        database_url = f"sqlite:///{tmp_dir.name}/benchmark.db"
+        print(f"Generuji {n_tickets} tiketů do dočasné SQLite DB…")
+        engine = create_engine(database_url)
+        _fill_synthetic(engine, n_tickets)
+    else:
+        engine = create_engine(database_url)
+
+    indexes = [ix for ix in Ticket.__table__.indexes]
+    try:
+        with engine.connect() as conn:
+            trans = conn.begin()
+            db = Session(bind=conn)
+            for ix in indexes:
+                ix.drop(conn, checkfirst=True)
+            before = _measure(conn, db, "PŘED (bez indexů)", repeat)
+            for ix in indexes:
+                ix.create(conn, checkfirst=True)
+            after = _measure(conn, db, "PO (indexy z modelu)", repeat)
+            # Existující DB nechat beze změny
+            trans.rollback()
+    finally:
+        engine.dispose()
+        if tmp_dir is not None:
+            tmp_dir.cleanup()
+
+    print("\n===== Souhrn (ms) =====")
+    width = max(len(name) for name in before)
+    print(f"{'dotaz'.ljust(width)}  {'před':>9}  {'po':>9}  {'zrychlení':>9}")
+    for name, ms_before in before.items():
+        ms_after = after[name]
+        speedup = ms_before / ms_after if ms_after else float("inf")
+        print(f"{name.ljust(width)}  {ms_before:9.2f}  {ms_after:9.2f}  {speedup:8.1f}x")
+
+
+def main():
+    p = argparse.ArgumentParser(description="Plány a časy dotazů na tickets bez indexů a s indexy.")
+    p.add_argument("--database-url", help="Existující DB (PostgreSQL); bez něj dočasná SQLite se syntetickými daty")
+    p.add_argument("--tickets", type=int, default=50000, help="Počet syntetických tiketů (jen dočasná SQLite)")
+    p.add_argument("--repeat", type=int, default=5, help="Počet opakování každého dotazu pro medián")
+    args = p.parse_args()
+    run(args.database_url, args.tickets, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
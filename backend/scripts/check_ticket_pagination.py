@@ -0,0 +1,124 @@
+"""
+Kontrola keyset stránkování GET /api/tickets: pro každé řazení projde seznam po stránkách
+přes next_cursor i přes offset a porovná pořadí id – cursor nesmí řádek přeskočit ani zopakovat.
+
+Data jsou syntetická (jako benchmark_ticket_indexes): týmy "Home N" / "Away N", takže
+při hledání má spousta tiketů stejnou relevanci (shody na hranici stránky).
+
+Použití (z adresáře backend):
+  python -m scripts.check_ticket_pagination                              # dočasná SQLite DB
+  python -m scripts.check_ticket_pagination --database-url postgresql://…/bettracker_check
+
+--database-url musí ukazovat na prázdnou DB po migracích (alembic upgrade head – pg_trgm
+a index pro hledání); tikety se do ní zapíšou a zůstanou.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+
+# Cesta k backendu (parent of scripts/) kvůli importu app
+_backend = Path(__file__).resolve().parent.parent
+if str(_backend) not in sys.path:
+    sys.path.insert(0, str(_backend))
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+from app.database import Base
+from app.models import Ticket
+from app.routers.tickets import list_tickets
+from scripts.benchmark_ticket_indexes import _fill_synthetic
+
+# (sort_by, sort_dir, search)
+_ORDERINGS = [
+    ("created_at", "desc", None),
+    ("event_date", "desc", None),
+    ("odds", "asc", None),
+    ("stake", "desc", None),
+    ("relevance", "desc", "Home 1"),
+    ("relevance", "desc", "Away 42"),
+    ("relevance", "desc", "Home"),
+]
+
+# Parametry list_tickets, které se volají přímo (bez FastAPI) – výchozí hodnoty místo Query
+_LIST_DEFAULTS = dict(
+    sport_id=None, league_id=None, bookmaker_id=None, status=None, market_type_id=None,
+    parent_id=None, ticket_type=None, is_live=None, date_from=None, date_to=None,
+    odds_min=None, odds_max=None, incomplete=None, active_or_live=None,
+    offset=0, pagination="offset", cursor=None,
+)
+
+
+def _list(db: Session, **params) -> dict:
+    return list_tickets(db=db, **{**_LIST_DEFAULTS, **params})
+
+
+def _ids_by_offset(db: Session, page_size: int, **params) -> list[int]:
+    ids, offset = [], 0
+    while True:
+        items = _list(db, limit=page_size, offset=offset, **params)["items"]
+        ids.extend(t.id for t in items)
+        if len(items) < page_size:
+            return ids
+        offset += page_size
+
+
+def _ids_by_cursor(db: Session, page_size: int, **params) -> list[int]:
+    ids, cursor = [], None
+    while True:
+        page = _list(db, limit=page_size, pagination="cursor", cursor=cursor, **params)
+        ids.extend(t.id for t in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return ids
+
+
+def run(database_url: str | None, n_tickets: int, page_size: int) -> int:
+    tmp_dir = None
+    if database_url is None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        database_url = f"sqlite:///{tmp_dir.name}/pagination.db"
+    engine = create_engine(database_url)
+    failed = 0
+    try:
+        Base.metadata.create_all(engine)
+        with Session(engine) as db:
+            if db.scalar(select(func.count()).select_from(Ticket)):
+                print("Databáze není prázdná – kontrola potřebuje DB jen pro sebe (--database-url).")
+                return 2
+        _fill_synthetic(engine, n_tickets)
+        print(f"DB: {engine.url.render_as_string(hide_password=True)}, {n_tickets} tiketů, stránka {page_size}")
+        with Session(engine) as db:
+            for sort_by, sort_dir, search in _ORDERINGS:
+                params = dict(sort_by=sort_by, sort_dir=sort_dir, search=search)
+                by_offset = _ids_by_offset(db, page_size, **params)
+                by_cursor = _ids_by_cursor(db, page_size, **params)
+                ok = by_offset == by_cursor
+                failed += not ok
+                label = f"{sort_by} {sort_dir}" + (f" hledání {search!r}" if search else "")
+                print(f"  {'OK     ' if ok else 'ROZDÍL '} {label:<34} {len(by_offset)} tiketů (cursor {len(by_cursor)})")
+                if not ok:
+                    missing = set(by_offset) - set(by_cursor)
+                    repeated = len(by_cursor) - len(set(by_cursor))
+                    print(f"          chybí {len(missing)}, opakuje se {repeated}")
+    finally:
+        engine.dispose()
+        if tmp_dir is not None:
+            tmp_dir.cleanup()
+    return 1 if failed else 0
+
+
+def main():
+    p = argparse.ArgumentParser(description="Kontrola keyset stránkování seznamu tiketů proti offsetu.")
+    p.add_argument("--database-url", help="Prázdná DB po migracích (PostgreSQL); bez něj dočasná SQLite")
+    p.add_argument("--tickets", type=int, default=3000, help="Počet syntetických tiketů")
+    p.add_argument("--page-size", type=int, default=37, help="Velikost stránky (liché číslo = hranice uvnitř shod)")
+    args = p.parse_args()
+    sys.exit(run(args.database_url, args.tickets, args.page_size))
+
+
+if __name__ == "__main__":
+    main()
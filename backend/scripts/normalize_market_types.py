@@ -25,6 +25,7 @@ if str(_backend) not in sys.path:
 from app.database import SessionLocal
 from app.models import Ticket, MarketType
 from app.routers.market_types import get_or_create_canonical_market_type
+from app.services import rollup_service
 
 
 def run(dry_run: bool = True, deactivate_unused: bool = False, delete_unused: bool = False):
@@ -49,7 +50,9 @@ def run(dry_run: bool = True, deactivate_unused: bool = False, delete_unused: bo
             if mt and mt.id != t.market_type_id:
                 updates.append((t.id, t.market_label or "(z typu)", mt.name, mt.id))
                 if not dry_run:
+                    before = rollup_service.snapshot(t)
                     t.market_type_id = mt.id
+                    rollup_service.apply_ticket_change(db, before, rollup_service.snapshot(t))
 
         if not dry_run and updates:
             db.commit()
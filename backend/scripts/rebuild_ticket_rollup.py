@@ -0,0 +1,52 @@
+"""
+Skript: Kompletní přepočet předpočítaných statistik – denní rollup (ticket_daily_rollup)
+a průběh equity/streaků (ticket_equity_points).
+
+Obojí se jinak udržuje průběžně při zápisu tiketů; přepočet je potřeba po ručních
+zásazích do tabulky tickets (SQL, obnova zálohy) nebo před zapnutím STATS_USE_ROLLUP.
+
+Použití (z adresáře backend):
+  python -m scripts.rebuild_ticket_rollup
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Cesta k backendu (parent of scripts/) kvůli importu app
+_backend = Path(__file__).resolve().parent.parent
+if str(_backend) not in sys.path:
+    sys.path.insert(0, str(_backend))
+
+from app.database import SessionLocal
+from app.services.equity_service import rebuild_equity
+from app.services.rollup_service import rebuild_rollup
+
+
+def run():
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        rows = rebuild_rollup(db)
+        points = rebuild_equity(db)
+        db.commit()
+        print(
+            f"Rollup přepočítán: {rows} řádků, průběh equity: {points} bodů "
+            f"za {time.perf_counter() - started:.2f} s."
+        )
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def main():
+    argparse.ArgumentParser(description="Přepočet denního rollupu a průběhu equity tiketů.").parse_args()
+    run()
+
+
+if __name__ == "__main__":
+    main()
@@ -14,7 +14,7 @@ def reset_db():
     try:
         # TRUNCATE smaže vše a RESTART IDENTITY vyresetuje ID (v Postgresu)
         # CASCADE se postará o cizí klíče
-        db.execute(text("TRUNCATE TABLE ai_analyses, tickets, leagues, sports, bookmakers, market_types RESTART IDENTITY CASCADE"))
+        db.execute(text("TRUNCATE TABLE ai_analyses, import_jobs, ticket_daily_rollup, ticket_equity_points, ticket_aku_legs, tickets, leagues, sports, bookmakers, market_types RESTART IDENTITY CASCADE"))
         db.commit()
         print("✅ Hotovo. Databáze je prázdná a ID resetována.")
     except Exception as e:
@@ -402,6 +402,7 @@ function TiketyPageContent() {
     const [loading, setLoading] = useState(true);
     const [loadingMore, setLoadingMore] = useState(false);
     const [hasMore, setHasMore] = useState(true);
+    const [nextCursor, setNextCursor] = useState(null);
     const searchParams = useSearchParams();
     const [filters, setFilters] = useState({});
     const [sports, setSports] = useState([]);
@@ -461,19 +462,23 @@ function TiketyPageContent() {
     }, [filters, sortBy, sortDir]);
 
     async function loadTickets(append = false) {
-        const offset = append ? tickets.length : 0;
         if (!append) {
             setLoading(true);
             setLoadError(null);
         } else setLoadingMore(true);
         try {
-            const params = { ...filters, sort_by: sortBy, sort_dir: sortDir, limit: TICKETS_PAGE_SIZE, offset };
+            // Při hledání s výchozím řazením řadit podle relevance (shody)
+            const effectiveSortBy = filters.search && sortBy === "created_at" ? "relevance" : sortBy;
+            // Keyset stránkování: další stránka navazuje na poslední načtený tiket (next_cursor)
+            const params = { ...filters, sort_by: effectiveSortBy, sort_dir: sortDir, limit: TICKETS_PAGE_SIZE, pagination: "cursor" };
+            if (append && nextCursor) params.cursor = nextCursor;
             if (filters.incomplete) params.incomplete = 1;
             const data = await getTickets(params);
             const items = data.items ?? data;
             const total = data.total ?? items.length;
             setTotalCount(total);
-            setHasMore(items.length >= TICKETS_PAGE_SIZE);
+            setNextCursor(data.next_cursor ?? null);
+            setHasMore(Boolean(data.next_cursor));
             if (append) {
                 setTickets((prev) => [...prev, ...items]);
             } else {
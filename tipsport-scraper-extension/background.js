@@ -58,6 +58,46 @@ async function fetchWithFallback(apiBase, path, body) {
   }
 }
 
+const IMPORT_JOB_POLL_MS = 1000;
+// Běžící import bez posunu průběhu (processed) tak dlouho → považuje se za zaseknutý
+// (čekající "pending" job stojí ve frontě za jiným importem, to zaseknutí není)
+const IMPORT_JOB_STALL_MS = 5 * 60 * 1000;
+// Nejdelší čekání na import celkem
+const IMPORT_JOB_TIMEOUT_MS = 60 * 60 * 1000;
+
+/**
+ * Polling stavu importu na pozadí (GET /import/jobs/{id}), dokud neskončí (done | error).
+ * Když se průběh běžícího importu IMPORT_JOB_STALL_MS nepohne (nebo celkem po IMPORT_JOB_TIMEOUT_MS),
+ * vyhodí chybu.
+ */
+async function waitForImportJob(apiBase, jobId) {
+  const url = apiBase.replace(/\/+$/, "") + "/import/jobs/" + jobId;
+  const startedAt = Date.now();
+  let lastProcessed = -1;
+  let lastProgressAt = startedAt;
+  for (;;) {
+    const res = await fetch(url);
+    if (!res.ok) {
+      const text = await res.text();
+      throw new Error("API " + res.status + ": " + text);
+    }
+    const job = await res.json();
+    if (job.status === "done" || job.status === "error") return job;
+    const now = Date.now();
+    if (job.status !== "running" || job.processed !== lastProcessed) {
+      lastProcessed = job.processed;
+      lastProgressAt = now;
+    }
+    if (now - lastProgressAt > IMPORT_JOB_STALL_MS || now - startedAt > IMPORT_JOB_TIMEOUT_MS) {
+      throw new Error(
+        "Import " + jobId + " se nedokončil (stav " + job.status + ", " + (job.processed || 0) + "/" + (job.total || 0) +
+          " tiketů) – zkontrolujte backend a spusťte import znovu."
+      );
+    }
+    await new Promise((resolve) => setTimeout(resolve, IMPORT_JOB_POLL_MS));
+  }
+}
+
 chrome.runtime.onInstalled.addListener(() => {
   chrome.alarms.create("bettracker-live-check", { periodInMinutes: LIVE_CHECK_PERIOD_MINUTES });
 });
@@ -86,6 +126,27 @@ chrome.runtime.onMessage.addListener((message, sender, sendResponse) => {
         let path = "/import/tipsport/scrape";
         if (source === "betano") path = "/import/betano/scrape";
         else if (source === "fortuna") path = "/import/fortuna/scrape";
+        if (!usePreview) {
+          // Import na pozadí: backend hned vrátí job, výsledek se dočte pollingem (velké importy nespadnou na timeout)
+          const jobRes = await fetchWithFallback(API_BASE, path + "/jobs", payload);
+          if (jobRes.res.status !== 404) {
+            if (!jobRes.res.ok) {
+              const text = await jobRes.res.text();
+              sendResponse({ ok: false, error: "API " + jobRes.res.status + ": " + text });
+              return;
+            }
+            const job = await jobRes.res.json();
+            const apiBase = jobRes.fromFallback ? alternateApiBase(API_BASE) : API_BASE;
+            const done = await waitForImportJob(apiBase, job.id);
+            if (done.status !== "done") {
+              sendResponse({ ok: false, error: "Import selhal: " + (done.error_message || done.status) });
+              return;
+            }
+            sendResponse({ ok: true, data: Object.assign({}, done.counts, { results: done.results || [] }) });
+            return;
+          }
+          // Starší backend bez /jobs → synchronní import
+        }
         path += usePreview ? "/preview" : "";
 
         const { res } = await fetchWithFallback(API_BASE, path, payload);